@@ -0,0 +1,121 @@
+/**
+ * Resumable chunked uploads for audio and document inputs
+ *
+ * Files are sent in chunks with their offset; after a connection loss the upload
+ * continues from the last offset the server confirmed. The upload URL is kept in
+ * localStorage, so a retry after a page reload resumes as well.
+ */
+(function() {
+    const STORAGE_PREFIX = 'theramind_upload_';
+    const MAX_RETRIES = 6;
+
+    function storageKey(file, createUrl) {
+        return `${STORAGE_PREFIX}${createUrl}:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    async function sha256Base64(buffer) {
+        const digest = await crypto.subtle.digest('SHA-256', buffer);
+        return btoa(String.fromCharCode(...new Uint8Array(digest)));
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    async function createOrResume(file, options, key) {
+        const savedUrl = localStorage.getItem(key);
+        if (savedUrl) {
+            const response = await fetch(savedUrl, { credentials: 'same-origin' });
+            if (response.ok) {
+                const state = await response.json();
+                if (!state.complete) return state;
+            }
+            localStorage.removeItem(key);
+        }
+
+        const body = new FormData();
+        body.append('filename', file.name);
+        body.append('size', file.size);
+        Object.entries(options.fields || {}).forEach(([name, value]) => body.append(name, value));
+
+        const response = await fetch(options.createUrl, {
+            method: 'POST',
+            body: body,
+            headers: { 'X-CSRFToken': options.csrfToken },
+            credentials: 'same-origin',
+        });
+        const state = await response.json();
+        if (!response.ok) {
+            throw new Error(state.error || 'Upload konnte nicht gestartet werden');
+        }
+        localStorage.setItem(key, state.url);
+        return state;
+    }
+
+    /**
+     * Upload a file in resumable chunks
+     *
+     * @param {File|Blob} file - File to upload
+     * @param {Object} options - createUrl, csrfToken, fields (extra form fields), onProgress(offset, size)
+     * @returns {Promise<Object>} Final upload state including the created input id
+     */
+    async function resumableUpload(file, options) {
+        const key = storageKey(file, options.createUrl);
+        let state = await createOrResume(file, options, key);
+        let retries = 0;
+
+        while (!state.complete) {
+            if (options.onProgress) options.onProgress(state.offset, state.size);
+
+            const buffer = await file.slice(state.offset, state.offset + state.chunk_size).arrayBuffer();
+            const headers = {
+                'Content-Type': 'application/offset+octet-stream',
+                'Upload-Offset': String(state.offset),
+                'X-CSRFToken': options.csrfToken,
+            };
+            if (window.crypto && crypto.subtle) {
+                headers['Upload-Checksum'] = 'sha256 ' + await sha256Base64(buffer);
+            }
+
+            let response = null;
+            try {
+                response = await fetch(state.chunk_url, {
+                    method: 'PATCH',
+                    body: buffer,
+                    headers: headers,
+                    credentials: 'same-origin',
+                });
+            } catch (error) {
+                // Network error, retried below
+            }
+
+            if (response && response.ok) {
+                state = await response.json();
+                retries = 0;
+                continue;
+            }
+            if (response && response.status === 409) {
+                // Server has a different offset (e.g. previous chunk arrived after all)
+                state.offset = (await response.json()).offset;
+                continue;
+            }
+            if (response && response.status !== 460 && response.status < 500) {
+                localStorage.removeItem(key);
+                const body = await response.json().catch(() => ({}));
+                throw new Error(body.error || 'Upload fehlgeschlagen');
+            }
+
+            retries += 1;
+            if (retries > MAX_RETRIES) {
+                throw new Error('Verbindung unterbrochen. Erneut senden setzt den Upload fort.');
+            }
+            await sleep(Math.min(30000, 1000 * 2 ** retries));
+        }
+
+        localStorage.removeItem(key);
+        if (options.onProgress) options.onProgress(state.size, state.size);
+        return state;
+    }
+
+    window.resumableUpload = resumableUpload;
+})();
@@ -0,0 +1,68 @@
+/**
+ * Polls the JSON status of documents instead of re-rendering partials
+ *
+ * Elements with data-status-url are watched; each data-status-<field> attribute
+ * holds the value of a status field the element was rendered with (e.g.
+ * data-status-input-version="3"). When the status reports a different value,
+ * the element receives a "status-changed" event, which its hx-trigger uses to
+ * fetch the partial. Requests send the last ETag, so unchanged documents answer
+ * 304 without a body. Polling pauses while the tab is hidden.
+ */
+(function() {
+    const INTERVAL_MS = 5000;
+    const etags = {};
+    const statuses = {};
+
+    function watchedFields(element) {
+        return Object.keys(element.dataset)
+            .filter(key => key.startsWith('status') && key !== 'statusUrl')
+            .map(key => ({
+                key: key,
+                // dataset keys are camelCase: statusInputVersion -> input_version
+                field: key.slice('status'.length).replace(/[A-Z]/g, (c, i) => (i ? '_' : '') + c.toLowerCase()),
+            }));
+    }
+
+    function hasChanged(element, status) {
+        return watchedFields(element).some(({ key, field }) =>
+            field in status && String(status[field]) !== element.dataset[key]
+        );
+    }
+
+    async function fetchStatus(url) {
+        const headers = { 'Accept': 'application/json' };
+        if (etags[url]) headers['If-None-Match'] = etags[url];
+
+        const response = await fetch(url, { credentials: 'same-origin', cache: 'no-store', headers: headers });
+        if (response.status === 304) return statuses[url];
+        if (!response.ok) return null;
+
+        etags[url] = response.headers.get('ETag');
+        statuses[url] = await response.json();
+        return statuses[url];
+    }
+
+    async function poll() {
+        if (document.hidden) return;
+
+        const elements = document.querySelectorAll('[data-status-url]');
+        const urls = new Set(Array.from(elements, element => element.dataset.statusUrl));
+        for (const url of urls) {
+            let status;
+            try {
+                status = await fetchStatus(url);
+            } catch (e) {
+                continue;  // retry with the next poll
+            }
+            if (!status) continue;
+
+            document.querySelectorAll('[data-status-url]').forEach(element => {
+                if (element.dataset.statusUrl === url && hasChanged(element, status)) {
+                    htmx.trigger(element, 'status-changed');
+                }
+            });
+        }
+    }
+
+    setInterval(poll, INTERVAL_MS);
+})();
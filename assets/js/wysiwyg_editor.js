@@ -80,83 +80,16 @@ window.initWysiwygEditor = function (editorId, content, placeholder = 'Text eing
 
     // Initialize hidden input with current content
     hiddenInput.value = editor.getHTML();
-  }
-};
-
-window.initSessionNotesExtras = function () {
-  let autoSaveTimeout;
-  const autosaveResponse = document.getElementById('autosave-response');
-  const sessionNotesForm = document.getElementById('session-notes-form');
-
-  if (sessionNotesForm && autosaveResponse) {
-    // Function to trigger auto-save
-    function triggerAutoSave() {
-      clearTimeout(autoSaveTimeout);
-      autoSaveTimeout = setTimeout(() => {
-        // Get the editor content and update hidden input
-        const editorElement = document.getElementById('session-notes-editor');
-        const hiddenInput = document.getElementById('session-notes-editor-input');
-
-        if (editorElement && hiddenInput) {
-          // Update hidden input with current editor content
-          hiddenInput.value = editorElement.innerHTML;
-
-          // Show saving indicator
-          autosaveResponse.innerHTML = `
-                        <div class="flex items-center text-sm text-gray-500">
-                            <svg class="w-4 h-4 mr-1 animate-spin" fill="none" viewBox="0 0 24 24">
-                                <circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle>
-                                <path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
-                            </svg>
-                            <span>Wird gespeichert...</span>
-                        </div>
-                    `;
-
-          // Submit the form via HTMX
-          htmx.trigger(sessionNotesForm, 'submit');
-        }
-      }, 2000); // 2 second delay
-    }
-
-    // Wait for the editor to be initialized, then set up event listeners
-    setTimeout(() => {
-      const editorElement = document.getElementById('session-notes-editor');
-      if (editorElement) {
-        // Listen for input events on the contenteditable div
-        editorElement.addEventListener('input', function () {
-          triggerAutoSave();
-        });
-
-        editorElement.addEventListener('keyup', function () {
-          triggerAutoSave();
-        });
-
-        // Also use MutationObserver for more comprehensive change detection
-        const observer = new MutationObserver(function (mutations) {
-          let shouldTrigger = false;
-          mutations.forEach(function (mutation) {
-            if (mutation.type === 'childList' || mutation.type === 'characterData') {
-              shouldTrigger = true;
-            }
-          });
-          if (shouldTrigger) {
-            triggerAutoSave();
-          }
-        });
 
-        observer.observe(editorElement, {
-          childList: true,
-          subtree: true,
-          characterData: true
-        });
-      }
-    }, 1000);
+    window.wysiwygEditors = window.wysiwygEditors || {};
+    window.wysiwygEditors[editorId] = editor;
   }
+};
 
-  // Show saving indicator when HTMX request starts
-  document.body.addEventListener('htmx:beforeRequest', function (evt) {
-    if (evt.detail.elt.id === 'session-notes-form') {
-      autosaveResponse.innerHTML = `
+function autosaveIndicator(element) {
+  return {
+    saving() {
+      element.innerHTML = `
                 <div class="flex items-center text-sm text-gray-500">
                     <svg class="w-4 h-4 mr-1 animate-spin" fill="none" viewBox="0 0 24 24">
                         <circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle>
@@ -165,15 +98,9 @@ window.initSessionNotesExtras = function () {
                     <span>Wird gespeichert...</span>
                 </div>
             `;
-    }
-  });
-
-  // Show success indicator when HTMX request completes
-  document.body.addEventListener('htmx:afterRequest', function (evt) {
-    if (evt.detail.elt.id === 'session-notes-form') {
-
-      if (evt.detail.xhr.status === 200) {
-        autosaveResponse.innerHTML = `
+    },
+    saved() {
+      element.innerHTML = `
                     <div class="flex items-center text-sm text-green-600">
                         <svg class="w-4 h-4 mr-1" fill="currentColor" viewBox="0 0 20 20">
                             <path fill-rule="evenodd" d="M16.707 5.293a1 1 0 010 1.414l-8 8a1 1 0 01-1.414 0l-4-4a1 1 0 011.414-1.414L8 12.586l7.293-7.293a1 1 0 011.414 0z" clip-rule="evenodd"/>
@@ -182,26 +109,176 @@ window.initSessionNotesExtras = function () {
                     </div>
                 `;
 
-        // Hide the indicator after 3 seconds
-        setTimeout(() => {
-          autosaveResponse.innerHTML = '';
-        }, 3000);
-      } else {
-        autosaveResponse.innerHTML = `
+      // Hide the indicator after 3 seconds
+      setTimeout(() => {
+        element.innerHTML = '';
+      }, 3000);
+    },
+    error(message, persistent = false) {
+      element.innerHTML = `
                     <div class="flex items-center text-sm text-red-600">
                         <svg class="w-4 h-4 mr-1" fill="currentColor" viewBox="0 0 20 20">
                             <path fill-rule="evenodd" d="M18 10a8 8 0 11-16 0 8 8 0 0116 0zm-8-3a1 1 0 00-.867.5 1 1 0 11-1.731-1A3 3 0 0113 8a3.001 3.001 0 01-2 2.83V11a1 1 0 11-2 0v-1a1 1 0 011-1 1 1 0 100-2zm0 8a1 1 0 100-2 1 1 0 000 2z" clip-rule="evenodd"/>
                         </svg>
-                        <span>Fehler beim Speichern</span>
+                        <span></span>
                     </div>
                 `;
+      element.querySelector('span').textContent = message || 'Fehler beim Speichern';
 
+      if (!persistent) {
         setTimeout(() => {
-          autosaveResponse.innerHTML = '';
+          element.innerHTML = '';
         }, 5000);
       }
+    },
+  };
+}
+
+function isHighSurrogate(code) {
+  return code >= 0xD800 && code <= 0xDBFF;
+}
+
+function isLowSurrogate(code) {
+  return code >= 0xDC00 && code <= 0xDFFF;
+}
+
+// Single changed range between two strings (offsets in UTF-16 code units)
+function contentPatch(before, after) {
+  const maxPrefix = Math.min(before.length, after.length);
+  let start = 0;
+  while (start < maxPrefix && before.charCodeAt(start) === after.charCodeAt(start)) {
+    start++;
+  }
+  if (start > 0 && isHighSurrogate(before.charCodeAt(start - 1))) {
+    start--;
+  }
+
+  const maxSuffix = maxPrefix - start;
+  let suffix = 0;
+  while (suffix < maxSuffix &&
+         before.charCodeAt(before.length - 1 - suffix) === after.charCodeAt(after.length - 1 - suffix)) {
+    suffix++;
+  }
+  if (suffix > 0 && isLowSurrogate(after.charCodeAt(after.length - suffix))) {
+    suffix--;
+  }
+
+  return {start: start, end: before.length - suffix, text: after.slice(start, after.length - suffix)};
+}
+
+/**
+ * Debounced, diff-based autosave of an editor form
+ *
+ * Only the range that changed since the last save is sent, together with the content
+ * version it is based on (data-content-version on the form). The server rejects the
+ * save with 409 if the document changed in the meantime, e.g. by a generation.
+ * Saves run one at a time; edits made during a save are sent afterwards.
+ */
+function createEditorAutosave(form, editorId, savedContentId, indicatorElement, delay = 2000) {
+  const indicator = autosaveIndicator(indicatorElement);
+  const savedContentElement = document.getElementById(savedContentId);
+  let savedContent = savedContentElement ? JSON.parse(savedContentElement.textContent) : '';
+  let version = form.dataset.contentVersion;
+  let timeout = null;
+  let inFlight = false;
+  let pending = false;
+  let stopped = false;
+
+  function currentContent() {
+    const editor = window.wysiwygEditors && window.wysiwygEditors[editorId];
+    return editor ? editor.getHTML() : document.getElementById(editorId + '-input').value;
+  }
+
+  async function save() {
+    if (stopped) return;
+    if (inFlight) {
+      pending = true;
+      return;
     }
-  });
+
+    const content = currentContent();
+    if (content === savedContent) return;
+
+    const patch = contentPatch(savedContent, content);
+    const body = new URLSearchParams({
+      content_version: version,
+      patch_start: patch.start,
+      patch_end: patch.end,
+      patch_text: patch.text,
+    });
+
+    inFlight = true;
+    indicator.saving();
+    try {
+      const response = await fetch(form.action, {
+        method: 'POST',
+        body: body,
+        headers: {'X-CSRFToken': form.querySelector('[name=csrfmiddlewaretoken]').value},
+        credentials: 'same-origin',
+      });
+      const data = await response.json();
+      if (response.ok) {
+        version = data.version;
+        // The server returns the content only if sanitizing changed it
+        savedContent = data.content !== undefined ? data.content : content;
+        indicator.saved();
+      } else if (response.status === 409) {
+        stopped = true;
+        indicator.error(data.error, true);
+      } else {
+        indicator.error(data.error);
+      }
+    } catch (error) {
+      indicator.error();
+    } finally {
+      inFlight = false;
+      if (pending) {
+        pending = false;
+        schedule();
+      }
+    }
+  }
+
+  function schedule() {
+    clearTimeout(timeout);
+    timeout = setTimeout(save, delay);
+  }
+
+  return {schedule: schedule, saveNow: save};
+}
+
+window.initSessionNotesExtras = function () {
+  const autosaveResponse = document.getElementById('autosave-response');
+  const sessionNotesForm = document.getElementById('session-notes-form');
+
+  if (sessionNotesForm && autosaveResponse) {
+    const autosave = createEditorAutosave(
+        sessionNotesForm, 'session-notes-editor', 'session-notes-saved', autosaveResponse
+    );
+
+    // Wait for the editor to be initialized, then set up event listeners
+    setTimeout(() => {
+      const editorElement = document.getElementById('session-notes-editor');
+      if (editorElement) {
+        // Listen for input events on the contenteditable div
+        editorElement.addEventListener('input', autosave.schedule);
+        editorElement.addEventListener('keyup', autosave.schedule);
+
+        // Also use MutationObserver for more comprehensive change detection
+        const observer = new MutationObserver(function (mutations) {
+          if (mutations.some(mutation => mutation.type === 'childList' || mutation.type === 'characterData')) {
+            autosave.schedule();
+          }
+        });
+
+        observer.observe(editorElement, {
+          childList: true,
+          subtree: true,
+          characterData: true
+        });
+      }
+    }, 1000);
+  }
 
   // Copy to clipboard logic
   const editorElement = document.getElementById('session-notes-editor');
@@ -280,63 +357,26 @@ window.initSessionNotesExtras = function () {
 };
 
 window.initReportExtras = function () {
-  let autoSaveTimeout;
   const autosaveResponse = document.getElementById('autosave-response');
   const reportContentForm = document.getElementById('report-content-form');
 
   if (reportContentForm && autosaveResponse) {
-    // Function to trigger auto-save
-    function triggerAutoSave() {
-      clearTimeout(autoSaveTimeout);
-      autoSaveTimeout = setTimeout(() => {
-        // Get the editor content and update hidden input
-        const editorElement = document.getElementById('report-content-editor');
-        const hiddenInput = document.getElementById('report-content-editor-input');
-
-        if (editorElement && hiddenInput) {
-          // Update hidden input with current editor content
-          hiddenInput.value = editorElement.innerHTML;
-
-          // Show saving indicator
-          autosaveResponse.innerHTML = `
-                        <div class="flex items-center text-sm text-gray-500">
-                            <svg class="w-4 h-4 mr-1 animate-spin" fill="none" viewBox="0 0 24 24">
-                                <circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle>
-                                <path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
-                            </svg>
-                            <span>Wird gespeichert...</span>
-                        </div>
-                    `;
-
-          // Submit the form via HTMX
-          htmx.trigger(reportContentForm, 'submit');
-        }
-      }, 2000); // 2 second delay
-    }
+    const autosave = createEditorAutosave(
+        reportContentForm, 'report-content-editor', 'report-content-saved', autosaveResponse
+    );
 
     // Wait for the editor to be initialized, then set up event listeners
     setTimeout(() => {
       const editorElement = document.getElementById('report-content-editor');
       if (editorElement) {
         // Listen for input events on the contenteditable div
-        editorElement.addEventListener('input', function () {
-          triggerAutoSave();
-        });
-
-        editorElement.addEventListener('keyup', function () {
-          triggerAutoSave();
-        });
+        editorElement.addEventListener('input', autosave.schedule);
+        editorElement.addEventListener('keyup', autosave.schedule);
 
         // Also use MutationObserver for more comprehensive change detection
         const observer = new MutationObserver(function (mutations) {
-          let shouldTrigger = false;
-          mutations.forEach(function (mutation) {
-            if (mutation.type === 'childList' || mutation.type === 'characterData') {
-              shouldTrigger = true;
-            }
-          });
-          if (shouldTrigger) {
-            triggerAutoSave();
+          if (mutations.some(mutation => mutation.type === 'childList' || mutation.type === 'characterData')) {
+            autosave.schedule();
           }
         });
 
@@ -349,56 +389,6 @@ window.initReportExtras = function () {
     }, 1000);
   }
 
-  // Show saving indicator when HTMX request starts
-  document.body.addEventListener('htmx:beforeRequest', function (evt) {
-    if (evt.detail.elt.id === 'report-content-form') {
-      autosaveResponse.innerHTML = `
-                <div class="flex items-center text-sm text-gray-500">
-                    <svg class="w-4 h-4 mr-1 animate-spin" fill="none" viewBox="0 0 24 24">
-                        <circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle>
-                        <path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
-                    </svg>
-                    <span>Wird gespeichert...</span>
-                </div>
-            `;
-    }
-  });
-
-  // Show success indicator when HTMX request completes
-  document.body.addEventListener('htmx:afterRequest', function (evt) {
-    if (evt.detail.elt.id === 'report-content-form') {
-
-      if (evt.detail.xhr.status === 200) {
-        autosaveResponse.innerHTML = `
-                    <div class="flex items-center text-sm text-green-600">
-                        <svg class="w-4 h-4 mr-1" fill="currentColor" viewBox="0 0 20 20">
-                            <path fill-rule="evenodd" d="M16.707 5.293a1 1 0 010 1.414l-8 8a1 1 0 01-1.414 0l-4-4a1 1 0 011.414-1.414L8 12.586l7.293-7.293a1 1 0 011.414 0z" clip-rule="evenodd"/>
-                        </svg>
-                        <span>Gesichert</span>
-                    </div>
-                `;
-
-        // Hide the indicator after 3 seconds
-        setTimeout(() => {
-          autosaveResponse.innerHTML = '';
-        }, 3000);
-      } else {
-        autosaveResponse.innerHTML = `
-                    <div class="flex items-center text-sm text-red-600">
-                        <svg class="w-4 h-4 mr-1" fill="currentColor" viewBox="0 0 20 20">
-                            <path fill-rule="evenodd" d="M18 10a8 8 0 11-16 0 8 8 0 0116 0zm-8-3a1 1 0 00-.867.5 1 1 0 11-1.731-1A3 3 0 0113 8a3.001 3.001 0 01-2 2.83V11a1 1 0 11-2 0v-1a1 1 0 011-1 1 1 0 100-2zm0 8a1 1 0 100-2 1 1 0 000 2z" clip-rule="evenodd"/>
-                        </svg>
-                        <span>Fehler beim Speichern</span>
-                    </div>
-                `;
-
-        setTimeout(() => {
-          autosaveResponse.innerHTML = '';
-        }, 5000);
-      }
-    }
-  });
-
   // Copy content to clipboard
   document.getElementById('copy-content-btn').addEventListener('click', function () {
     // Get the content from the WYSIWYG editor
@@ -1,9 +1,9 @@
 from .transcription import GenericTranscriptionConnector, TranscriptionResult
-from .llm import GenericLLMConnector, LLMGenerationParams, LLMResult
+from .llm import GenericLLMConnector, LLMBatch, LLMBatchRequest, LLMGenerationParams, LLMResult
 from .exceptions import AIConnectorError, TranscriptionError, LLMError, ConfigurationError
 
 __all__ = [
     'GenericTranscriptionConnector', 'TranscriptionResult',
-    'GenericLLMConnector', 'LLMGenerationParams', 'LLMResult',
+    'GenericLLMConnector', 'LLMGenerationParams', 'LLMResult', 'LLMBatch', 'LLMBatchRequest',
     'AIConnectorError', 'TranscriptionError', 'LLMError', 'ConfigurationError'
 ] 
\ No newline at end of file
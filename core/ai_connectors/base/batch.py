@@ -0,0 +1,118 @@
+"""Local stand-in for provider batch endpoints"""
+
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict
+
+from django.conf import settings
+
+from .llm import LLMBatch, LLMBatchRequest, LLMGenerationParams, LLMResult
+from .exceptions import LLMError
+
+
+class LocalBatchServer:
+    """
+    Batch endpoint emulated with files in LLM_BATCH_DIR
+
+    Submitted requests are stored as JSON; the first poll after
+    LLM_BATCH_LOCAL_DELAY_SECONDS runs them one after another with the connector's
+    generate_text and stores the results. Used by connectors without a batch API
+    (local models) and in development, where batches complete on the next poll.
+    """
+
+    def __init__(self, connector):
+        self.connector = connector
+        self.directory = settings.LLM_BATCH_DIR
+
+    def _path(self, batch_id: str, kind: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.{kind}.json")
+
+    def _write(self, path: str, data):
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary_path, path)
+
+    def submit(self, requests: list[LLMBatchRequest]) -> str:
+        """Store the requests and return the batch ID"""
+        os.makedirs(self.directory, exist_ok=True)
+        batch_id = f"local-{uuid.uuid4().hex}"
+        self._write(self._path(batch_id, "requests"), [asdict(request) for request in requests])
+        return batch_id
+
+    def get(self, batch_id: str) -> LLMBatch:
+        """Get the batch state, running the requests once they are due"""
+        results_path = self._path(batch_id, "results")
+        if os.path.exists(results_path):
+            with open(results_path, encoding="utf-8") as file:
+                data = json.load(file)
+            return LLMBatch(
+                batch_id=batch_id,
+                status=LLMBatch.COMPLETED,
+                results={key: LLMResult(**value) for key, value in data["results"].items()},
+                errors=data["errors"],
+            )
+
+        requests_path = self._path(batch_id, "requests")
+        if not os.path.exists(requests_path):
+            raise LLMError(f"Batch {batch_id} nicht gefunden")
+        if time.time() - os.path.getmtime(requests_path) < settings.LLM_BATCH_LOCAL_DELAY_SECONDS:
+            return LLMBatch(batch_id=batch_id, status=LLMBatch.PENDING)
+
+        # Only one poller runs a batch; others see it as pending
+        if not self._acquire_lock(batch_id):
+            return LLMBatch(batch_id=batch_id, status=LLMBatch.PENDING)
+
+        try:
+            with open(requests_path, encoding="utf-8") as file:
+                requests = json.load(file)
+
+            results, errors = {}, {}
+            for request in requests:
+                try:
+                    result = self.connector.generate_text(
+                        request["system_prompt"],
+                        request["user_prompt"],
+                        LLMGenerationParams(**request["params"]),
+                    )
+                    results[request["custom_id"]] = asdict(result)
+                except Exception as e:
+                    errors[request["custom_id"]] = str(e)
+
+            self._write(results_path, {"results": results, "errors": errors})
+            os.remove(requests_path)
+        finally:
+            os.remove(self._path(batch_id, "lock"))
+
+        return self.get(batch_id)
+
+    def delete(self, batch_id: str):
+        """Remove the files of a batch (once its results were written back)"""
+        for kind in ("requests", "results"):
+            try:
+                os.remove(self._path(batch_id, kind))
+            except FileNotFoundError:
+                pass
+
+    def _acquire_lock(self, batch_id: str) -> bool:
+        """
+        Create the batch's lock file, or return False if another poller holds it
+
+        A lock older than LLM_BATCH_LOCAL_LOCK_TIMEOUT_SECONDS was left by a poller
+        that crashed while running the batch and is taken over.
+        """
+        lock_path = self._path(batch_id, "lock")
+        try:
+            lock_age = time.time() - os.path.getmtime(lock_path)
+            if lock_age >= settings.LLM_BATCH_LOCAL_LOCK_TIMEOUT_SECONDS:
+                os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return False
+        return True
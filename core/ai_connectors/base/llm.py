@@ -1,8 +1,8 @@
 """Generic LLM connector interface"""
 
 from abc import ABC, abstractmethod
-from typing import Optional
-from dataclasses import dataclass
+from typing import Iterator, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -11,6 +11,11 @@ class LLMGenerationParams:
     max_tokens: int = 1000
     temperature: float = 0.3
     model: Optional[str] = None
+    # Latency-sensitive calls may be hedged to a second provider (see failover.py)
+    hedge: bool = False
+    # Kind of call (e.g. "summary", "report"); latency statistics are kept per kind,
+    # so a hedge waits for the p95 of comparable calls
+    latency_key: str = "default"
 
 
 @dataclass
@@ -19,6 +24,32 @@ class LLMResult:
     text: str
     usage_tokens: Optional[int] = None
     model_used: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    # Prompt tokens served from the provider's prompt cache (if reported)
+    cached_tokens: Optional[int] = None
+
+
+@dataclass
+class LLMBatchRequest:
+    """One generation of a batch; custom_id identifies its result"""
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    params: LLMGenerationParams
+
+
+@dataclass
+class LLMBatch:
+    """State of a submitted batch"""
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    batch_id: str
+    status: str
+    # Results and errors by custom_id (complete once the batch is no longer pending)
+    results: dict[str, LLMResult] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
 
 
 class GenericLLMConnector(ABC):
@@ -52,6 +83,71 @@ class GenericLLMConnector(ABC):
             ConfigurationError: If service is not properly configured
         """
         pass
+
+    def stream_text(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        params: LLMGenerationParams
+    ) -> Iterator[str]:
+        """
+        Generate text using the LLM and yield it in chunks as it is produced
+
+        Connectors without native streaming support yield the complete text at once.
+
+        Args:
+            system_prompt: System prompt to set context
+            user_prompt: User prompt with the actual request
+            params: Generation parameters
+
+        Yields:
+            Generated text chunks
+        """
+        yield self.generate_text(system_prompt, user_prompt, params).text
+
+    def submit_batch(self, requests: list[LLMBatchRequest]) -> str:
+        """
+        Submit generations that may take until the provider's batch deadline (at batch
+        prices, without using interactive capacity)
+
+        Connectors without a batch endpoint use the local stand-in (base/batch.py),
+        which runs the requests when the batch is first polled.
+
+        Returns:
+            Batch ID for get_batch
+        """
+        from .batch import LocalBatchServer
+
+        return LocalBatchServer(self).submit(requests)
+
+    def get_batch(self, batch_id: str) -> LLMBatch:
+        """
+        Get the state of a submitted batch
+
+        Raises:
+            LLMError: If the batch cannot be read
+        """
+        from .batch import LocalBatchServer
+
+        return LocalBatchServer(self).get(batch_id)
+
+    def delete_batch(self, batch_id: str) -> None:
+        """
+        Delete the stored requests and results of a batch whose results were written back
+
+        Raises:
+            LLMError: If the batch data cannot be deleted
+        """
+        from .batch import LocalBatchServer
+
+        LocalBatchServer(self).delete(batch_id)
+
+    def warm_up(self, system_prompts: list[str]) -> None:
+        """
+        Prepare the connector for the given shared system prompts (e.g. load a local
+        model and prime its prompt cache). No-op for hosted providers.
+        """
+        pass
     
     @abstractmethod
     def get_available_models(self) -> list[str]:
@@ -6,6 +6,8 @@ from .base.transcription import GenericTranscriptionConnector
 from .base.llm import GenericLLMConnector
 from .openai.transcription import OpenAIWhisperConnector
 from .openai.llm import OpenAILLMConnector
+from .local.llm import LocalLLMConnector
+from .failover import FailoverLLMConnector, FailoverTranscriptionConnector
 
 
 class ConnectorFactory:
@@ -20,6 +22,7 @@ class ConnectorFactory:
     
     _llm_connectors = {
         'openai': OpenAILLMConnector,
+        'local': LocalLLMConnector,
         # Future providers can be added here:
         # 'azure': AzureOpenAIConnector,
         # 'anthropic': AnthropicConnector,
@@ -31,6 +34,12 @@ class ConnectorFactory:
         provider: str = None
     ) -> GenericTranscriptionConnector:
         """Get transcription connector instance"""
+        failover_providers = getattr(settings, 'TRANSCRIPTION_FAILOVER_PROVIDERS', [])
+        if provider is None and len(failover_providers) > 1:
+            return FailoverTranscriptionConnector(
+                [(name, cls.get_transcription_connector(name)) for name in failover_providers]
+            )
+
         provider = provider or getattr(settings, 'DEFAULT_TRANSCRIPTION_PROVIDER', 'openai')
         
         if provider not in cls._transcription_connectors:
@@ -42,6 +51,12 @@ class ConnectorFactory:
     @classmethod
     def get_llm_connector(cls, provider: str = None) -> GenericLLMConnector:
         """Get LLM connector instance"""
+        failover_providers = getattr(settings, 'LLM_FAILOVER_PROVIDERS', [])
+        if provider is None and len(failover_providers) > 1:
+            return FailoverLLMConnector(
+                [(name, cls.get_llm_connector(name)) for name in failover_providers]
+            )
+
         provider = provider or getattr(settings, 'DEFAULT_LLM_PROVIDER', 'openai')
         
         if provider not in cls._llm_connectors:
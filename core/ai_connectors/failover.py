@@ -0,0 +1,327 @@
+"""Composite connectors with health tracking, circuit breaker and priority failover"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+
+from .base.transcription import GenericTranscriptionConnector, TranscriptionResult
+from .base.llm import GenericLLMConnector, LLMBatch, LLMBatchRequest, LLMGenerationParams, LLMResult
+from .base.exceptions import LLMError, TranscriptionError, ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for hedged requests; the losing request keeps running here and is discarded
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ai-hedge")
+
+
+@dataclass
+class ProviderHealth:
+    """Health state and latency statistics of a single provider"""
+    name: str
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+    trial_started_at: Optional[float] = None
+    # Recent latencies per kind of call (LLMGenerationParams.latency_key)
+    latencies: dict[str, deque] = field(default_factory=dict)
+
+    def allows_request(self) -> bool:
+        """Closed circuit, or open circuit whose reset timeout passed and no trial is running"""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        reset_seconds = settings.AI_CIRCUIT_BREAKER_RESET_SECONDS
+        # A trial that never reported back (e.g. an abandoned stream) counts as lost
+        trial_running = (
+            self.trial_started_at is not None and now - self.trial_started_at < reset_seconds
+        )
+        return now - self.opened_at >= reset_seconds and not trial_running
+
+    def acquire(self) -> bool:
+        """
+        Claim a request; with an open circuit only a single half-open trial is allowed
+
+        Returns:
+            False if the request must not be sent to this provider
+        """
+        if not self.allows_request():
+            return False
+        if self.opened_at is not None:
+            self.trial_started_at = time.monotonic()
+        return True
+
+    def record_success(self, latency: Optional[float] = None, latency_key: str = "default"):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        if latency is not None:
+            self.latencies.setdefault(latency_key, deque(maxlen=200)).append(latency)
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial_started_at = None
+        if self.consecutive_failures >= settings.AI_CIRCUIT_BREAKER_FAILURES:
+            # (Re-)open the circuit; a failed half-open trial restarts the timeout
+            self.opened_at = time.monotonic()
+
+    def p95_latency(self, latency_key: str = "default") -> Optional[float]:
+        """95th percentile of recent successful call latencies of one kind of call"""
+        latencies = self.latencies.get(latency_key, ())
+        if len(latencies) < settings.AI_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def snapshot(self) -> dict:
+        return {
+            "provider": self.name,
+            "circuit_open": not self.allows_request(),
+            "consecutive_failures": self.consecutive_failures,
+            "p95_latency": {key: self.p95_latency(key) for key in self.latencies},
+        }
+
+
+class FailoverMixin:
+    """Routes calls to the first healthy provider in priority order"""
+
+    error_class = Exception
+
+    def __init__(self, connectors: list[tuple[str, object]]):
+        self.connectors = connectors
+        self.health = {name: ProviderHealth(name) for name, _ in connectors}
+        self._lock = threading.Lock()
+
+    def _candidates(self) -> list[tuple[str, object]]:
+        """Providers that are configured and not blocked by an open circuit"""
+        with self._lock:
+            return [
+                (name, connector)
+                for name, connector in self.connectors
+                if self.health[name].allows_request() and connector.is_available()
+            ]
+
+    def _acquire(self, name: str):
+        """Claim a request on a provider (raises while its circuit is open)"""
+        with self._lock:
+            if not self.health[name].acquire():
+                raise self.error_class("Anbieter vorübergehend gesperrt")
+
+    def _invoke(self, name: str, connector, operation: Callable, latency_key: str = "default"):
+        """Run operation on one provider and record the outcome"""
+        self._acquire(name)
+        start = time.monotonic()
+        try:
+            result = operation(connector)
+        except Exception:
+            with self._lock:
+                self.health[name].record_failure()
+            raise
+
+        with self._lock:
+            self.health[name].record_success(time.monotonic() - start, latency_key)
+        return result
+
+    def _call(self, operation: Callable, latency_key: str = "default", hedge: bool = False):
+        """
+        Execute operation with priority failover
+
+        Args:
+            operation: Callable receiving a connector
+            latency_key: Kind of call whose latencies are recorded and used for hedging
+            hedge: Start a second provider if the first one exceeds its p95 latency
+
+        Returns:
+            Result of the first successful provider
+        """
+        candidates = self._candidates()
+        if not candidates:
+            raise ConfigurationError("Kein KI-Anbieter verfügbar")
+
+        if hedge and len(candidates) > 1:
+            return self._call_hedged(operation, candidates, latency_key)
+
+        errors = []
+        for name, connector in candidates:
+            try:
+                return self._invoke(name, connector, operation, latency_key)
+            except Exception as e:
+                logger.warning(f"Provider {name} failed, trying next provider: {str(e)}")
+                errors.append(f"{name}: {str(e)}")
+
+        raise self.error_class(f"Alle Anbieter fehlgeschlagen ({'; '.join(errors)})")
+
+    def _call_hedged(
+        self, operation: Callable, candidates: list[tuple[str, object]], latency_key: str
+    ):
+        """Run operation on the primary provider and hedge with the next one after its p95"""
+        remaining = list(candidates)
+        futures = {}
+        errors = []
+
+        def submit_next():
+            name, connector = remaining.pop(0)
+            future = _hedge_executor.submit(self._invoke, name, connector, operation, latency_key)
+            futures[future] = name
+
+        primary_name = remaining[0][0]
+        with self._lock:
+            p95_latency = self.health[primary_name].p95_latency(latency_key)
+        hedge_delay = p95_latency or settings.AI_HEDGE_DEFAULT_DELAY_SECONDS
+        submit_next()
+
+        done, _ = wait(futures, timeout=hedge_delay)
+        if not done and remaining:
+            logger.info(f"Provider {primary_name} slower than {hedge_delay:.1f}s, hedging request")
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    logger.warning(f"Provider {name} failed during hedged request: {str(e)}")
+                    errors.append(f"{name}: {str(e)}")
+                    if remaining and not futures:
+                        submit_next()
+
+        raise self.error_class(f"Alle Anbieter fehlgeschlagen ({'; '.join(errors)})")
+
+    def get_health(self) -> list[dict]:
+        """Health snapshot of all wrapped providers in priority order"""
+        with self._lock:
+            return [self.health[name].snapshot() for name, _ in self.connectors]
+
+    def is_available(self) -> bool:
+        """Check if at least one provider can serve requests"""
+        return bool(self._candidates())
+
+    def reinitialize(self) -> None:
+        """Reinitialize all wrapped connectors and reset their health"""
+        for name, connector in self.connectors:
+            connector.reinitialize()
+        with self._lock:
+            self.health = {name: ProviderHealth(name) for name, _ in self.connectors}
+
+
+class FailoverLLMConnector(FailoverMixin, GenericLLMConnector):
+    """LLM connector that fails over between several providers"""
+
+    error_class = LLMError
+
+    def generate_text(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        params: LLMGenerationParams
+    ) -> LLMResult:
+        """Generate text with the first healthy provider (hedged if params.hedge is set)"""
+        return self._call(
+            lambda connector: connector.generate_text(system_prompt, user_prompt, params),
+            latency_key=params.latency_key,
+            hedge=params.hedge,
+        )
+
+    def stream_text(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        params: LLMGenerationParams
+    ) -> Iterator[str]:
+        """Stream from the first healthy provider; fails over only before the first chunk"""
+        errors = []
+        for name, connector in self._candidates():
+            started = False
+            try:
+                self._acquire(name)
+            except LLMError as e:
+                errors.append(f"{name}: {str(e)}")
+                continue
+            try:
+                for chunk in connector.stream_text(system_prompt, user_prompt, params):
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                # The reader stopped early; if the provider did answer, it is healthy
+                if started:
+                    with self._lock:
+                        self.health[name].record_success()
+                raise
+            except Exception as e:
+                with self._lock:
+                    self.health[name].record_failure()
+                if started:
+                    raise
+                errors.append(f"{name}: {str(e)}")
+            else:
+                # Durations of streams depend on the output length; no latency sample
+                with self._lock:
+                    self.health[name].record_success()
+                return
+
+        raise LLMError(f"Alle Anbieter fehlgeschlagen ({'; '.join(errors)})")
+
+    def submit_batch(self, requests: list[LLMBatchRequest]) -> str:
+        """Submit to the first healthy provider; the batch ID records the provider"""
+        name, batch_id = self._call(
+            lambda connector: (self._name_of(connector), connector.submit_batch(requests)),
+            latency_key="submit_batch",
+        )
+        return f"{name}:{batch_id}"
+
+    def get_batch(self, batch_id: str) -> LLMBatch:
+        """Get a batch from the provider it was submitted to"""
+        name, _, provider_batch_id = batch_id.partition(":")
+        connectors = dict(self.connectors)
+        if name not in connectors:
+            raise LLMError(f"Unbekannter Anbieter für Batch {batch_id}")
+        state = connectors[name].get_batch(provider_batch_id)
+        state.batch_id = batch_id
+        return state
+
+    def delete_batch(self, batch_id: str) -> None:
+        """Delete a batch at the provider it was submitted to"""
+        name, _, provider_batch_id = batch_id.partition(":")
+        connectors = dict(self.connectors)
+        if name not in connectors:
+            raise LLMError(f"Unbekannter Anbieter für Batch {batch_id}")
+        connectors[name].delete_batch(provider_batch_id)
+
+    def _name_of(self, connector) -> str:
+        return next(name for name, candidate in self.connectors if candidate is connector)
+
+    def warm_up(self, system_prompts: list[str]) -> None:
+        for name, connector in self.connectors:
+            connector.warm_up(system_prompts)
+
+    def get_available_models(self) -> list[str]:
+        models = []
+        for name, connector in self.connectors:
+            models.extend(m for m in connector.get_available_models() if m not in models)
+        return models
+
+
+class FailoverTranscriptionConnector(FailoverMixin, GenericTranscriptionConnector):
+    """Transcription connector that fails over between several providers"""
+
+    error_class = TranscriptionError
+
+    def transcribe(self, file_path: str, language: str = "de") -> TranscriptionResult:
+        """Transcribe with the first healthy provider"""
+        return self._call(
+            lambda connector: connector.transcribe(file_path, language), latency_key="transcribe"
+        )
+
+    def get_supported_formats(self) -> list[str]:
+        """Formats every wrapped provider can handle"""
+        formats = None
+        for name, connector in self.connectors:
+            supported = connector.get_supported_formats()
+            formats = supported if formats is None else [f for f in formats if f in supported]
+        return formats or []
@@ -0,0 +1,3 @@
+from .llm import LocalLLMConnector
+
+__all__ = ['LocalLLMConnector']
@@ -0,0 +1,233 @@
+"""Local LLM connector (OpenAI-compatible server or in-process llama.cpp model)"""
+
+import os
+import threading
+from typing import Iterator
+
+from openai import OpenAI
+from django.conf import settings
+
+from ..base.llm import GenericLLMConnector, LLMGenerationParams, LLMResult
+from ..base.exceptions import LLMError, ConfigurationError
+from ..openai.llm import get_cached_tokens
+
+
+BACKEND_SERVER = "server"
+BACKEND_LLAMA_CPP = "llama_cpp"
+
+# Models loaded in-process stay resident for the lifetime of the worker process.
+# Keyed by (model_path, context_size, threads); each entry holds the model and a lock,
+# since a llama.cpp context can only serve one generation at a time.
+_resident_models = {}
+_resident_models_lock = threading.Lock()
+
+
+def _get_resident_model(model_path: str, context_size: int, threads: int = None):
+    """Load a llama.cpp model once per worker process and return (model, lock)"""
+    key = (model_path, context_size, threads)
+
+    with _resident_models_lock:
+        if key not in _resident_models:
+            try:
+                from llama_cpp import Llama, LlamaRAMCache
+            except ImportError:
+                raise ConfigurationError(
+                    "Lokales Modell benötigt das Paket 'llama-cpp-python'"
+                )
+
+            model = Llama(
+                model_path=model_path,
+                n_ctx=context_size,
+                n_threads=threads,
+                verbose=False,
+            )
+            # Keep the KV state of previously evaluated prompt prefixes in RAM so the
+            # long shared system prompts are only evaluated once per worker
+            model.set_cache(LlamaRAMCache(capacity_bytes=settings.LOCAL_LLM_PREFIX_CACHE_BYTES))
+            _resident_models[key] = (model, threading.Lock())
+
+        return _resident_models[key]
+
+
+class LocalLLMConnector(GenericLLMConnector):
+    """Local LLM implementation for text generation on our own hardware"""
+
+    def __init__(self):
+        self.client = None
+        self.backend = None
+        self._init_client()
+
+    def _init_client(self):
+        """Initialize the backend from settings"""
+        self.backend = settings.LOCAL_LLM_BACKEND
+
+        if self.backend == BACKEND_SERVER and settings.LOCAL_LLM_BASE_URL:
+            self.client = OpenAI(
+                base_url=settings.LOCAL_LLM_BASE_URL,
+                api_key=settings.LOCAL_LLM_API_KEY or "local",
+            )
+        else:
+            self.client = None
+
+    def is_available(self) -> bool:
+        """Check if the LLM service is available"""
+        if self.backend == BACKEND_LLAMA_CPP:
+            return bool(settings.LOCAL_LLM_MODEL_PATH) and os.path.exists(
+                settings.LOCAL_LLM_MODEL_PATH
+            )
+        return self.client is not None
+
+    def generate_text(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        params: LLMGenerationParams
+    ) -> LLMResult:
+        """
+        Generate text using the local model
+
+        Args:
+            system_prompt: System prompt to set context
+            user_prompt: User prompt with the actual request
+            params: Generation parameters
+
+        Returns:
+            LLMResult with generated text and metadata
+        """
+        if not self.is_available():
+            raise ConfigurationError("Lokales LLM nicht konfiguriert")
+
+        if not user_prompt.strip():
+            return LLMResult(text="")
+
+        messages = self._build_messages(system_prompt, user_prompt)
+
+        try:
+            if self.backend == BACKEND_LLAMA_CPP:
+                model, lock = self._get_model()
+                with lock:
+                    response = model.create_chat_completion(
+                        messages=messages,
+                        max_tokens=params.max_tokens,
+                        temperature=params.temperature,
+                    )
+
+                usage = response.get("usage") or {}
+                return LLMResult(
+                    text=response["choices"][0]["message"]["content"].strip(),
+                    usage_tokens=usage.get("total_tokens"),
+                    model_used=os.path.basename(settings.LOCAL_LLM_MODEL_PATH),
+                    prompt_tokens=usage.get("prompt_tokens"),
+                )
+
+            response = self.client.chat.completions.create(
+                model=params.model or settings.LOCAL_LLM_MODEL,
+                messages=messages,
+                max_tokens=params.max_tokens,
+                temperature=params.temperature,
+                extra_body=self._extra_body(),
+            )
+
+            return LLMResult(
+                text=response.choices[0].message.content.strip(),
+                usage_tokens=response.usage.total_tokens if response.usage else None,
+                model_used=response.model,
+                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
+                cached_tokens=get_cached_tokens(response.usage),
+            )
+
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            raise LLMError(f"Fehler bei der Textgenerierung: {str(e)}")
+
+    def stream_text(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        params: LLMGenerationParams
+    ) -> Iterator[str]:
+        """Generate text using the local model and yield chunks as they are produced"""
+        if not self.is_available():
+            raise ConfigurationError("Lokales LLM nicht konfiguriert")
+
+        if not user_prompt.strip():
+            return
+
+        messages = self._build_messages(system_prompt, user_prompt)
+
+        try:
+            if self.backend == BACKEND_LLAMA_CPP:
+                model, lock = self._get_model()
+                with lock:
+                    for chunk in model.create_chat_completion(
+                        messages=messages,
+                        max_tokens=params.max_tokens,
+                        temperature=params.temperature,
+                        stream=True,
+                    ):
+                        content = chunk["choices"][0]["delta"].get("content")
+                        if content:
+                            yield content
+                return
+
+            stream = self.client.chat.completions.create(
+                model=params.model or settings.LOCAL_LLM_MODEL,
+                messages=messages,
+                max_tokens=params.max_tokens,
+                temperature=params.temperature,
+                stream=True,
+                extra_body=self._extra_body(),
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            raise LLMError(f"Fehler bei der Textgenerierung: {str(e)}")
+
+    def warm_up(self, system_prompts: list[str]) -> None:
+        """
+        Load the model and evaluate the shared system prompts once, so that later
+        requests only have to process the variable part of the prompt
+        """
+        if not self.is_available():
+            return
+
+        params = LLMGenerationParams(max_tokens=1, temperature=0.0)
+        for system_prompt in system_prompts:
+            # A minimal completion primes the KV prefix cache for this system prompt
+            self.generate_text(system_prompt, ".", params)
+
+    def _get_model(self):
+        """Get the resident in-process model for this worker"""
+        return _get_resident_model(
+            settings.LOCAL_LLM_MODEL_PATH,
+            settings.LOCAL_LLM_CONTEXT_SIZE,
+            settings.LOCAL_LLM_THREADS,
+        )
+
+    def _build_messages(self, system_prompt: str, user_prompt: str) -> list[dict]:
+        """Build chat messages; the system prompt always comes first to keep the prefix stable"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+
+    def _extra_body(self) -> dict:
+        """Server specific options (llama.cpp server reuses the KV cache of a matching prefix)"""
+        if settings.LOCAL_LLM_CACHE_PROMPT:
+            return {"cache_prompt": True}
+        return {}
+
+    def get_available_models(self) -> list[str]:
+        """Get list of available local models"""
+        if self.backend == BACKEND_LLAMA_CPP:
+            return [os.path.basename(settings.LOCAL_LLM_MODEL_PATH)]
+        return [settings.LOCAL_LLM_MODEL]
+
+    def reinitialize(self) -> None:
+        """Reinitialize the backend (resident models stay loaded)"""
+        self._init_client()
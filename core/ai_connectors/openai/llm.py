@@ -1,15 +1,30 @@
 """OpenAI LLM connector"""
 
+import io
+import json
+from typing import Optional
 from openai import OpenAI
 from django.conf import settings
 
-from ..base.llm import GenericLLMConnector, LLMGenerationParams, LLMResult
+from ..base.llm import GenericLLMConnector, LLMBatch, LLMBatchRequest, LLMGenerationParams, LLMResult
 from ..base.exceptions import LLMError, ConfigurationError
 
 
+def get_cached_tokens(usage) -> Optional[int]:
+    """Read the number of prompt tokens served from the prompt cache from a usage object"""
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    return getattr(details, "cached_tokens", None) if details else None
+
+
+# Batch states that can still change (see https://platform.openai.com/docs/guides/batch)
+BATCH_PENDING_STATES = ("validating", "in_progress", "finalizing", "cancelling")
+
+
 class OpenAILLMConnector(GenericLLMConnector):
     """OpenAI GPT implementation for text generation"""
     
+    DEFAULT_MODEL = "gpt-4.1-nano"
+
     def __init__(self):
         self.client = None
         self._init_client()
@@ -55,7 +70,7 @@ class OpenAILLMConnector(GenericLLMConnector):
             ]
             
             response = self.client.chat.completions.create(
-                model=params.model or "gpt-4.1-nano",
+                model=params.model or self.DEFAULT_MODEL,
                 messages=messages,
                 max_tokens=params.max_tokens,
                 temperature=params.temperature
@@ -64,12 +79,109 @@ class OpenAILLMConnector(GenericLLMConnector):
             return LLMResult(
                 text=response.choices[0].message.content.strip(),
                 usage_tokens=response.usage.total_tokens if response.usage else None,
-                model_used=response.model
+                model_used=response.model,
+                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
+                cached_tokens=get_cached_tokens(response.usage),
             )
             
         except Exception as e:
             raise LLMError(f"Fehler bei der Textgenerierung: {str(e)}")
     
+    def submit_batch(self, requests: list[LLMBatchRequest]) -> str:
+        """Submit generations to the OpenAI Batch API (completed within 24 hours at half price)"""
+        if not self.is_available():
+            raise ConfigurationError("OpenAI API key nicht konfiguriert")
+
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": request.custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": request.params.model or self.DEFAULT_MODEL,
+                        "messages": [
+                            {"role": "system", "content": request.system_prompt},
+                            {"role": "user", "content": request.user_prompt},
+                        ],
+                        "max_tokens": request.params.max_tokens,
+                        "temperature": request.params.temperature,
+                    },
+                }
+            )
+            for request in requests
+        ]
+
+        try:
+            input_file = self.client.files.create(
+                file=("batch.jsonl", io.BytesIO("\n".join(lines).encode())), purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window=settings.LLM_BATCH_COMPLETION_WINDOW,
+            )
+        except Exception as e:
+            raise LLMError(f"Fehler beim Einreichen des Batches: {str(e)}")
+        return batch.id
+
+    def get_batch(self, batch_id: str) -> LLMBatch:
+        """Get the state of a batch and, once it ended, its results and errors"""
+        if not self.is_available():
+            raise ConfigurationError("OpenAI API key nicht konfiguriert")
+
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_PENDING_STATES:
+                return LLMBatch(batch_id=batch_id, status=LLMBatch.PENDING)
+
+            # Expired and cancelled batches may have completed part of their requests
+            state = LLMBatch(
+                batch_id=batch_id,
+                status=LLMBatch.COMPLETED if batch.status == "completed" else LLMBatch.FAILED,
+            )
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    self._read_batch_file(self.client.files.content(file_id).text, state)
+            return state
+        except Exception as e:
+            raise LLMError(f"Fehler beim Abrufen des Batches: {str(e)}")
+
+    def delete_batch(self, batch_id: str) -> None:
+        """Delete the input, output and error files of a batch (they contain the prompts)"""
+        if not self.is_available():
+            raise ConfigurationError("OpenAI API key nicht konfiguriert")
+
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+            for file_id in (batch.input_file_id, batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    self.client.files.delete(file_id)
+        except Exception as e:
+            raise LLMError(f"Fehler beim Löschen des Batches: {str(e)}")
+
+    def _read_batch_file(self, content: str, state: LLMBatch):
+        """Add the results and errors of a batch output or error file to the state"""
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            response = entry.get("response") or {}
+            body = response.get("body") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                error = entry.get("error") or body.get("error") or {}
+                state.errors[entry["custom_id"]] = error.get("message") or "Unbekannter Fehler"
+                continue
+
+            usage = body.get("usage") or {}
+            state.results[entry["custom_id"]] = LLMResult(
+                text=body["choices"][0]["message"]["content"].strip(),
+                usage_tokens=usage.get("total_tokens"),
+                model_used=body.get("model"),
+                prompt_tokens=usage.get("prompt_tokens"),
+                cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+            )
+
     def get_available_models(self) -> list[str]:
         """Get list of available OpenAI models"""
         return ["gpt-4.1-nano", "gpt-4.1-mini", "gpt-4.1"]
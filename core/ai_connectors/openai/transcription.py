@@ -1,4 +1,5 @@
 """OpenAI Whisper transcription connector"""
+import itertools
 import tempfile
 import time
 from openai import OpenAI
@@ -44,13 +45,24 @@ class OpenAIWhisperConnector(GenericTranscriptionConnector):
         start_time = time.time()
         
         try:
-            audio = AudioSegment.from_file(file_path)
             results = []
-            chunk_length_ms = 600_000  # 10 minute chunks
-            for i in range(0, len(audio), chunk_length_ms):
-                chunk = audio[i:i + chunk_length_ms]
-                with tempfile.NamedTemporaryFile(suffix=".mp3") as temp_audio:
-                    chunk.export(temp_audio.name, format="mp3")
+            chunk_length_seconds = 600  # 10 minute chunks
+            # Decode one time range at a time instead of the whole recording
+            for start_second in itertools.count(0, chunk_length_seconds):
+                chunk = AudioSegment.from_file(
+                    file_path, start_second=start_second, duration=chunk_length_seconds
+                )
+                if len(chunk) == 0:
+                    break
+                # Opus at speech bitrate keeps the upload small (Whisper accepts Ogg)
+                with tempfile.NamedTemporaryFile(suffix=".ogg") as temp_audio:
+                    chunk.export(
+                        temp_audio.name,
+                        format="ogg",
+                        codec="libopus",
+                        bitrate=settings.AUDIO_NORMALIZED_BITRATE,
+                        parameters=["-ac", "1", "-ar", str(settings.AUDIO_NORMALIZED_SAMPLE_RATE)],
+                    )
                     result = self._transcribe(temp_audio.name, language=language)
                     results.append(result)
             
@@ -76,7 +88,7 @@ class OpenAIWhisperConnector(GenericTranscriptionConnector):
     
     def get_supported_formats(self) -> list[str]:
         """Get list of supported audio formats for OpenAI Whisper"""
-        return ["mp3", "wav", "m4a", "webm", "flac"]
+        return ["mp3", "wav", "m4a", "webm", "flac", "ogg", "opus"]
     
     def reinitialize(self) -> None:
         """Reinitialize the OpenAI client"""
@@ -0,0 +1,187 @@
+"""
+Async views for the status endpoints that pages poll or stream
+
+These views only read, and the status checks use the async ORM, so under an ASGI
+server (see README) a waiting or streaming client costs no thread. Partial
+templates are rendered in a worker thread because they may touch the ORM or the
+cache.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+
+from core.services import DocumentStatusService
+from reports.models import Report
+from therapy_sessions.models import Session
+
+DOCUMENT_MODELS = {
+    "session": Session,
+    "report": Report,
+}
+
+# Partials polled while content is generated or inputs are processed
+GENERATION_STATUS_TEMPLATES = {
+    "session": "partials/session_notes_card_with_session_summary.html",
+    "report": "partials/report_card.html",
+}
+INPUT_STATUS_TEMPLATES = {
+    "session": "partials/input_display_with_material_session_ready.html",
+    "report": "partials/input_display_with_material_report_ready.html",
+}
+
+
+def _get_model(document_type: str):
+    try:
+        return DOCUMENT_MODELS[document_type]
+    except KeyError:
+        raise Http404("Invalid document type")
+
+
+async def _aget_document(request, document_type: str, document_id: int):
+    """Get the user's document with security check"""
+    user = await request.auser()
+    return await aget_object_or_404(_get_model(document_type), pk=document_id, user=user)
+
+
+@require_GET
+@login_required
+async def document_status(request, document_type, document_id):
+    """
+    Versions and processing status of a document as JSON
+
+    Pages poll this instead of the partials and fetch a partial only when a
+    version it shows has moved. Responses carry an ETag; an unchanged document
+    answers 304 after a single primary key lookup.
+    """
+    model = _get_model(document_type)
+    user = await request.auser()
+    service = DocumentStatusService()
+    status = await service.aget_status(model, document_id, user)
+    if status is None:
+        raise Http404("Document not found")
+
+    etag = quote_etag(service.get_etag(status))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        status["inputs_in_flight"] = await service.acount_inputs_processing(model, document_id)
+        response = JsonResponse(status)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_GET
+@login_required
+async def generation_status(request, document_type, document_id):
+    """HTMX partial of the notes/report card, polled while content is generated"""
+    document = await _aget_document(request, document_type, document_id)
+
+    if document_type == "session":
+        context = {
+            "session": document,
+            "session_notes": document.notes,
+            "update_generation_status": document.is_generating,
+        }
+    else:
+        context = {
+            "report": document,
+            "report_content": document.content,
+            "update_generation_status": document.is_generating,
+        }
+    return await sync_to_async(render)(
+        request, GENERATION_STATUS_TEMPLATES[document_type], context
+    )
+
+
+@require_GET
+@login_required
+async def input_status(request, document_type, document_id):
+    """HTMX partial of the document's inputs, polled while inputs are processed"""
+    document = await _aget_document(request, document_type, document_id)
+    audio_inputs = document.audio_inputs.order_by("-created_at")
+    document_inputs = document.document_inputs.order_by("-created_at")
+
+    context = {
+        "session": document,
+        "document": document,
+        "document_type": document_type,
+        "audio_inputs": audio_inputs,
+        "document_inputs": document_inputs,
+        # Only evaluated if the cached input display misses
+        "any_inputs_processing": SimpleLazyObject(
+            lambda: audio_inputs.filter(processing_successful=None).exists()
+            or document_inputs.filter(processing_successful=None).exists()
+        ),
+    }
+    return await sync_to_async(render)(request, INPUT_STATUS_TEMPLATES[document_type], context)
+
+
+@require_GET
+@login_required
+async def context_summary(request, document_type, document_id):
+    """Summary of the document's inputs as JSON"""
+    document = await _aget_document(request, document_type, document_id)
+    summary = await DocumentStatusService().aget_context_summary(document)
+    return JsonResponse(summary)
+
+
+@require_GET
+@login_required
+async def status_stream(request, document_type, document_id):
+    """
+    Server-sent events with the document's status
+
+    Sends a "status" event on connect and whenever the generation or input
+    processing status changes, a comment as heartbeat, and ends after
+    STATUS_STREAM_MAX_SECONDS (EventSource reconnects by itself). A "deleted"
+    event is sent if the document is deleted.
+    """
+    model = _get_model(document_type)
+    user = await request.auser()
+    service = DocumentStatusService()
+    if await service.aget_status(model, document_id, user) is None:
+        raise Http404("Document not found")
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.STATUS_STREAM_MAX_SECONDS
+        last_sent_at = loop.time()
+        last_status = None
+        input_version, inputs_processing = None, False
+
+        while loop.time() < deadline:
+            status = await service.aget_status(model, document_id, user)
+            if status is None:
+                yield "event: deleted\ndata: {}\n\n"
+                return
+
+            # Input processing only changes together with the input version
+            if status["input_version"] != input_version:
+                input_version = status["input_version"]
+                inputs_processing = await service.ainputs_processing(model, document_id)
+            status["inputs_processing"] = inputs_processing
+
+            if status != last_status:
+                yield f"event: status\ndata: {json.dumps(status, cls=DjangoJSONEncoder)}\n\n"
+                last_status, last_sent_at = status, loop.time()
+            elif loop.time() - last_sent_at >= settings.STATUS_STREAM_HEARTBEAT_SECONDS:
+                yield ": heartbeat\n\n"
+                last_sent_at = loop.time()
+
+            await asyncio.sleep(settings.STATUS_STREAM_INTERVAL_SECONDS)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # keep reverse proxies from buffering events
+    return response
@@ -1,12 +1,17 @@
+import logging
 import os
 
 from celery import Celery
+from celery.signals import task_postrun, task_prerun, worker_process_init
 from django.conf import settings
+from django.db import close_old_connections
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 
+logger = logging.getLogger(__name__)
+
 app = Celery("app")
 
 # Using a string here means the worker doesn't have to serialize
@@ -27,3 +32,36 @@ app.conf.broker_transport_options = {
 
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+
+@task_prerun.connect
+@task_postrun.connect
+def close_stale_db_connections(task=None, **kwargs):
+    """
+    Close connections that are broken or older than CONN_MAX_AGE around each task,
+    like Django does around each request, and reuse all others
+    """
+    if task is not None and getattr(task.request, "is_eager", False):
+        return  # eager tasks run inside the caller's request or transaction
+    close_old_connections()
+
+
+@worker_process_init.connect
+def warm_up_llm_connector(**kwargs):
+    """Load local models once per worker process and prime the shared system prompts"""
+    providers = [settings.DEFAULT_LLM_PROVIDER, *settings.LLM_FAILOVER_PROVIDERS]
+    if not settings.LOCAL_LLM_WARMUP or "local" not in providers:
+        return
+
+    from core.ai_connectors import get_llm_connector
+    from core.utils.prompt_assembly import normalize_whitespace
+    from reports.prompts import REPORT_SYSTEM_PROMPT
+    from therapy_sessions.prompts import SYSTEM_PROMPT
+
+    try:
+        # Prompts are normalized exactly like PromptBuilder does, so the cached prefix matches
+        get_llm_connector().warm_up(
+            [normalize_whitespace(SYSTEM_PROMPT), normalize_whitespace(REPORT_SYSTEM_PROMPT)]
+        )
+    except Exception as e:
+        logger.warning(f"LLM warm-up failed: {str(e)}")
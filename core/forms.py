@@ -1,5 +1,5 @@
 from django import forms
-from .models import AudioInput, DocumentInput
+from .models import AudioInput, DocumentInput, BulkExportJob
 
 
 class AudioInputForm(forms.ModelForm):
@@ -64,4 +64,43 @@ class DocumentTextInputForm(forms.ModelForm):
     
     class Meta:
         model = DocumentInput
-        fields = [] 
\ No newline at end of file
+        fields = [] 
+
+
+class BulkExportForm(forms.ModelForm):
+    """Form for selecting the documents of a bulk export"""
+
+    class Meta:
+        model = BulkExportJob
+        fields = ["document_type", "date_from", "date_to", "search", "output_format"]
+        widgets = {
+            "document_type": forms.Select(attrs={
+                "class": "bg-gray-50 border border-gray-300 text-gray-900 text-sm rounded-lg focus:ring-blue-500 focus:border-blue-500 block w-full p-2.5"
+            }),
+            "date_from": forms.DateInput(attrs={
+                "type": "date",
+                "class": "bg-gray-50 border border-gray-300 text-gray-900 text-sm rounded-lg focus:ring-blue-500 focus:border-blue-500 block w-full p-2.5"
+            }),
+            "date_to": forms.DateInput(attrs={
+                "type": "date",
+                "class": "bg-gray-50 border border-gray-300 text-gray-900 text-sm rounded-lg focus:ring-blue-500 focus:border-blue-500 block w-full p-2.5"
+            }),
+            "search": forms.HiddenInput(),
+            "output_format": forms.Select(attrs={
+                "class": "bg-gray-50 border border-gray-300 text-gray-900 text-sm rounded-lg focus:ring-blue-500 focus:border-blue-500 block w-full p-2.5"
+            }),
+        }
+        labels = {
+            "document_type": "Dokumente",
+            "date_from": "Von",
+            "date_to": "Bis",
+            "output_format": "Format",
+        }
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get("date_from")
+        date_to = cleaned_data.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Das Startdatum muss vor dem Enddatum liegen.")
+        return cleaned_data
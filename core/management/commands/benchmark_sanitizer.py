@@ -0,0 +1,49 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from core.utils.html_sanitizer import EDITOR_TAGS, html_to_text, sanitize_html
+
+PARAGRAPH = (
+    '<p style="margin: 0">Klientin berichtet von <strong>deutlicher</strong> Entlastung '
+    'seit der letzten Sitzung. <span class="x">Schlafqualität</span> verbessert.</p>'
+    "<ul><li>Hausaufgabe <em>erledigt</em></li><li>Grübeln &amp; Sorgen reduziert</li></ul>"
+    "<script>alert(1)</script><!-- Kommentar -->"
+)
+
+# Malformed input that makes backtracking regex sanitizers slow
+PATHOLOGICAL = "<p <b <i <u " * 10 + "<!-- "
+
+
+class Command(BaseCommand):
+    help = "Benchmark the HTML sanitizer on notes of increasing size"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10, 100, 1000],
+            help="Note sizes in KB",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Repetitions per measurement (best is reported)"
+        )
+
+    def handle(self, *args, **options):
+        cases = {
+            "sanitize_html": lambda html: sanitize_html(html, EDITOR_TAGS),
+            "html_to_text": html_to_text,
+        }
+
+        for input_name, unit in (("editor", PARAGRAPH), ("malformed", PATHOLOGICAL)):
+            for size_kb in options["sizes"]:
+                html = unit * (size_kb * 1024 // len(unit) + 1)
+                for case_name, function in cases.items():
+                    seconds = min(
+                        timeit.repeat(lambda: function(html), number=1, repeat=options["repeat"])
+                    )
+                    self.stdout.write(
+                        f"{case_name:<14} {input_name:<10} {size_kb:>6} KB "
+                        f"{seconds * 1000:>9.2f} ms {seconds * 1e6 / size_kb:>8.1f} µs/KB"
+                    )
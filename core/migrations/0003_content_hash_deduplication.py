@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:21
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_audioinput_processing_error_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audioinput',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='documentinput',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='audioinput',
+            name='audio_file',
+            field=models.FileField(upload_to=core.models.audio_blob_path),
+        ),
+        migrations.AlterField(
+            model_name='documentinput',
+            name='document_file',
+            field=models.FileField(blank=True, null=True, upload_to=core.models.document_blob_path),
+        ),
+    ]
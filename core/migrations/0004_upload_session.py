@@ -0,0 +1,43 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:24
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0003_content_hash_deduplication'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('object_id', models.PositiveIntegerField()),
+                ('input_kind', models.CharField(choices=[('audio', 'Audio'), ('document', 'Dokument')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('checksum', models.CharField(blank=True, help_text='Erwarteter SHA-256 der vollständigen Datei', max_length=64)),
+                ('audio_type', models.CharField(default='upload', max_length=20)),
+                ('therapeutic_observations', models.TextField(blank=True)),
+                ('input_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Upload-Sitzung',
+                'verbose_name_plural': 'Upload-Sitzungen',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:26
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audioinput',
+            name='original_audio_file',
+            field=models.FileField(blank=True, help_text="Archivierte Originalaufnahme (nur wenn AUDIO_ORIGINAL_RETENTION='archive')", null=True, upload_to=core.models.audio_original_path),
+        ),
+        migrations.AlterField(
+            model_name='audioinput',
+            name='file_format',
+            field=models.CharField(blank=True, choices=[('mp3', 'MP3'), ('wav', 'WAV'), ('m4a', 'M4A'), ('webm', 'WebM'), ('flac', 'FLAC'), ('opus', 'Opus')], max_length=10, null=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_audio_normalization'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('running', 'Wird erstellt'), ('completed', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=20)),
+                ('output_format', models.CharField(choices=[('zip', 'ZIP-Archiv (ein PDF pro Dokument)'), ('pdf', 'Ein zusammengeführtes PDF')], default='zip', max_length=10)),
+                ('document_type', models.CharField(choices=[('all', 'Alle Dokumente'), ('session', 'Sitzungen'), ('report', 'Berichte')], default='all', max_length=20)),
+                ('date_from', models.DateField(blank=True, null=True)),
+                ('date_to', models.DateField(blank=True, null=True)),
+                ('search', models.CharField(blank=True, max_length=200)),
+                ('result_file', models.FileField(blank=True, null=True, upload_to='exports/bulk/')),
+                ('document_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sammelexport',
+                'verbose_name_plural': 'Sammelexporte',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
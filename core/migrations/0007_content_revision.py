@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0006_bulk_export_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('version', models.PositiveIntegerField()),
+                ('source', models.CharField(choices=[('edit', 'Bearbeitung'), ('autosave', 'Automatisch gespeichert'), ('generation', 'KI-Generierung')], default='edit', max_length=20)),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('splice_start', models.PositiveIntegerField(blank=True, null=True)),
+                ('splice_end', models.PositiveIntegerField(blank=True, null=True)),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Inhaltsversion',
+                'verbose_name_plural': 'Inhaltsversionen',
+                'ordering': ['content_type', 'object_id', 'version'],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'version'), name='unique_content_revision_version')],
+            },
+        ),
+    ]
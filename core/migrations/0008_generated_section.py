@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0007_content_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneratedSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('template_id', models.PositiveIntegerField()),
+                ('position', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('content', models.TextField(blank=True)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Generierter Abschnitt',
+                'verbose_name_plural': 'Generierte Abschnitte',
+                'ordering': ['content_type', 'object_id', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id', 'position'), name='unique_generated_section_position')],
+            },
+        ),
+    ]
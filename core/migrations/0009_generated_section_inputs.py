@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_generated_section'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedsection',
+            name='ignored_fingerprints',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='generatedsection',
+            name='input_fingerprints',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
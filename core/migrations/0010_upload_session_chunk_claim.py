@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_generated_section_inputs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='chunk_claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,37 @@
-from django.db import models
+import os
+import uuid
+
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.cache import cache
 from django.core.files.storage import default_storage
 
+from core.utils.cache import bump_version, get_version, record_access
+from core.utils.deltas import apply_delta, compute_delta
+from core.utils.hashing import content_addressed_path
+
+
+def audio_blob_path(instance, filename):
+    """Store audio files by content hash so identical uploads share one blob"""
+    if not instance.content_hash:
+        return f"audio_inputs/{filename}"
+    return content_addressed_path("audio_inputs/blobs", instance.content_hash, filename)
+
+
+def audio_original_path(instance, filename):
+    """Archive location of the original recording after normalization"""
+    return content_addressed_path("audio_inputs/originals", instance.content_hash, filename)
+
+
+def document_blob_path(instance, filename):
+    """Store document files by content hash so identical uploads share one blob"""
+    if not instance.content_hash:
+        return f"document_inputs/{filename}"
+    return content_addressed_path("document_inputs/blobs", instance.content_hash, filename)
+
 
 class BaseDocument(models.Model):
     """
@@ -31,6 +59,14 @@ class BaseDocument(models.Model):
     content = models.TextField(verbose_name="Inhalt", blank=True)
     summary = models.TextField(verbose_name="Zusammenfassung", blank=True)
 
+    # Incremented on every content change; editor autosaves must send the version
+    # they are based on, so they cannot overwrite newer (e.g. generated) content
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Incremented whenever an input of the document is added, changed or deleted
+    # (cache key of the rendered inputs)
+    input_version = models.PositiveIntegerField(default=0, editable=False)
+
     # Export tracking
     is_exported = models.BooleanField(
         default=False,
@@ -52,6 +88,13 @@ class BaseDocument(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Erstellt am")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Aktualisiert am")
     
+    # Counters that are only incremented in the database; full saves must not write
+    # back the (possibly stale) value loaded with the instance
+    COUNTER_FIELDS = ("content_version", "input_version")
+
+    LIST_CACHE_VERSION = "documents:user:{user_id}"
+    INPUT_COUNTS_KEY = "documents:input_counts:{label}:{pk}:{version}"
+
     class Meta:
         abstract = True
         ordering = ['-created_at']
@@ -59,6 +102,128 @@ class BaseDocument(models.Model):
     def __str__(self):
         return self.title or f"{self.__class__.__name__} #{self.pk}"
 
+    @classmethod
+    def get_list_cache_version(cls, user_id: int) -> str:
+        """Token that changes whenever one of the user's documents is saved or deleted"""
+        return get_version(cls.LIST_CACHE_VERSION.format(user_id=user_id))
+
+    @classmethod
+    def invalidate_list_cache(cls, user_id: int):
+        """Invalidate cached document lists of a user once the transaction commits"""
+        if user_id:
+            name = cls.LIST_CACHE_VERSION.format(user_id=user_id)
+            transaction.on_commit(lambda: bump_version(name))
+
+    @classmethod
+    def increment_input_version(cls, pk: int):
+        """Increment the input version of a document without loading it"""
+        cls.objects.filter(pk=pk).update(input_version=models.F("input_version") + 1)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded content to detect changes on save
+        instance._loaded_content = instance.__dict__.get("content")
+        instance._loaded_content_version = instance.__dict__.get("content_version")
+        return instance
+
+    def save(self, *args, revision_source=None, **kwargs):
+        """
+        Override save to bump the content version and record a revision when the
+        content changed (in the same transaction as the save)
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None and not self._state.adding:
+            deferred_fields = self.get_deferred_fields()
+            update_fields = kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred_fields
+            ]
+
+        content_changed = (
+            not self._state.adding
+            and self.content != getattr(self, "_loaded_content", self.content)
+            and (update_fields is None or "content" in update_fields)
+        )
+        base_version = getattr(self, "_loaded_content_version", None)
+        if content_changed:
+            # Based on the loaded version if known (conditional update, see _do_update),
+            # otherwise incremented in the database
+            if base_version is None:
+                self.content_version = models.F("content_version") + 1
+            else:
+                self.content_version = base_version + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "content_version"}
+
+        self.invalidate_list_cache(self.user_id)
+        if not content_changed:
+            super().save(*args, **kwargs)
+            self._loaded_content = self.content
+            self._loaded_content_version = self.content_version
+            return
+
+        previous_content, previous_version = self._loaded_content, base_version
+        self._content_version_base = base_version
+        self._content_version_conflict = False
+        with transaction.atomic():
+            try:
+                super().save(*args, **kwargs)
+            finally:
+                self._content_version_base = None
+            if base_version is None or self._content_version_conflict:
+                # Incremented in the database; if another save bumped the version in
+                # between, the revision becomes a keyframe
+                self.refresh_from_db(fields=["content_version"])
+            ContentRevision.objects.record(
+                self,
+                previous_content,
+                previous_version,
+                revision_source or ContentRevision.Source.EDIT,
+            )
+        self._loaded_content = self.content
+        self._loaded_content_version = self.content_version
+
+    def _do_update(
+        self, base_qs, using, pk_val, values, update_fields, forced_update, returning_fields
+    ):
+        """
+        Write a content change based on the loaded version only if the version is
+        unchanged, as autosaves do; otherwise increment the version in the database
+        """
+        base_version = getattr(self, "_content_version_base", None)
+        if base_version is None:
+            return super()._do_update(
+                base_qs, using, pk_val, values, update_fields, forced_update, returning_fields
+            )
+
+        updated = super()._do_update(
+            base_qs.filter(content_version=base_version),
+            using, pk_val, values, update_fields, forced_update, returning_fields,
+        )
+        if updated:
+            return updated
+
+        self._content_version_conflict = True
+        values = [
+            (field, model, models.F("content_version") + 1)
+            if field.attname == "content_version" else (field, model, value)
+            for field, model, value in values
+        ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update, returning_fields
+        )
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or "content" in fields:
+            self._loaded_content = self.content
+        if fields is None or "content_version" in fields:
+            self._loaded_content_version = self.content_version
+
     @property
     def audio_inputs(self):
         """Get all audio inputs for this document"""
@@ -73,19 +238,46 @@ class BaseDocument(models.Model):
             content_type=ContentType.objects.get_for_model(self), object_id=self.pk
         )
 
+    def _input_counts(self) -> dict:
+        """
+        Number of all and of processed inputs per type, cached for the current
+        input version (one aggregate query per input type on a miss)
+        """
+        memoized = getattr(self, "_input_counts_memo", None)
+        if memoized and memoized[0] == self.input_version:
+            return memoized[1]
+
+        key = self.INPUT_COUNTS_KEY.format(
+            label=self._meta.label_lower, pk=self.pk, version=self.input_version
+        )
+        counts = cache.get(key)
+        record_access("document_input_counts", hit=counts is not None)
+        if counts is None:
+            processed = Count("pk", filter=Q(processing_successful=True))
+            counts = {
+                "audio": self.audio_inputs.aggregate(total=Count("pk"), processed=processed),
+                "document": self.document_inputs.aggregate(total=Count("pk"), processed=processed),
+            }
+            cache.set(key, counts, settings.FRAGMENT_CACHE_TIMEOUT)
+
+        self._input_counts_memo = (self.input_version, counts)
+        return counts
+
     @property
     def all_inputs(self):
         """Get combined count of all inputs"""
+        counts = self._input_counts()
         return {
-            "audio_count": self.audio_inputs.count(),
-            "document_count": self.document_inputs.count(),
-            "total_count": self.audio_inputs.count() + self.document_inputs.count(),
+            "audio_count": counts["audio"]["total"],
+            "document_count": counts["document"]["total"],
+            "total_count": counts["audio"]["total"] + counts["document"]["total"],
         }
 
     @property
     def all_processed_inputs(self):
-        audio_count = self.audio_inputs.filter(processing_successful=True).count()
-        document_count = self.document_inputs.filter(processing_successful=True).count()
+        counts = self._input_counts()
+        audio_count = counts["audio"]["processed"]
+        document_count = counts["document"]["processed"]
         total_count = audio_count + document_count
         return {
             "audio_count": audio_count,
@@ -93,6 +285,29 @@ class BaseDocument(models.Model):
             "total_count": total_count,
         }
 
+    @property
+    def generated_sections(self):
+        """Separately generated sections of the content, in template order"""
+        return GeneratedSection.objects.for_document(self).order_by("position")
+
+    @property
+    def export_directory(self):
+        """Storage directory of cached PDF exports of this document"""
+        return f"exports/{self._meta.label_lower}/{self.pk}"
+
+    def delete(self, *args, **kwargs):
+        """Override delete to also remove cached exports from storage"""
+        try:
+            _, export_files = default_storage.listdir(self.export_directory)
+        except FileNotFoundError:
+            export_files = []
+        for export_file in export_files:
+            default_storage.delete(f"{self.export_directory}/{export_file}")
+        ContentRevision.objects.for_document(self).delete()
+        GeneratedSection.objects.for_document(self).delete()
+        self.invalidate_list_cache(self.user_id)
+        super().delete(*args, **kwargs)
+
     def mark_as_exported(self):
         """Mark the document as exported"""
         self.is_exported = True
@@ -106,7 +321,7 @@ class BaseDocument(models.Model):
     def mark_as_success(self):
         """Mark the document as successfully generated"""
         self.is_generating = False
-        self.save()
+        self.save(revision_source=ContentRevision.Source.GENERATION)
 
     def mark_as_failed(self):
         """Mark the document as failed generation"""
@@ -132,6 +347,9 @@ class BaseInput(models.Model):
     processing_successful = models.BooleanField(default=None, null=True, blank=True)
     processing_error = models.TextField(blank=True, null=True)
 
+    # SHA-256 of the uploaded file; rows with the same hash share one stored blob
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -140,6 +358,22 @@ class BaseInput(models.Model):
         abstract = True
         ordering = ["-created_at"]
 
+    def save(self, *args, **kwargs):
+        """Override save to invalidate the cached input display of the document"""
+        super().save(*args, **kwargs)
+        self._increment_document_input_version()
+
+    def delete(self, *args, **kwargs):
+        """Override delete to invalidate the cached input display of the document"""
+        result = super().delete(*args, **kwargs)
+        self._increment_document_input_version()
+        return result
+
+    def _increment_document_input_version(self):
+        document_model = ContentType.objects.get_for_id(self.content_type_id).model_class()
+        if document_model is not None and issubclass(document_model, BaseDocument):
+            document_model.increment_input_version(self.object_id)
+
     def mark_as_failed(self, error_message: str):
         """Mark the input as failed and set the error message"""
         self.processing_successful = False
@@ -152,6 +386,51 @@ class BaseInput(models.Model):
         self.processing_error = ""
         self.save()
 
+    def find_processed_duplicate(self):
+        """Get another successfully processed input with identical file content"""
+        if not self.content_hash:
+            return None
+        return (
+            type(self).objects.filter(content_hash=self.content_hash, processing_successful=True)
+            .exclude(pk=self.pk)
+            .first()
+        )
+
+    # File fields that may point to shared, content-addressed blobs
+    blob_fields = ()
+
+    @classmethod
+    def lock_shared_blobs(cls, content_hash: str):
+        """
+        Lock the inputs with the given content hash until the transaction ends
+
+        Looking up a stored blob for a new input and deleting a blob that is no longer
+        referenced both hold this lock, so a blob cannot be deleted between being found
+        and being referenced. Must be called inside transaction.atomic().
+        """
+        if content_hash:
+            list(
+                cls.objects.select_for_update()
+                .filter(content_hash=content_hash)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            )
+
+    def _delete_file_if_unreferenced(self, file_name: str):
+        """
+        Remove a shared blob from storage once no other input references it
+
+        Call with lock_shared_blobs() held for the input's content hash.
+        """
+        if not file_name:
+            return
+        references = Q()
+        for field_name in self.blob_fields:
+            references |= Q(**{field_name: file_name})
+        is_referenced = type(self).objects.filter(references).exclude(pk=self.pk).exists()
+        if not is_referenced and default_storage.exists(file_name):
+            default_storage.delete(file_name)
+
 
 class AudioInput(BaseInput):
     """
@@ -168,13 +447,31 @@ class AudioInput(BaseInput):
         M4A = "m4a", "M4A"
         WEBM = "webm", "WebM"
         FLAC = "flac", "FLAC"
+        OPUS = "opus", "Opus"
+
+    MIME_TYPES = {
+        FileFormat.MP3: "audio/mpeg",
+        FileFormat.WAV: "audio/wav",
+        FileFormat.M4A: "audio/mp4",
+        FileFormat.WEBM: "audio/webm",
+        FileFormat.FLAC: "audio/flac",
+        FileFormat.OPUS: "audio/ogg",
+    }
+
+    blob_fields = ("audio_file", "original_audio_file")
 
     # Audio-specific fields
     audio_type = models.CharField(max_length=20, choices=AudioType.choices)
     file_format = models.CharField(max_length=10, choices=FileFormat.choices, null=True, blank=True)
 
     # File storage
-    audio_file = models.FileField(upload_to="audio_inputs/%Y/%m/%d/")
+    audio_file = models.FileField(upload_to=audio_blob_path)
+    original_audio_file = models.FileField(
+        upload_to=audio_original_path,
+        null=True,
+        blank=True,
+        help_text="Archivierte Originalaufnahme (nur wenn AUDIO_ORIGINAL_RETENTION='archive')",
+    )
     file_size = models.PositiveIntegerField(null=True, blank=True)
     duration_seconds = models.PositiveIntegerField(null=True, blank=True)
 
@@ -204,12 +501,32 @@ class AudioInput(BaseInput):
         else:
             return f"{self.file_size // (1024 * 1024)} MB"
 
+    @property
+    def is_normalized(self):
+        """Whether audio_file is the normalized speech master"""
+        return self.file_format == self.FileFormat.OPUS
+
+    def get_mime_type(self):
+        return self.MIME_TYPES.get(self.file_format, "audio/mpeg")
+
+    def get_duration_display(self):
+        """Get human-readable duration"""
+        if self.duration_seconds is None:
+            return ""
+
+        minutes, seconds = divmod(self.duration_seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
+
     def delete(self, *args, **kwargs):
-        """Override delete to also remove the file from storage"""
-        if self.audio_file:
-            if default_storage.exists(self.audio_file.name):
-                default_storage.delete(self.audio_file.name)
-        super().delete(*args, **kwargs)
+        """Override delete to also remove the files from storage if no other input uses them"""
+        with transaction.atomic():
+            self.lock_shared_blobs(self.content_hash)
+            self._delete_file_if_unreferenced(self.audio_file.name)
+            self._delete_file_if_unreferenced(self.original_audio_file.name)
+            super().delete(*args, **kwargs)
 
     def add_transcription(self, transcribed_text: str, processing_time: float):
         """Mark the input as successful and add the transcription"""
@@ -238,7 +555,7 @@ class DocumentInput(BaseInput):
     file_type = models.CharField(max_length=20, choices=FileType.choices, null=True, blank=True)
 
     # File storage (only for file uploads)
-    document_file = models.FileField(upload_to="document_inputs/%Y/%m/%d/", null=True, blank=True)
+    document_file = models.FileField(upload_to=document_blob_path, null=True, blank=True)
     file_size = models.PositiveIntegerField(null=True, blank=True)
 
     # Extracted/manual content
@@ -275,8 +592,332 @@ class DocumentInput(BaseInput):
             return f"{self.file_size // (1024 * 1024)} MB"
 
     def delete(self, *args, **kwargs):
-        """Override delete to also remove the file from storage"""
-        if self.document_file:
-            if default_storage.exists(self.document_file.name):
-                default_storage.delete(self.document_file.name)
+        """Override delete to also remove the file from storage if no other input uses it"""
+        with transaction.atomic():
+            self.lock_shared_blobs(self.content_hash)
+            self._delete_file_if_unreferenced(self.document_file.name)
+            super().delete(*args, **kwargs)
+
+
+class UploadSession(models.Model):
+    """
+    Resumable (chunked) upload of an audio or document file
+
+    Chunks are appended to a partial file in UPLOAD_SESSION_DIR; once the last byte
+    has arrived the file is turned into an AudioInput or DocumentInput.
+    """
+
+    class InputKind(models.TextChoices):
+        AUDIO = "audio", "Audio"
+        DOCUMENT = "document", "Dokument"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    # Target document (Session or Report)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    document = GenericForeignKey("content_type", "object_id")
+
+    input_kind = models.CharField(max_length=20, choices=InputKind.choices)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(
+        max_length=64, blank=True, help_text="Erwarteter SHA-256 der vollständigen Datei"
+    )
+
+    # Options applied when the input is created
+    audio_type = models.CharField(max_length=20, default="upload")
+    therapeutic_observations = models.TextField(blank=True)
+
+    # Set while a request writes the chunk at the current offset
+    chunk_claimed_at = models.DateTimeField(null=True, blank=True)
+
+    # Resulting input (AudioInput or DocumentInput, depending on input_kind)
+    input_id = models.PositiveIntegerField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Upload-Sitzung"
+        verbose_name_plural = "Upload-Sitzungen"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.total_size})"
+
+    @property
+    def partial_file_path(self):
+        return os.path.join(settings.UPLOAD_SESSION_DIR, f"{self.pk}.part")
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def delete(self, *args, **kwargs):
+        """Override delete to also remove the partial file"""
+        if os.path.exists(self.partial_file_path):
+            os.remove(self.partial_file_path)
         super().delete(*args, **kwargs)
+
+
+class BulkExportJob(models.Model):
+    """Background export of many sessions/reports into one ZIP archive or merged PDF"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Wartend"
+        RUNNING = "running", "Wird erstellt"
+        COMPLETED = "completed", "Fertig"
+        FAILED = "failed", "Fehlgeschlagen"
+
+    class OutputFormat(models.TextChoices):
+        ZIP = "zip", "ZIP-Archiv (ein PDF pro Dokument)"
+        MERGED_PDF = "pdf", "Ein zusammengeführtes PDF"
+
+    class DocumentType(models.TextChoices):
+        ALL = "all", "Alle Dokumente"
+        SESSION = "session", "Sitzungen"
+        REPORT = "report", "Berichte"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    output_format = models.CharField(
+        max_length=10, choices=OutputFormat.choices, default=OutputFormat.ZIP
+    )
+
+    # Selection
+    document_type = models.CharField(
+        max_length=20, choices=DocumentType.choices, default=DocumentType.ALL
+    )
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True)
+    search = models.CharField(max_length=200, blank=True)
+
+    # Result
+    result_file = models.FileField(upload_to="exports/bulk/", null=True, blank=True)
+    document_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Sammelexport"
+        verbose_name_plural = "Sammelexporte"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.get_output_format_display()} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
+
+    def delete(self, *args, **kwargs):
+        """Override delete to also remove the export file from storage"""
+        if self.result_file and default_storage.exists(self.result_file.name):
+            default_storage.delete(self.result_file.name)
+        super().delete(*args, **kwargs)
+
+
+class ContentRevisionManager(models.Manager):
+    """Custom manager for recording and reconstructing content revisions"""
+
+    def for_document(self, document):
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(document), object_id=document.pk
+        )
+
+    def record(self, document, previous_content: str, previous_version: int, source: str):
+        """
+        Record the document's current content as a revision
+
+        A revision stores a delta to the previous version. Every
+        CONTENT_REVISION_KEYFRAME_INTERVAL versions, and whenever a delta would not
+        be much smaller than the content (e.g. a generation replaced everything) or
+        the previous version is not known, the full content is stored instead.
+
+        Args:
+            document: Session or Report after the content was saved
+            previous_content: Content before the save
+            previous_version: Content version before the save
+            source: ContentRevision.Source of the change
+        """
+        content_type = ContentType.objects.get_for_model(document)
+        if previous_version == 0 and previous_content:
+            # Content from before revisions were recorded becomes the first keyframe;
+            # concurrent saves of the same document may both try to record it
+            self.bulk_create(
+                [
+                    self.model(
+                        content_type=content_type,
+                        object_id=document.pk,
+                        version=0,
+                        source=source,
+                        is_keyframe=True,
+                        text=previous_content,
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+
+        start, end, text = compute_delta(previous_content or "", document.content)
+        is_keyframe = (
+            document.content_version % settings.CONTENT_REVISION_KEYFRAME_INTERVAL == 0
+            or previous_version != document.content_version - 1
+            or (previous_version == 0 and not previous_content)
+            or len(text) * 2 >= len(document.content)
+        )
+        self.create(
+            content_type=content_type,
+            object_id=document.pk,
+            version=document.content_version,
+            source=source,
+            is_keyframe=is_keyframe,
+            splice_start=None if is_keyframe else start,
+            splice_end=None if is_keyframe else end,
+            text=document.content if is_keyframe else text,
+        )
+
+    def reconstruct(self, document, version: int) -> str:
+        """
+        Reconstruct the content of a version from the closest keyframe and its deltas
+
+        Fetches at most one keyframe interval of revisions in a single query.
+
+        Raises:
+            ContentRevision.DoesNotExist: If the version is not (or no longer) recorded
+        """
+        revisions = self.for_document(document)
+        keyframe_version = (
+            revisions.filter(is_keyframe=True, version__lte=version)
+            .order_by("-version")
+            .values("version")[:1]
+        )
+        chain = list(
+            revisions.filter(version__lte=version, version__gte=Subquery(keyframe_version))
+            .order_by("version")
+            .values_list("version", "is_keyframe", "splice_start", "splice_end", "text")
+        )
+        if not chain or chain[-1][0] != version or [row[0] for row in chain] != list(
+            range(chain[0][0], version + 1)
+        ):
+            raise self.model.DoesNotExist(f"Version {version} of {document} is not recorded")
+
+        content = chain[0][4]
+        for _, _, start, end, text in chain[1:]:
+            content = apply_delta(content, start, end, text)
+        return content
+
+    def prune(self, cutoff) -> int:
+        """
+        Delete revisions created before cutoff that are not needed to reconstruct
+        newer versions (everything before the last keyframe older than cutoff)
+
+        Returns:
+            Number of deleted revisions
+        """
+        keep_from = (
+            self.filter(
+                content_type=OuterRef("content_type"),
+                object_id=OuterRef("object_id"),
+                is_keyframe=True,
+                created_at__lt=cutoff,
+            )
+            .order_by("-version")
+            .values("version")[:1]
+        )
+        deleted, _ = self.filter(created_at__lt=cutoff, version__lt=Subquery(keep_from)).delete()
+        return deleted
+
+
+class ContentRevision(models.Model):
+    """Version history of a session's or report's content, stored as deltas"""
+
+    class Source(models.TextChoices):
+        EDIT = "edit", "Bearbeitung"
+        AUTOSAVE = "autosave", "Automatisch gespeichert"
+        GENERATION = "generation", "KI-Generierung"
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    document = GenericForeignKey("content_type", "object_id")
+
+    version = models.PositiveIntegerField()
+    source = models.CharField(max_length=20, choices=Source.choices, default=Source.EDIT)
+
+    # Keyframes store the full content in text; deltas replace
+    # previous[splice_start:splice_end] with text
+    is_keyframe = models.BooleanField(default=False)
+    splice_start = models.PositiveIntegerField(null=True, blank=True)
+    splice_end = models.PositiveIntegerField(null=True, blank=True)
+    text = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ContentRevisionManager()
+
+    class Meta:
+        verbose_name = "Inhaltsversion"
+        verbose_name_plural = "Inhaltsversionen"
+        ordering = ["content_type", "object_id", "version"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "version"],
+                name="unique_content_revision_version",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} #{self.object_id} v{self.version}"
+
+
+class GeneratedSectionManager(models.Manager):
+    def for_document(self, document):
+        return self.filter(
+            content_type=ContentType.objects.get_for_model(document), object_id=document.pk
+        )
+
+
+class GeneratedSection(models.Model):
+    """
+    A section of a document's content generated separately (see
+    SectionGenerationService), kept to regenerate single sections and the sections
+    affected by input changes
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    document = GenericForeignKey("content_type", "object_id")
+
+    template_id = models.PositiveIntegerField()
+    position = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    content = models.TextField(blank=True)
+
+    # Fingerprints (core.utils.hashing.input_fingerprint) of the inputs the section was
+    # generated from, and of inputs added later that were found irrelevant to it
+    input_fingerprints = models.JSONField(default=list, blank=True)
+    ignored_fingerprints = models.JSONField(default=list, blank=True)
+
+    generated_at = models.DateTimeField(auto_now=True)
+
+    objects = GeneratedSectionManager()
+
+    class Meta:
+        verbose_name = "Generierter Abschnitt"
+        verbose_name_plural = "Generierte Abschnitte"
+        ordering = ["content_type", "object_id", "position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "position"],
+                name="unique_generated_section_position",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} #{self.object_id}: {self.title}"
@@ -1,15 +1,75 @@
+import base64
 import datetime
+import hashlib
+import io
+import json
+import os
 import re
 import logging
+import tempfile
+import zipfile
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional
 from fpdf import FPDF
-from django.utils.html import strip_tags
-from html import unescape
+from PyPDF2 import PdfReader, PdfWriter
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import send_mail
+from django.db import connections, transaction
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Length
+from django.utils import timezone
 from core.utils.text_extraction import TextExtractionService
+from core.utils.hashing import (
+    content_addressed_path,
+    file_content_hash,
+    input_fingerprint,
+    uploaded_file_hash,
+)
+from core.utils.audio_metadata import probe_duration
+from core.utils.audio_transcoding import transcode_to_speech_opus
+from core.utils.db import db_idle
+from core.utils.storage import local_file
+from core.utils.html_sanitizer import html_to_text, sanitize_html, PDF_TAGS
+from core.utils.prompt_assembly import (
+    AssembledPrompt,
+    EXISTING_SECTION_INSTRUCTIONS,
+    PromptBuilder,
+    SECTION_INSTRUCTIONS,
+    SECTION_ROUTING_INSTRUCTIONS,
+    SECTION_ROUTING_SYSTEM_PROMPT,
+    UNMATCHED_CONTENT_INSTRUCTIONS,
+)
+from core.utils.sections import (
+    Section,
+    find_section,
+    join_sections,
+    parse_section,
+    replace_section,
+    split_sections,
+)
+from core.utils.concurrency import get_process_pool
 from core.ai_connectors import get_transcription_connector
-from core.models import DocumentInput, AudioInput
+from core.ai_connectors.base.llm import LLMGenerationParams, LLMResult
+from core.models import (
+    AudioInput,
+    BaseDocument,
+    BulkExportJob,
+    ContentRevision,
+    DocumentInput,
+    GeneratedSection,
+    UploadSession,
+)
 
 logger = logging.getLogger(__name__)
 
+# Separator between the transcript and the therapist's observations in transcribed_text
+OBSERVATIONS_MARKER = "\n\nWeitere Notizen: "
+
 
 class UnifiedInputService:
     """Service for handling both audio and document inputs"""
@@ -21,21 +81,32 @@ class UnifiedInputService:
     def add_audio_input(self, document, audio_file, audio_type: str = "upload") -> AudioInput:
         """Add audio input and process transcription"""
 
-        file_format = self._determine_audio_format(audio_file.name)
         if audio_type == "recording":
             name = f"Aufnahme vom {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
         else:
             name = audio_file.name
 
-        audio_input = AudioInput.objects.create(
-            document=document,
-            name=name,
-            description="",
-            audio_type=audio_type,
-            file_format=file_format,
-            audio_file=audio_file,
-            file_size=audio_file.size,
-        )
+        # Set by HashingAudioUploadHandler; computed here for files from other sources
+        content_hash = getattr(audio_file, "content_hash", None) or uploaded_file_hash(audio_file)
+        duration = getattr(audio_file, "duration_seconds", None)
+        if duration is None:
+            duration = probe_duration(audio_file, audio_file.name)
+
+        with transaction.atomic():
+            # An identical upload may already be stored (possibly as normalized master)
+            stored_name = self._find_stored_blob(AudioInput, "audio_file", content_hash)
+
+            audio_input = AudioInput.objects.create(
+                document=document,
+                name=name,
+                description="",
+                audio_type=audio_type,
+                file_format=self._determine_audio_format(stored_name or audio_file.name),
+                audio_file=stored_name or audio_file,
+                file_size=default_storage.size(stored_name) if stored_name else audio_file.size,
+                duration_seconds=round(duration) if duration is not None else None,
+                content_hash=content_hash,
+            )
 
         return audio_input
 
@@ -44,15 +115,20 @@ class UnifiedInputService:
 
         if file:
             # File upload - use original filename
-            document_input = DocumentInput.objects.create(
-                document=document,
-                name=file.name,
-                input_type=DocumentInput.InputType.FILE_UPLOAD,
-                file_type=self._determine_document_file_type(file.name),
-                document_file=file,
-                file_size=file.size,
-                extracted_text="",
-            )
+            content_hash = getattr(file, "content_hash", None) or uploaded_file_hash(file)
+            with transaction.atomic():
+                document_input = DocumentInput.objects.create(
+                    document=document,
+                    name=file.name,
+                    input_type=DocumentInput.InputType.FILE_UPLOAD,
+                    file_type=self._determine_document_file_type(file.name),
+                    document_file=(
+                        self._find_stored_blob(DocumentInput, "document_file", content_hash) or file
+                    ),
+                    file_size=file.size,
+                    content_hash=content_hash,
+                    extracted_text="",
+                )
         else:
             # Manual text - generate name with timestamp
             name = f"Text vom {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}"
@@ -67,23 +143,51 @@ class UnifiedInputService:
 
         return document_input
 
-    def get_combined_text(
+    def _find_stored_blob(self, model, field_name: str, content_hash: str):
+        """
+        Get the storage name of an already stored file with the same content, if any
+
+        Locks the inputs with this content (see BaseInput.lock_shared_blobs), so call it
+        inside transaction.atomic() together with creating the input that references it.
+        """
+        model.lock_shared_blobs(content_hash)
+        existing_name = (
+            model.objects.filter(content_hash=content_hash)
+            .exclude(**{field_name: ""})
+            .values_list(field_name, flat=True)
+            .first()
+        )
+        if existing_name and default_storage.exists(existing_name):
+            return existing_name
+        return None
+
+    def get_input_texts(
         self, document, include_audio: bool = True, include_documents: bool = True
-    ) -> str:
-        """Get combined text from all inputs"""
-        texts = []
+    ) -> dict[str, str]:
+        """Get the labeled texts of all processed inputs, keyed by input fingerprint"""
+        texts = {}
 
         if include_audio:
             for audio in document.audio_inputs.filter(processing_successful=True):
                 if audio.transcribed_text:
-                    texts.append(f"[Audio: {audio.name}]\n{audio.transcribed_text}")
+                    texts[input_fingerprint(audio, audio.transcribed_text)] = (
+                        f"[Audio: {audio.name}]\n{audio.transcribed_text}"
+                    )
 
         if include_documents:
             for doc in document.document_inputs.filter(processing_successful=True):
                 if doc.extracted_text:
-                    texts.append(f"[Dokument: {doc.name}]\n{doc.extracted_text}")
+                    texts[input_fingerprint(doc, doc.extracted_text)] = (
+                        f"[Dokument: {doc.name}]\n{doc.extracted_text}"
+                    )
 
-        return "\n\n".join(texts)
+        return texts
+
+    def get_combined_text(
+        self, document, include_audio: bool = True, include_documents: bool = True
+    ) -> str:
+        """Get combined text from all inputs"""
+        return "\n\n".join(self.get_input_texts(document, include_audio, include_documents).values())
 
     def _determine_audio_format(self, filename: str) -> str:
         """Determine audio format based on filename"""
@@ -94,6 +198,8 @@ class UnifiedInputService:
             "m4a": AudioInput.FileFormat.M4A,
             "webm": AudioInput.FileFormat.WEBM,
             "flac": AudioInput.FileFormat.FLAC,
+            "ogg": AudioInput.FileFormat.OPUS,
+            "opus": AudioInput.FileFormat.OPUS,
         }
         return format_mapping.get(extension, AudioInput.FileFormat.MP3)
 
@@ -113,29 +219,92 @@ class UnifiedInputService:
     ):
         """Process audio transcription using transcription connector"""
         try:
-            file_path = audio_input.audio_file.path
-            result = self.transcription_connector.transcribe(file_path)
-
-            transcribed_text = result.text
+            duplicate = audio_input.find_processed_duplicate()
+            if duplicate:
+                # Identical recording was transcribed before; drop its observations
+                transcribed_text = duplicate.transcribed_text.partition(OBSERVATIONS_MARKER)[0]
+                processing_time = 0.0
+                logger.info(f"Reusing transcript of audio input {duplicate.pk} for {audio_input.name}")
+            else:
+                self.normalize_audio(audio_input)
+                with db_idle(), local_file(audio_input.audio_file.name) as file_path:
+                    result = self.transcription_connector.transcribe(file_path)
+                transcribed_text = result.text
+                processing_time = result.processing_time
 
             # Append therapeutic observations if provided
             if therapeutic_observations.strip():
-                transcribed_text += f"\n\nWeitere Notizen: {therapeutic_observations.strip()}"
+                transcribed_text += f"{OBSERVATIONS_MARKER}{therapeutic_observations.strip()}"
 
             audio_input.mark_as_successful()
-            audio_input.add_transcription(
-                transcribed_text, processing_time=result.processing_time
-            )
+            audio_input.add_transcription(transcribed_text, processing_time=processing_time)
         except Exception as e:
             logger.error(f"Error transcribing audio {audio_input.name}: {str(e)}")
             audio_input.mark_as_failed(str(e))
 
+    def normalize_audio(self, audio_input: AudioInput):
+        """
+        Replace the uploaded recording with a mono 16 kHz Opus master
+
+        The master becomes the canonical audio_file used for playback and transcription.
+        Depending on AUDIO_ORIGINAL_RETENTION the original is archived in
+        original_audio_file or deleted. Failures are logged and the original is kept.
+        """
+        if not settings.AUDIO_NORMALIZATION_ENABLED or audio_input.is_normalized:
+            return
+
+        original_name = audio_input.audio_file.name
+        master_name = content_addressed_path(
+            "audio_inputs/masters", audio_input.content_hash or str(audio_input.pk), "master.opus"
+        )
+
+        try:
+            if not default_storage.exists(master_name):
+                with (
+                    db_idle(),
+                    local_file(original_name) as original_path,
+                    tempfile.NamedTemporaryFile(suffix=".opus") as master_file,
+                ):
+                    transcode_to_speech_opus(original_path, master_file.name)
+                    master_name = default_storage.save(master_name, File(master_file))
+        except Exception as e:
+            logger.warning(f"Could not normalize audio {audio_input.name}, using original: {str(e)}")
+            return
+
+        with default_storage.open(master_name, "rb") as master_file:
+            duration = probe_duration(master_file, master_name)
+
+        audio_input.audio_file.name = master_name
+        audio_input.file_format = AudioInput.FileFormat.OPUS
+        audio_input.file_size = default_storage.size(master_name)
+        if duration is not None and audio_input.duration_seconds is None:
+            audio_input.duration_seconds = round(duration)
+        update_fields = ["audio_file", "file_format", "file_size", "duration_seconds", "updated_at"]
+
+        if original_name != master_name and settings.AUDIO_ORIGINAL_RETENTION == "archive":
+            audio_input.original_audio_file.name = original_name
+            update_fields.append("original_audio_file")
+        with transaction.atomic():
+            AudioInput.lock_shared_blobs(audio_input.content_hash)
+            audio_input.save(update_fields=update_fields)
+
+            if original_name != master_name and settings.AUDIO_ORIGINAL_RETENTION != "archive":
+                audio_input._delete_file_if_unreferenced(original_name)
+
+        logger.info(f"Normalized audio {audio_input.name} to {audio_input.get_file_size_display()}")
+
     def process_document_extraction(self, document_input: DocumentInput):
         """Process document text extraction"""
         try:
-            extracted_text = self.text_extraction_service.extract_text_from_file(
-                document_input.document_file.path, document_input.name
-            )
+            duplicate = document_input.find_processed_duplicate()
+            if duplicate:
+                logger.info(f"Reusing extracted text of document input {duplicate.pk} for {document_input.name}")
+                extracted_text = duplicate.extracted_text
+            else:
+                with db_idle(), local_file(document_input.document_file.name) as file_path:
+                    extracted_text = self.text_extraction_service.extract_text_from_file(
+                        file_path, document_input.name
+                    )
 
             if extracted_text:
                 document_input.extracted_text = extracted_text
@@ -148,21 +317,841 @@ class UnifiedInputService:
             document_input.mark_as_failed(str(e))
 
 
+class UploadError(Exception):
+    """Raised when a chunk of a resumable upload cannot be accepted"""
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    """The chunk does not start at the current offset of the upload"""
+
+    def __init__(self, expected_offset: int):
+        super().__init__(f"Erwarteter Upload-Offset: {expected_offset}")
+        self.expected_offset = expected_offset
+
+
+class UploadChecksumMismatch(UploadError):
+    """The chunk (or the assembled file) does not match the announced checksum"""
+    pass
+
+
+class UploadChunkInProgress(UploadError):
+    """Another request is still writing the chunk at the current offset"""
+    pass
+
+
+class AssembledUploadFile(File):
+    """
+    Fully received resumable upload
+
+    Exposes temporary_file_path() so the file system storage moves the partial file
+    into place instead of copying it.
+    """
+
+    def __init__(self, file, name, content_hash):
+        super().__init__(file, name)
+        self.content_hash = content_hash
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class ResumableUploadService:
+    """Service for chunked, resumable uploads of audio and document files"""
+
+    def __init__(self):
+        self.input_service = UnifiedInputService()
+
+    def create_upload(
+        self,
+        document,
+        user,
+        input_kind: str,
+        filename: str,
+        total_size: int,
+        checksum: str = "",
+        audio_type: str = "upload",
+        therapeutic_observations: str = "",
+    ) -> UploadSession:
+        """Start a new resumable upload for the given document"""
+        if input_kind not in UploadSession.InputKind.values:
+            raise UploadError("Ungültiger Upload-Typ")
+        if total_size <= 0:
+            raise UploadError("Ungültige Dateigröße")
+        if not filename:
+            raise UploadError("Kein Dateiname angegeben")
+
+        os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+        return UploadSession.objects.create(
+            user=user,
+            document=document,
+            input_kind=input_kind,
+            filename=os.path.basename(filename),
+            total_size=total_size,
+            checksum=checksum.lower(),
+            audio_type=audio_type,
+            therapeutic_observations=therapeutic_observations,
+        )
+
+    def get_upload(self, upload_id, user) -> UploadSession:
+        """Get an unexpired upload of the user"""
+        expires_after = timezone.now() - datetime.timedelta(
+            hours=settings.UPLOAD_SESSION_EXPIRY_HOURS
+        )
+        return UploadSession.objects.get(pk=upload_id, user=user, created_at__gte=expires_after)
+
+    def append_chunk(
+        self, upload_id, user, offset: int, stream, chunk_checksum: str = None
+    ) -> tuple[UploadSession, object]:
+        """
+        Append a chunk read from stream to the upload
+
+        The chunk is claimed with a conditional update of the upload row, so concurrent
+        retries of the same chunk cannot interleave; the chunk itself is written (and the
+        last one verified and stored) outside of any transaction. A claim is released
+        after UPLOAD_CHUNK_CLAIM_SECONDS even if its request died. A chunk that fails
+        verification is discarded and the offset stays unchanged.
+
+        Args:
+            upload_id: ID of the UploadSession
+            user: Owner of the upload
+            offset: Offset the chunk starts at (must match the stored offset)
+            stream: File-like object to read the chunk from
+            chunk_checksum: Optional base64 encoded SHA-256 of the chunk
+
+        Returns:
+            Tuple of the updated upload and the created input (None until complete)
+        """
+        upload = self.get_upload(upload_id, user)
+        if upload.is_complete:
+            return upload, None
+        if offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+
+        claimed_at = timezone.now()
+        claim_expired = claimed_at - datetime.timedelta(seconds=settings.UPLOAD_CHUNK_CLAIM_SECONDS)
+        claimed = (
+            UploadSession.objects.filter(pk=upload.pk, offset=offset, completed_at__isnull=True)
+            .filter(Q(chunk_claimed_at__isnull=True) | Q(chunk_claimed_at__lt=claim_expired))
+            .update(chunk_claimed_at=claimed_at, updated_at=claimed_at)
+        )
+        if not claimed:
+            upload.refresh_from_db()
+            if upload.is_complete:
+                return upload, None
+            if offset != upload.offset:
+                raise UploadOffsetMismatch(upload.offset)
+            raise UploadChunkInProgress("Dieser Chunk wird bereits übertragen")
+        upload.chunk_claimed_at = claimed_at
+        own_claim = UploadSession.objects.filter(pk=upload.pk, chunk_claimed_at=claimed_at)
+
+        try:
+            max_bytes = min(settings.UPLOAD_CHUNK_MAX_BYTES, upload.total_size - offset)
+            written = self._write_chunk(upload, stream, max_bytes, chunk_checksum)
+
+            new_offset = offset + written
+            if new_offset < upload.total_size:
+                if not own_claim.update(
+                    offset=new_offset, chunk_claimed_at=None, updated_at=timezone.now()
+                ):
+                    # The claim expired and another request took the chunk over
+                    upload.refresh_from_db()
+                    raise UploadOffsetMismatch(upload.offset)
+                upload.offset = new_offset
+                upload.chunk_claimed_at = None
+                return upload, None
+
+            # A file that fails verification is discarded and the upload starts over
+            content_hash = file_content_hash(upload.partial_file_path)
+            if upload.checksum and content_hash != upload.checksum:
+                os.remove(upload.partial_file_path)
+                own_claim.update(offset=0, chunk_claimed_at=None, updated_at=timezone.now())
+                raise UploadChecksumMismatch("Prüfsumme der Datei stimmt nicht überein")
+
+            upload.offset = new_offset
+            return upload, self._complete(upload, content_hash)
+        except BaseException:
+            own_claim.update(chunk_claimed_at=None)
+            raise
+
+    def _write_chunk(self, upload: UploadSession, stream, max_bytes: int, chunk_checksum: str):
+        """Write the chunk at the upload's offset, returns the number of bytes written"""
+        digest = hashlib.sha256()
+        written = 0
+        mode = "r+b" if os.path.exists(upload.partial_file_path) else "wb"
+
+        with open(upload.partial_file_path, mode) as partial_file:
+            # Drop bytes left over from an interrupted chunk
+            partial_file.seek(upload.offset)
+            partial_file.truncate()
+
+            for data in iter(lambda: stream.read(settings.AUDIO_UPLOAD_CHUNK_SIZE), b""):
+                written += len(data)
+                if written > max_bytes:
+                    partial_file.truncate(upload.offset)
+                    raise UploadError("Chunk zu groß")
+                digest.update(data)
+                partial_file.write(data)
+
+            if chunk_checksum and base64.b64encode(digest.digest()).decode() != chunk_checksum:
+                partial_file.truncate(upload.offset)
+                raise UploadChecksumMismatch("Prüfsumme des Chunks stimmt nicht überein")
+
+        return written
+
+    def _complete(self, upload: UploadSession, content_hash: str):
+        """Create the input from the verified, assembled file"""
+        with open(upload.partial_file_path, "rb") as partial_file:
+            assembled_file = AssembledUploadFile(partial_file, upload.filename, content_hash)
+            if upload.input_kind == UploadSession.InputKind.AUDIO:
+                created_input = self.input_service.add_audio_input(
+                    upload.document, assembled_file, audio_type=upload.audio_type
+                )
+            else:
+                created_input = self.input_service.add_document_input(
+                    upload.document, file=assembled_file
+                )
+
+        # Only left behind if an identical blob was already stored
+        if os.path.exists(upload.partial_file_path):
+            os.remove(upload.partial_file_path)
+
+        upload.input_id = created_input.pk
+        upload.completed_at = timezone.now()
+        upload.chunk_claimed_at = None
+        upload.save(
+            update_fields=["offset", "input_id", "completed_at", "chunk_claimed_at", "updated_at"]
+        )
+        return created_input
+
+    def cleanup_expired_uploads(self) -> int:
+        """Delete uploads (and their partial files) older than UPLOAD_SESSION_EXPIRY_HOURS"""
+        expires_after = timezone.now() - datetime.timedelta(
+            hours=settings.UPLOAD_SESSION_EXPIRY_HOURS
+        )
+        expired = UploadSession.objects.filter(created_at__lt=expires_after)
+        count = 0
+        for upload in expired:
+            upload.delete()
+            count += 1
+        return count
+
+
+class AutosaveError(Exception):
+    """Raised when an autosave request cannot be applied"""
+
+
+class AutosaveConflict(AutosaveError):
+    """Raised when the document changed since the version the autosave is based on"""
+
+    def __init__(self):
+        super().__init__(
+            "Das Dokument wurde zwischenzeitlich geändert. Bitte lade die Seite neu."
+        )
+
+
+class DocumentAutosaveService:
+    """
+    Service for applying editor autosaves to a document's content
+
+    The editor sends either the full content or a patch (replace the UTF-16 range
+    start..end of the last saved content with text) together with the content
+    version it is based on. The write is a single conditional UPDATE that only
+    succeeds if the version is unchanged and no generation is running, so autosaves
+    never overwrite generated content. Unchanged content is not written at all.
+    """
+
+    def __init__(self, allowed_tags: frozenset):
+        self.allowed_tags = allowed_tags
+
+    def autosave(
+        self,
+        document,
+        base_version: int = None,
+        content: str = None,
+        patch: tuple[int, int, str] = None,
+    ) -> dict:
+        """
+        Save new content for a document
+
+        Args:
+            document: Session or Report the user may edit
+            base_version: Content version the editor state is based on; the current
+                version is used for plain form submissions
+            content: Full new content (HTML)
+            patch: (start, end, text) splice relative to the content of base_version
+
+        Returns:
+            Dictionary with the new version, whether it was written, and the saved
+            content if sanitizing changed it (the editor then rebases on it)
+
+        Raises:
+            AutosaveConflict: If the document changed or is being generated
+            AutosaveError: If the patch does not fit the content
+        """
+        if base_version is None:
+            if patch is not None:
+                raise AutosaveError("Für Änderungen wird die Dokumentversion benötigt.")
+            base_version = document.content_version
+
+        if document.is_generating or base_version != document.content_version:
+            raise AutosaveConflict()
+
+        if patch is not None:
+            new_content, submitted = self._apply_patch(document.content, *patch)
+        else:
+            submitted = content or ""
+            new_content = sanitize_html(submitted, self.allowed_tags)
+
+        result = {"version": base_version, "saved": False}
+        if new_content != submitted:
+            result["content"] = new_content
+        if new_content == document.content:
+            return result
+
+        previous_content = document.content
+        with transaction.atomic():
+            updated = type(document).objects.filter(
+                pk=document.pk, content_version=base_version, is_generating=False
+            ).update(
+                content=new_content,
+                content_version=F("content_version") + 1,
+                updated_at=timezone.now(),
+            )
+            if updated:
+                document.content = new_content
+                document.content_version = base_version + 1
+                ContentRevision.objects.record(
+                    document, previous_content, base_version, ContentRevision.Source.AUTOSAVE
+                )
+
+        if not updated:
+            document.refresh_from_db(fields=["content_version"])
+            raise AutosaveConflict()
+
+        result.update(version=base_version + 1, saved=True)
+        return result
+
+    def autosave_from_form(self, document, data, content_field: str) -> dict:
+        """
+        Autosave from submitted editor form data
+
+        Autosaves send content_version and patch_start, patch_end, patch_text; plain
+        form submissions send the full content in content_field.
+        """
+        try:
+            base_version = int(data["content_version"]) if data.get("content_version") else None
+            patch = None
+            if "patch_start" in data:
+                patch = (int(data["patch_start"]), int(data["patch_end"]), data.get("patch_text", ""))
+        except (KeyError, ValueError):
+            raise AutosaveError("Ungültige Autosave-Daten.")
+
+        return self.autosave(
+            document, base_version, content=data.get(content_field, ""), patch=patch
+        )
+
+    def _apply_patch(self, content: str, start: int, end: int, text: str) -> tuple[str, str]:
+        """
+        Splice text into the content and sanitize only the touched region
+
+        The region is widened to the surrounding tag boundaries, the rest of the
+        stored content was already sanitized on earlier saves.
+
+        Returns:
+            (new content, new content as submitted before sanitizing)
+        """
+        start, end = self._utf16_to_index(content, start), self._utf16_to_index(content, end)
+        if start > end:
+            raise AutosaveError("Ungültiger Änderungsbereich.")
+
+        window_start = content.rfind(">", 0, start) + 1
+        window_end = content.find(">", end)
+        window_end = len(content) if window_end < 0 else window_end + 1
+
+        window = content[window_start:start] + text + content[end:window_end]
+        before, after = content[:window_start], content[window_end:]
+        return before + sanitize_html(window, self.allowed_tags) + after, before + window + after
+
+    def _utf16_to_index(self, content: str, offset: int) -> int:
+        """Convert a JavaScript (UTF-16 code unit) offset to a Python string index"""
+        encoded = content.encode("utf-16-le")
+        if offset < 0 or offset * 2 > len(encoded):
+            raise AutosaveError("Ungültiger Änderungsbereich.")
+        try:
+            return len(encoded[: offset * 2].decode("utf-16-le"))
+        except UnicodeDecodeError:
+            raise AutosaveError("Ungültiger Änderungsbereich.")
+
+
+class DocumentStatusService:
+    """Generation and input processing status of documents, read with the async ORM"""
+
+    STATUS_FIELDS = ("is_generating", "content_version", "input_version", "updated_at")
+
+    async def aget_status(self, model, document_id: int, user) -> Optional[dict]:
+        """
+        Get the status of a user's document (one primary key lookup)
+
+        Returns:
+            Dict with is_generating, content_version, input_version and updated_at,
+            or None if the document does not exist or belongs to another user
+        """
+        return (
+            await model.objects.filter(pk=document_id, user=user)
+            .values(*self.STATUS_FIELDS)
+            .afirst()
+        )
+
+    @staticmethod
+    def get_etag(status: dict) -> str:
+        """
+        Validator of a status returned by aget_status
+
+        The versions only increase and updated_at changes on every save, so the tag
+        changes whenever the content, the inputs or the generation status change.
+        """
+        return "{}-{}-{}-{}".format(
+            status["content_version"],
+            status["input_version"],
+            int(status["is_generating"]),
+            int(status["updated_at"].timestamp() * 1_000_000),
+        )
+
+    async def ainputs_processing(self, model, document_id: int) -> bool:
+        """Check if any input of the document is still being processed"""
+        content_type = await sync_to_async(ContentType.objects.get_for_model)(model)
+        for input_model in (AudioInput, DocumentInput):
+            if await input_model.objects.filter(
+                content_type=content_type, object_id=document_id, processing_successful=None
+            ).aexists():
+                return True
+        return False
+
+    async def acount_inputs_processing(self, model, document_id: int) -> int:
+        """Count the inputs of the document that are still being processed"""
+        content_type = await sync_to_async(ContentType.objects.get_for_model)(model)
+        count = 0
+        for input_model in (AudioInput, DocumentInput):
+            count += await input_model.objects.filter(
+                content_type=content_type, object_id=document_id, processing_successful=None
+            ).acount()
+        return count
+
+    async def aget_context_summary(self, document) -> dict:
+        """
+        Summary of the document's inputs (same keys as the services' get_context_summary),
+        computed with one aggregate query per input type
+        """
+        content_type = await sync_to_async(ContentType.objects.get_for_model)(document)
+        totals = {}
+        for key, input_model, text_field in (
+            ("audio", AudioInput, "transcribed_text"),
+            ("document", DocumentInput, "extracted_text"),
+        ):
+            totals[key] = await input_model.objects.filter(
+                content_type=content_type, object_id=document.pk
+            ).aaggregate(
+                total=Count("pk"),
+                successful=Count("pk", filter=Q(processing_successful=True)),
+                failed=Count("pk", filter=Q(processing_successful=False)),
+                text_length=Coalesce(Sum(Length(text_field)), 0),
+            )
+
+        return {
+            "audio_inputs": totals["audio"]["total"],
+            "document_inputs": totals["document"]["total"],
+            "total_inputs": totals["audio"]["total"] + totals["document"]["total"],
+            "successful_audio": totals["audio"]["successful"],
+            "successful_documents": totals["document"]["successful"],
+            "failed_audio": totals["audio"]["failed"],
+            "failed_documents": totals["document"]["failed"],
+            "total_text_length": totals["audio"]["text_length"] + totals["document"]["text_length"],
+        }
+
+
+class SectionGenerationService:
+    """
+    Generates the sections of a template concurrently and assembles them in order
+
+    Every section is requested separately with the document's prompt followed by an
+    instruction naming the section. All requests share the prompt up to that
+    instruction (structure and document context). The first section is generated
+    alone to fill the provider's prompt cache, then the others concurrently, so a
+    document takes about as long as two sections instead of one long completion.
+    Every request still carries the full context; cached prompt tokens are cheaper
+    but not free, so a document costs more input tokens than one completion.
+
+    Generated sections are stored as GeneratedSection with the fingerprints of the
+    inputs they were generated from, so single sections can be regenerated, and
+    after inputs changed only the affected sections are (update).
+    """
+
+    def __init__(self, llm_connector, input_service: UnifiedInputService):
+        self.llm_connector = llm_connector
+        self.input_service = input_service
+
+    def is_split(self, template) -> bool:
+        """Check if the template's sections are generated separately"""
+        return (
+            settings.SECTION_GENERATION_ENABLED
+            and len(template.sections) >= settings.SECTION_GENERATION_MIN_SECTIONS
+        )
+
+    def generate(
+        self, document, template, prompt: AssembledPrompt, existing_content: str = ""
+    ) -> str:
+        """
+        Generate all sections of the template and store them
+
+        Args:
+            document: Session or Report the content is generated for
+            template: Template declaring the sections
+            prompt: Prompt for the whole document (structure and context)
+            existing_content: Content to carry over: every section is given the
+                existing section with its heading, content without a matching
+                heading is given to all sections
+
+        Returns:
+            The sections joined in template order
+        """
+        sections = template.sections
+        fingerprints = sorted(self.input_service.get_input_texts(document))
+
+        existing = {}
+        if existing_content and existing_content.strip():
+            preamble, existing_sections = split_sections(
+                existing_content, [section.title for section in sections]
+            )
+            keys = {section.key for section in sections}
+            existing = {s.key: s for s in existing_sections if s.key in keys}
+            unmatched = join_sections([s for s in existing_sections if s.key not in keys], preamble)
+            if unmatched:
+                prompt = prompt.with_context(
+                    f"{UNMATCHED_CONTENT_INSTRUCTIONS}\n\n{unmatched}", heading="VORHANDENE NOTIZEN"
+                )
+
+        generated = self._generate_sections(
+            document, template, [(section, existing.get(section.key)) for section in sections], prompt
+        )
+
+        content_type = ContentType.objects.get_for_model(document)
+        with transaction.atomic():
+            GeneratedSection.objects.for_document(document).delete()
+            GeneratedSection.objects.bulk_create(
+                GeneratedSection(
+                    content_type=content_type,
+                    object_id=document.pk,
+                    template_id=template.pk,
+                    position=position,
+                    title=section.title,
+                    content=section.html,
+                    input_fingerprints=fingerprints,
+                )
+                for position, section in enumerate(generated)
+            )
+        return join_sections(generated)
+
+    def regenerate(self, document, template, position: int, prompt: AssembledPrompt) -> str:
+        """
+        Generate one section of the template again
+
+        Args:
+            document: Session or Report with the current content
+            template: Template declaring the sections
+            position: Index of the section in template.sections
+            prompt: Prompt for the whole document (structure and context)
+
+        Returns:
+            The document's content with the section replaced (or inserted at its
+            place if it was removed)
+
+        Raises:
+            ValueError: If the template has no section at the position
+        """
+        sections = template.sections
+        if not 0 <= position < len(sections):
+            raise ValueError("Abschnitt nicht gefunden")
+
+        fingerprints = sorted(self.input_service.get_input_texts(document))
+        [section] = self._generate_sections(document, template, [(sections[position], None)], prompt)
+
+        GeneratedSection.objects.update_or_create(
+            content_type=ContentType.objects.get_for_model(document),
+            object_id=document.pk,
+            position=position,
+            defaults={
+                "template_id": template.pk,
+                "title": section.title,
+                "content": section.html,
+                "input_fingerprints": fingerprints,
+                "ignored_fingerprints": [],
+            },
+        )
+        return replace_section(document.content, section, [s.title for s in sections])
+
+    def update(self, document, template, prompt: AssembledPrompt) -> Optional[str]:
+        """
+        Regenerate only the sections affected by inputs added or removed since the
+        sections were generated
+
+        Inputs new to a section are assigned to the sections they are relevant for in
+        one request (_route). Relevant sections are extended with them, keeping their
+        current (possibly edited) content; for the others the inputs are recorded as
+        ignored. Sections generated from an input that was removed or whose text
+        changed are generated again from the current inputs.
+
+        Returns:
+            The document's content with the affected sections replaced, or None if the
+            content cannot be updated section-wise (no sections of this template
+            stored) or no input was added, removed or changed
+        """
+        sections = template.sections
+        stored = list(document.generated_sections)
+        if len(stored) != len(sections) or any(
+            row.template_id != template.pk or row.position != position
+            for position, row in enumerate(stored)
+        ):
+            return None
+
+        inputs = self.input_service.get_input_texts(document)
+        current = set(inputs)
+        added, removed, dropped = {}, {}, set()
+        for row in stored:
+            added[row.position] = (
+                current - set(row.input_fingerprints) - set(row.ignored_fingerprints)
+            )
+            removed[row.position] = set(row.input_fingerprints) - current
+            dropped |= set(row.ignored_fingerprints) - current
+        if not any(added.values()) and not any(removed.values()) and not dropped:
+            return None
+
+        # Sections with removed inputs are generated again anyway
+        candidates = {p for p in added if added[p] and not removed[p]}
+        new_inputs = set().union(*(added[p] for p in candidates))
+        relevant = self._route(sections, [inputs[f] for f in sorted(new_inputs)]) if new_inputs else set()
+
+        affected = {}
+        for position in range(len(sections)):
+            if removed[position]:
+                affected[position] = None
+            elif position in candidates and position in relevant:
+                affected[position] = find_section(
+                    document.content, sections[position].title, [s.title for s in sections]
+                )
+
+        generated = self._generate_sections(
+            document, template, [(sections[p], existing) for p, existing in affected.items()], prompt
+        )
+        content = document.content
+        for section in generated:
+            content = replace_section(content, section, [s.title for s in sections])
+
+        now = timezone.now()
+        fingerprints = sorted(current)
+        generated_by_position = dict(zip(affected, generated))
+        for row in stored:
+            if row.position in generated_by_position:
+                section = generated_by_position[row.position]
+                row.title, row.content = section.title, section.html
+                row.input_fingerprints, row.ignored_fingerprints = fingerprints, []
+                row.generated_at = now
+            else:
+                row.ignored_fingerprints = sorted(
+                    (set(row.ignored_fingerprints) | added[row.position]) & current
+                )
+        GeneratedSection.objects.bulk_update(
+            stored,
+            ["title", "content", "input_fingerprints", "ignored_fingerprints", "generated_at"],
+        )
+
+        logger.info(
+            f"{len(affected)}/{len(sections)} sections of {document._meta.label} {document.pk} "
+            f"updated ({len(new_inputs)} new inputs, "
+            f"{len(set().union(dropped, *removed.values()))} removed or changed)"
+        )
+        return content
+
+    def clear(self, document):
+        """Forget the generated sections (the content was generated as a whole)"""
+        GeneratedSection.objects.for_document(document).delete()
+
+    def _route(self, sections: list[Section], texts: list[str]) -> set[int]:
+        """
+        Positions of the sections the texts contain information for
+
+        Falls back to all sections if the request fails or its answer cannot be parsed.
+        """
+        structure = "\n".join(
+            f"{number}. {section.title}: {' '.join(html_to_text(section.body).split())}"
+            for number, section in enumerate(sections, start=1)
+        )
+        builder = PromptBuilder(SECTION_ROUTING_SYSTEM_PROMPT)
+        builder.add_instructions(structure, heading="ABSCHNITTE")
+        builder.add_instructions(SECTION_ROUTING_INSTRUCTIONS, heading="ANTWORTFORMAT")
+        builder.add_context("\n\n".join(texts), heading="NEUES MATERIAL")
+        prompt = builder.build()
+
+        try:
+            with db_idle():
+                result = self.llm_connector.generate_text(
+                    system_prompt=prompt.system_prompt,
+                    user_prompt=prompt.user_prompt,
+                    params=LLMGenerationParams(
+                        max_tokens=100, temperature=0.0, latency_key="section_assignment"
+                    ),
+                )
+            numbers = json.loads(re.search(r"\[[\d,\s]*\]", result.text).group(0))
+        except Exception as e:
+            logger.warning(f"Could not assign new inputs to sections, updating all: {str(e)}")
+            return set(range(len(sections)))
+        return {number - 1 for number in numbers if 1 <= number <= len(sections)}
+
+    def _generate_sections(
+        self, document, template, items: list[tuple[Section, Optional[Section]]], prompt
+    ) -> list[Section]:
+        """
+        Generate (section, existing section or None) pairs, in order
+
+        The first section is requested alone, so the provider has cached the shared
+        prefix when the others are requested concurrently; requests sent at the same
+        time would all pay for the full prompt.
+        """
+        if not items:
+            return []
+        params = LLMGenerationParams(
+            max_tokens=template.max_tokens,
+            temperature=template.temperature,
+            latency_key="section",
+        )
+        workers = min(len(items) - 1, settings.SECTION_GENERATION_WORKERS)
+
+        # The threads only wait on the provider; no queries are made until all returned
+        with db_idle():
+            generated = [self._generate_section(*items[0], prompt, params)]
+            if workers:
+                with ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="section-generation"
+                ) as executor:
+                    generated += executor.map(
+                        lambda item: self._generate_section(*item, prompt, params), items[1:]
+                    )
+
+        results = [result for _, result in generated]
+        logger.info(
+            f"{len(items)} sections for {document._meta.label} {document.pk} generated: "
+            f"{sum(r.cached_tokens or 0 for r in results)}/"
+            f"{sum(r.prompt_tokens or 0 for r in results)} prompt tokens from cache"
+        )
+        return [section for section, _ in generated]
+
+    def _generate_section(
+        self,
+        section: Section,
+        existing: Optional[Section],
+        prompt: AssembledPrompt,
+        params: LLMGenerationParams,
+    ) -> tuple[Section, LLMResult]:
+        if existing is not None:
+            prompt = prompt.with_context(
+                f"{EXISTING_SECTION_INSTRUCTIONS}\n\n{existing.html}", heading="VORHANDENER ABSCHNITT"
+            )
+        prompt = prompt.with_context(
+            SECTION_INSTRUCTIONS.format(title=section.title), heading="ABSCHNITT"
+        )
+        result = self.llm_connector.generate_text(
+            system_prompt=prompt.system_prompt,
+            user_prompt=prompt.user_prompt,
+            params=params,
+        )
+        return parse_section(result.text, section.title), result
+
+
 class PDFExportService:
     """Service for exporting content to PDF format using fpdf2"""
-    
+
+    # Bump when the rendered layout changes to invalidate all cached exports
+    LAYOUT_VERSION = 2
+
     def __init__(self):
-        # Initialize PDF with proper settings
-        self.pdf = FPDF(orientation='P', unit='mm', format='A4')
-        self.pdf.set_auto_page_break(auto=True, margin=15)
-        self.pdf.set_margins(left=20, top=20, right=20)
-        
-    def export_notes_to_pdf(self, title: str, date: datetime.datetime = datetime.datetime.now(), content: str = None, filename_prefix: str = "notizen"):
+        self.pdf = None
+
+    def _create_pdf(self) -> FPDF:
+        """Create a FPDF document with the shared page setup (built-in core fonts only)"""
+        pdf = FPDF(orientation='P', unit='mm', format='A4')
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_margins(left=20, top=20, right=20)
+        return pdf
+
+    def export_document_to_pdf(
+        self,
+        document,
+        title: str,
+        date: datetime.datetime = None,
+        content: str = None,
+        filename_prefix: str = "notizen",
+    ):
+        """
+        Export a document to PDF, serving unchanged documents from the export cache
+
+        Rendered PDFs are stored under the document's export directory, keyed by a hash
+        of everything that is rendered and the layout version. Older exports of the
+        same document are removed when a new version is rendered.
+        """
+        if not content:
+            raise ValueError("Keine Notizen zum Export verfügbar.")
+        date = date or datetime.datetime.now()
+        filename = self._generate_filename(filename_prefix, date, title)
+
+        pdf_output = self.get_cached_export(document, title, date, content)
+        if pdf_output is None:
+            pdf_output = self.export_notes_to_pdf(title, date, content, filename_prefix)["content"]
+            self.store_cached_export(document, title, date, content, pdf_output)
+
+        return {
+            'content': pdf_output,
+            'filename': filename,
+            'content_type': 'application/pdf'
+        }
+
+    def get_cached_export(self, document, title: str, date: datetime.datetime, content: str):
+        """Get the stored PDF for this exact rendering input, or None"""
+        export_name = self._export_name(document, title, date, content)
+        if not default_storage.exists(export_name):
+            return None
+        logger.debug(f"Serving cached PDF export {export_name}")
+        with default_storage.open(export_name, "rb") as export_file:
+            return export_file.read()
+
+    def store_cached_export(
+        self, document, title: str, date: datetime.datetime, content: str, pdf_output: bytes
+    ):
+        """Store a rendered PDF and drop outdated exports of the same document"""
+        try:
+            _, existing_files = default_storage.listdir(document.export_directory)
+        except FileNotFoundError:
+            existing_files = []
+        for existing_file in existing_files:
+            default_storage.delete(f"{document.export_directory}/{existing_file}")
+        default_storage.save(
+            self._export_name(document, title, date, content), ContentFile(pdf_output)
+        )
+
+    def _export_name(self, document, title: str, date: datetime.datetime, content: str) -> str:
+        """Cache key: hash of everything that is rendered plus the layout version"""
+        fingerprint = hashlib.sha256(
+            f"{title}\x00{date.isoformat()}\x00{content}".encode()
+        ).hexdigest()
+        return f"{document.export_directory}/{fingerprint}-v{self.LAYOUT_VERSION}.pdf"
+
+    def export_notes_to_pdf(self, title: str, date: datetime.datetime = None, content: str = None, filename_prefix: str = "notizen"):
         """Export notes to PDF with given title, date and content"""
         if not content:
             raise ValueError("Keine Notizen zum Export verfügbar.")
+        date = date or datetime.datetime.now()
 
         try:
+            self.pdf = self._create_pdf()
             self.pdf.add_page()
             self._add_title(title, date)
             self._add_html_content(content)
@@ -202,7 +1191,7 @@ class PDFExportService:
             self.pdf.cell(0, 10, "Keine Inhalte verfügbar", ln=True)
             return
             
-        logger.info(f"Adding HTML content to PDF: {len(content)} characters")
+        logger.debug(f"Adding HTML content to PDF: {len(content)} characters")
         
         # Clean and prepare HTML content
         html_content = self._prepare_html_content(content)
@@ -220,44 +1209,17 @@ class PDFExportService:
         """Prepare HTML content for fpdf2 rendering"""
         if not content:
             return ""
-            
-        # Log the raw content for debugging
-        logger.info(f"Raw HTML content: {content[:200]}...")
-        
-        # First, unescape HTML entities
-        content = unescape(content)
-        
-        # Remove potentially problematic tags that fpdf2 doesn't support
-        # Remove script tags and their content
-        content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Remove style tags and their content
-        content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Remove unsupported tags but keep their content
-        unsupported_tags = ['div', 'span', 'section', 'article', 'header', 'footer', 'nav', 'aside']
-        for tag in unsupported_tags:
-            content = re.sub(f'<{tag}[^>]*>', '', content, flags=re.IGNORECASE)
-            content = re.sub(f'</{tag}>', '', content, flags=re.IGNORECASE)
-        
+
+        # Keep only tags fpdf2 can render; entities such as &lt; stay escaped in the
+        # text and are decoded by fpdf2's HTML parser
+        content = sanitize_html(content, PDF_TAGS)
+
         # Ensure content is wrapped in proper HTML structure
         if not content.strip().startswith('<'):
             # If it's plain text, wrap it in paragraphs
             content = f"<p>{content}</p>"
-        
-        # Wrap in a basic HTML structure for better rendering
-        html_content = f"""
-        <html>
-        <body>
-            {content}
-        </body>
-        </html>
-        """
-        
-        # Log the prepared content for debugging
-        logger.info(f"Prepared HTML content: {html_content[:200]}...")
-        
-        return html_content
+
+        return f"<html><body>{content}</body></html>"
     
     def _add_plain_text_content(self, content: str):
         """Fallback method to add plain text content"""
@@ -281,36 +1243,7 @@ class PDFExportService:
     
     def _clean_html_to_text(self, html_content: str) -> str:
         """Clean HTML content to plain text as fallback"""
-        if not html_content:
-            return ""
-            
-        # Unescape HTML entities
-        content = unescape(html_content)
-        
-        # Convert common HTML elements to text equivalents
-        content = re.sub(r'<br\s*/?>', '\n', content)
-        content = re.sub(r'<p[^>]*>', '\n', content)
-        content = re.sub(r'</p>', '\n', content)
-        content = re.sub(r'<div[^>]*>', '\n', content)
-        content = re.sub(r'</div>', '\n', content)
-        
-        # Handle lists
-        content = re.sub(r'<ul[^>]*>', '\n', content)
-        content = re.sub(r'</ul>', '\n', content)
-        content = re.sub(r'<ol[^>]*>', '\n', content)
-        content = re.sub(r'</ol>', '\n', content)
-        content = re.sub(r'<li[^>]*>', '• ', content)
-        content = re.sub(r'</li>', '\n', content)
-        
-        # Remove any remaining HTML tags
-        content = strip_tags(content)
-        
-        # Clean up whitespace
-        content = re.sub(r'\n\s*\n', '\n\n', content)  # Multiple newlines to double
-        content = re.sub(r'[ \t]+', ' ', content)  # Multiple spaces to single
-        content = content.strip()
-        
-        return content
+        return html_to_text(html_content)
     
     def _generate_filename(self, prefix: str, date: datetime.datetime, title: str = None) -> str:
         """Generate a clean filename for the PDF"""
@@ -322,4 +1255,203 @@ class PDFExportService:
             if clean_title:
                 filename += f"_{clean_title}"
         filename += ".pdf"
-        return filename 
\ No newline at end of file
+        return filename 
+
+def _render_pdf(title: str, date: datetime.datetime, content: str, filename_prefix: str) -> bytes:
+    """Render a single PDF; module-level so it can run in a worker process"""
+    return PDFExportService().export_notes_to_pdf(title, date, content, filename_prefix)["content"]
+
+
+class BulkExportService:
+    """Service for exporting many sessions and reports in one background job"""
+
+    def create_job(self, user, **selection) -> BulkExportJob:
+        """Create a pending export job for the user's documents matching the selection"""
+        return BulkExportJob.objects.create(user=user, **selection)
+
+    def get_documents(self, job: BulkExportJob) -> list:
+        """Get the documents selected by the job that have content to export"""
+        from reports.models import Report
+        from therapy_sessions.models import Session
+
+        querysets = []
+        if job.document_type in (BulkExportJob.DocumentType.ALL, BulkExportJob.DocumentType.SESSION):
+            querysets.append(Session.objects.all())
+        if job.document_type in (BulkExportJob.DocumentType.ALL, BulkExportJob.DocumentType.REPORT):
+            querysets.append(Report.objects.all())
+
+        documents = []
+        for queryset in querysets:
+            # Filter on the date shown in the exported PDF
+            date_field = self._date_field(queryset.model)
+            queryset = queryset.filter(user=job.user).exclude(content="")
+            if job.date_from:
+                queryset = queryset.filter(**{f"{date_field}__date__gte": job.date_from})
+            if job.date_to:
+                queryset = queryset.filter(**{f"{date_field}__date__lte": job.date_to})
+            if job.search:
+                queryset = queryset.filter(title__icontains=job.search)
+            documents.extend(queryset)
+
+        return sorted(documents, key=lambda document: getattr(document, self._date_field(type(document))))
+
+    def run(self, job: BulkExportJob):
+        """Render all selected documents and store them as ZIP archive or merged PDF"""
+        job.status = BulkExportJob.Status.RUNNING
+        job.save(update_fields=["status", "updated_at"])
+
+        try:
+            documents = self.get_documents(job)
+            if not documents:
+                raise ValueError("Keine Dokumente mit Inhalt für den Export gefunden.")
+
+            pdfs = self._render_documents(documents)
+            with tempfile.TemporaryFile() as output:
+                if job.output_format == BulkExportJob.OutputFormat.MERGED_PDF:
+                    self._write_merged_pdf(output, pdfs)
+                    extension = "pdf"
+                else:
+                    self._write_zip(output, documents, pdfs)
+                    extension = "zip"
+                output.seek(0)
+                job.result_file.save(
+                    f"Export_{timezone.localdate().strftime('%Y%m%d')}_{job.pk}.{extension}",
+                    File(output),
+                    save=False,
+                )
+
+            self._mark_documents_exported(documents)
+
+            job.status = BulkExportJob.Status.COMPLETED
+            job.document_count = len(documents)
+            job.completed_at = timezone.now()
+            job.save()
+            self._notify_user(job)
+
+        except Exception as e:
+            logger.error(f"Bulk export {job.pk} failed: {str(e)}")
+            job.status = BulkExportJob.Status.FAILED
+            job.error = str(e)
+            job.save(update_fields=["status", "error", "updated_at"])
+
+    def _date_field(self, model) -> str:
+        """Date of a document in the export: the session date, or when a report was created"""
+        return "date" if model._meta.model_name == "session" else "created_at"
+
+    def _export_arguments(self, document) -> tuple:
+        """Title, date, content and filename prefix, as used by the single document export"""
+        date = getattr(document, self._date_field(type(document)))
+        if document._meta.model_name == "session":
+            title = "Sitzungsnotizen"
+            if document.title:
+                title += f" - {document.title}"
+            return title, date, document.content, "Sitzungsnotizen"
+        return document.title, date, document.content, "Bericht"
+
+    def _render_documents(self, documents: list) -> Iterator[tuple[int, bytes]]:
+        """
+        Render PDFs in a process pool, reusing cached single exports
+
+        Yields:
+            Document index and PDF bytes, in the order the PDFs are finished
+        """
+        export_service = PDFExportService()
+        missing = []
+        for index, document in enumerate(documents):
+            cached = export_service.get_cached_export(document, *self._export_arguments(document)[:3])
+            if cached is not None:
+                yield index, cached
+            else:
+                missing.append(index)
+
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        pool = get_process_pool("bulk_export", settings.BULK_EXPORT_WORKERS) if len(missing) > 1 else None
+        if pool is None:
+            rendered = (
+                (index, _render_pdf(*self._export_arguments(documents[index]))) for index in missing
+            )
+        else:
+            futures = {
+                pool.submit(_render_pdf, *self._export_arguments(documents[index])): index
+                for index in missing
+            }
+            rendered = ((futures[future], future.result()) for future in as_completed(futures))
+
+        try:
+            for index, pdf in rendered:
+                export_service.store_cached_export(
+                    documents[index], *self._export_arguments(documents[index])[:3], pdf
+                )
+                yield index, pdf
+        finally:
+            if pool is not None:
+                for future in futures:
+                    future.cancel()
+
+    def _write_zip(self, output, documents: list, pdfs: Iterable[tuple[int, bytes]]):
+        """
+        Write one PDF per document into a ZIP archive (PDFs are compressed already)
+
+        Each PDF is written as soon as it is finished; the index prefix keeps the
+        documents' order in the archive listing.
+        """
+        export_service = PDFExportService()
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as archive:
+            for index, pdf in pdfs:
+                title, date, _, prefix = self._export_arguments(documents[index])
+                filename = export_service._generate_filename(prefix, date, title)
+                archive.writestr(f"{index + 1:03d}_{filename}", pdf)
+
+    def _write_merged_pdf(self, output, pdfs: Iterable[tuple[int, bytes]]):
+        """
+        Concatenate all PDFs into one document, in the documents' order
+
+        PDFs finished ahead of their turn are kept only until the ones before them
+        are appended.
+        """
+        writer = PdfWriter()
+        pending = {}
+        next_index = 0
+        for index, pdf in pdfs:
+            pending[index] = pdf
+            while next_index in pending:
+                writer.append(PdfReader(io.BytesIO(pending.pop(next_index))))
+                next_index += 1
+        writer.write(output)
+
+    def _mark_documents_exported(self, documents: list):
+        """Set is_exported with one UPDATE per document type"""
+        ids_by_model = {}
+        for document in documents:
+            ids_by_model.setdefault(type(document), []).append(document.pk)
+        for model, ids in ids_by_model.items():
+            model.objects.filter(pk__in=ids, is_exported=False).update(is_exported=True)
+        if documents:
+            BaseDocument.invalidate_list_cache(documents[0].user_id)
+
+    def _notify_user(self, job: BulkExportJob):
+        """Send the user an email that the export is ready for download"""
+        if not job.user.email:
+            return
+        send_mail(
+            subject="Dein Export ist bereit",
+            message=(
+                f"Dein Export mit {job.document_count} Dokumenten ist fertig und kann in "
+                f"TheraMind unter \"Alle Dokumente\" heruntergeladen werden."
+            ),
+            from_email=None,
+            recipient_list=[job.user.email],
+            fail_silently=True,
+        )
+
+    def cleanup_expired_jobs(self) -> int:
+        """Delete export jobs (and their files) older than BULK_EXPORT_RETENTION_HOURS"""
+        expires_after = timezone.now() - datetime.timedelta(
+            hours=settings.BULK_EXPORT_RETENTION_HOURS
+        )
+        count = 0
+        for job in BulkExportJob.objects.filter(created_at__lt=expires_after):
+            job.delete()
+            count += 1
+        return count
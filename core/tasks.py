@@ -1,8 +1,11 @@
+import datetime
 import logging
 from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
-from core.services import UnifiedInputService
-from core.models import DocumentInput, AudioInput
+from core.services import UnifiedInputService, ResumableUploadService, BulkExportService
+from core.models import DocumentInput, AudioInput, BulkExportJob, ContentRevision
 
 logger = logging.getLogger(__name__)
 
@@ -63,3 +66,47 @@ def process_document_extraction_task(self, document_input_id):
         "document_input_id": document_input_id,
         "processing_successful": document_input.processing_successful,
     }
+
+
+@shared_task
+def cleanup_expired_uploads_task():
+    """Periodic Celery task removing unfinished or stale resumable uploads"""
+    count = ResumableUploadService().cleanup_expired_uploads()
+    logger.info(f"Removed {count} expired upload sessions")
+    return {"success": True, "deleted": count}
+
+
+@shared_task
+def bulk_export_task(job_id):
+    """
+    Celery task rendering a bulk export in the background
+
+    Args:
+        job_id: ID of the BulkExportJob instance to process
+    """
+    try:
+        job = BulkExportJob.objects.select_related("user").get(id=job_id)
+    except ObjectDoesNotExist:
+        logger.error(f"BulkExportJob with id {job_id} not found")
+        return {"success": False, "error": "BulkExportJob not found"}
+
+    BulkExportService().run(job)
+    logger.info(f"Bulk export {job_id} finished with status {job.status}")
+    return {"success": job.status == BulkExportJob.Status.COMPLETED, "job_id": job_id}
+
+
+@shared_task
+def cleanup_expired_bulk_exports_task():
+    """Periodic Celery task removing old bulk exports"""
+    count = BulkExportService().cleanup_expired_jobs()
+    logger.info(f"Removed {count} expired bulk exports")
+    return {"success": True, "deleted": count}
+
+
+@shared_task
+def prune_content_revisions_task():
+    """Periodic Celery task removing content revisions past the retention period"""
+    cutoff = timezone.now() - datetime.timedelta(days=settings.CONTENT_REVISION_RETENTION_DAYS)
+    count = ContentRevision.objects.prune(cutoff)
+    logger.info(f"Removed {count} old content revisions")
+    return {"success": True, "deleted": count}
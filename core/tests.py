@@ -1 +1,255 @@
- 
\ No newline at end of file
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.ai_connectors.base.batch import LocalBatchServer
+from core.ai_connectors.base.exceptions import LLMError
+from core.ai_connectors.base.llm import LLMBatch, LLMBatchRequest, LLMGenerationParams, LLMResult
+
+from core.models import ContentRevision
+from core.services import PDFExportService
+from core.utils.deltas import apply_delta, compute_delta
+from core.utils.html_sanitizer import PDF_TAGS, html_to_text, sanitize_html
+from core.utils.sections import find_section, parse_section, replace_section
+from reports.models import Report
+
+
+class SanitizeHtmlTextTests(SimpleTestCase):
+    """Comparison signs in text are kept, escaped or not"""
+
+    def test_escaped_less_and_greater_than(self):
+        html = "<p>Werte &lt; 3 und &gt; 1 bleiben stabil</p>"
+        self.assertEqual(sanitize_html(html, PDF_TAGS), html)
+        self.assertEqual(html_to_text(html), "Werte < 3 und > 1 bleiben stabil")
+
+    def test_escaped_less_than_before_tag(self):
+        html = "<p>Dosis &lt;5 mg, <strong>wichtig</strong></p>"
+        self.assertEqual(sanitize_html(html, PDF_TAGS), html)
+
+    def test_bare_less_than(self):
+        self.assertEqual(
+            sanitize_html("<p>a < b und <strong>fett</strong> c</p>", PDF_TAGS),
+            "<p>a &lt; b und <strong>fett</strong> c</p>",
+        )
+        self.assertEqual(sanitize_html("<p>Dosis <5 mg</p>"), "<p>Dosis &lt;5 mg</p>")
+
+    def test_tags_are_still_removed(self):
+        self.assertEqual(
+            sanitize_html('<p onclick="x">a</p><script>alert(1)</script><div>b</div>'),
+            "<p>a</p>b",
+        )
+
+
+class PDFExportHtmlTests(SimpleTestCase):
+    def test_prepared_content_keeps_escaped_text(self):
+        content = PDFExportService()._prepare_html_content(
+            "<p>a &lt; b und <strong>fett</strong> c</p>"
+        )
+        self.assertEqual(
+            content, "<html><body><p>a &lt; b und <strong>fett</strong> c</p></body></html>"
+        )
+
+
+class SectionSplittingTests(SimpleTestCase):
+    """Only the template's headings start a section; bold sub-headings are body text"""
+
+    ORDER = ["Anamnese", "Diagnose"]
+    CONTENT = (
+        "<p><strong>Anamnese</strong></p>\n<p>Allgemein alt</p>\n"
+        "<p><strong>Familie:</strong></p>\n<p>Mutter alt</p>\n\n"
+        "<p><strong>Diagnose</strong></p>\n<p>F32</p>"
+    )
+
+    def test_find_section_keeps_sub_headings(self):
+        section = find_section(self.CONTENT, "Anamnese", self.ORDER)
+        self.assertIn("Mutter alt", section.body)
+        self.assertNotIn("F32", section.body)
+
+    def test_replace_section_replaces_sub_blocks(self):
+        section = parse_section(
+            "<p><strong>Anamnese</strong></p><p><strong>Familie:</strong></p><p>Mutter neu</p>",
+            "Anamnese",
+        )
+        content = replace_section(self.CONTENT, section, self.ORDER)
+        self.assertIn("Mutter neu", content)
+        self.assertNotIn("alt", content)
+        self.assertIn("<p>F32</p>", content)
+
+
+class EchoConnector:
+    """Answers every request with its user prompt"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_text(self, system_prompt, user_prompt, params):
+        self.calls += 1
+        if user_prompt == "Fehler":
+            raise LLMError("Fehler bei der Textgenerierung")
+        return LLMResult(text=user_prompt, usage_tokens=params.max_tokens)
+
+
+class LocalBatchServerTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(
+            LLM_BATCH_DIR=self.directory,
+            LLM_BATCH_LOCAL_DELAY_SECONDS=0,
+            LLM_BATCH_LOCAL_LOCK_TIMEOUT_SECONDS=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.connector = EchoConnector()
+        self.server = LocalBatchServer(self.connector)
+
+    def submit(self, *prompts):
+        return self.server.submit([
+            LLMBatchRequest(
+                custom_id=f"id-{index}",
+                system_prompt="System",
+                user_prompt=prompt,
+                params=LLMGenerationParams(max_tokens=10),
+            )
+            for index, prompt in enumerate(prompts)
+        ])
+
+    def test_get_runs_requests_once(self):
+        batch_id = self.submit("a", "Fehler")
+
+        batch = self.server.get(batch_id)
+        self.assertEqual(batch.status, LLMBatch.COMPLETED)
+        self.assertEqual(batch.results["id-0"].text, "a")
+        self.assertEqual(batch.results["id-0"].usage_tokens, 10)
+        self.assertIn("id-1", batch.errors)
+
+        self.assertEqual(self.server.get(batch_id).results["id-0"].text, "a")
+        self.assertEqual(self.connector.calls, 2)
+
+    def test_pending_until_delay_passed(self):
+        batch_id = self.submit("a")
+        with override_settings(LLM_BATCH_LOCAL_DELAY_SECONDS=3600):
+            self.assertEqual(self.server.get(batch_id).status, LLMBatch.PENDING)
+        self.assertEqual(self.connector.calls, 0)
+
+    def test_locked_batch_is_pending(self):
+        batch_id = self.submit("a")
+        open(self.server._path(batch_id, "lock"), "w").close()
+        self.assertEqual(self.server.get(batch_id).status, LLMBatch.PENDING)
+        self.assertEqual(self.connector.calls, 0)
+
+    def test_stale_lock_is_taken_over(self):
+        batch_id = self.submit("a")
+        lock_path = self.server._path(batch_id, "lock")
+        open(lock_path, "w").close()
+        stale = time.time() - 61
+        os.utime(lock_path, (stale, stale))
+
+        self.assertEqual(self.server.get(batch_id).status, LLMBatch.COMPLETED)
+        self.assertFalse(os.path.exists(lock_path))
+
+    def test_delete_removes_files(self):
+        batch_id = self.submit("a")
+        self.server.get(batch_id)
+        self.server.delete(batch_id)
+        self.assertEqual(os.listdir(self.directory), [])
+        with self.assertRaises(LLMError):
+            self.server.get(batch_id)
+
+
+class DeltaTests(SimpleTestCase):
+    def test_round_trip(self):
+        cases = [
+            ("", ""),
+            ("", "neu"),
+            ("alt", ""),
+            ("gleich", "gleich"),
+            ("<p>Ein Satz.</p>", "<p>Ein längerer Satz.</p>"),
+            ("<p>Ein längerer Satz.</p>", "<p>Ein Satz.</p>"),
+            ("aaaa", "aaaaa"),
+            ("abcabc", "abc"),
+            ("Anfang Mitte Ende", "Anfang Ende"),
+        ]
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(old, *compute_delta(old, new)), new)
+
+    def test_delta_covers_only_the_changed_region(self):
+        self.assertEqual(compute_delta("Anfang Mitte Ende", "Anfang neu Ende"), (7, 12, "neu"))
+
+
+@override_settings(CONTENT_REVISION_KEYFRAME_INTERVAL=3)
+class ContentRevisionTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(email="a@example.com", password="x")
+        self.report = Report.objects.create(user=user, title="Bericht")
+        self.contents = [""]
+
+    def edit(self, count):
+        """Save count small edits of a long text, so revisions are stored as deltas"""
+        for _ in range(count):
+            number = len(self.contents)
+            self.report.content = f"<p>{'Verlauf ' * 20}</p><p>Eintrag {number}</p>"
+            self.report.save()
+            self.contents.append(self.report.content)
+
+    def revisions(self):
+        return ContentRevision.objects.for_document(self.report)
+
+    def test_reconstructs_every_version(self):
+        self.edit(7)
+        self.assertEqual(self.report.content_version, 7)
+        self.assertEqual(
+            list(self.revisions().filter(is_keyframe=True).values_list("version", flat=True)),
+            [1, 3, 6],
+        )
+        for version in range(1, 8):
+            with self.subTest(version=version):
+                self.assertEqual(
+                    ContentRevision.objects.reconstruct(self.report, version),
+                    self.contents[version],
+                )
+
+    def test_save_of_stale_instance_records_keyframe(self):
+        self.edit(4)
+        stale = Report.objects.get(pk=self.report.pk)
+        self.edit(1)
+
+        stale.content = "<p>Überschrieben</p>"
+        stale.save()
+
+        self.assertEqual(stale.content_version, 6)
+        revision = self.revisions().get(version=6)
+        self.assertTrue(revision.is_keyframe)
+        self.assertEqual(ContentRevision.objects.reconstruct(self.report, 6), stale.content)
+
+    def test_gap_in_chain_is_not_reconstructed(self):
+        self.edit(7)
+        self.revisions().filter(version=4).delete()
+
+        with self.assertRaises(ContentRevision.DoesNotExist):
+            ContentRevision.objects.reconstruct(self.report, 5)
+        self.assertEqual(ContentRevision.objects.reconstruct(self.report, 7), self.contents[7])
+
+    def test_prune_keeps_versions_after_cutoff(self):
+        self.edit(7)
+        cutoff = timezone.now() - timedelta(days=1)
+        self.revisions().filter(version__lte=4).update(created_at=cutoff - timedelta(days=1))
+
+        # Versions 1 and 2 are only needed for themselves, 3 is the keyframe of 4
+        self.assertEqual(ContentRevision.objects.prune(cutoff), 2)
+        self.assertEqual(list(self.revisions().values_list("version", flat=True)), [3, 4, 5, 6, 7])
+        for version in range(3, 8):
+            with self.subTest(version=version):
+                self.assertEqual(
+                    ContentRevision.objects.reconstruct(self.report, version),
+                    self.contents[version],
+                )
+        with self.assertRaises(ContentRevision.DoesNotExist):
+            ContentRevision.objects.reconstruct(self.report, 2)
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+from core.utils.audio_metadata import probe_duration
+
+
+class HashingAudioUploadHandler(FileUploadHandler):
+    """
+    Upload handler for (large) audio files
+
+    Streams the upload to a temporary file in fixed-size chunks while computing the
+    SHA-256 hash and size, so request memory stays flat regardless of the recording
+    length. With FILE_UPLOAD_TEMP_DIR on the media volume, storing the file is a plain
+    rename. The duration is read from the container headers once the upload is complete.
+
+    The resulting file carries ``content_hash`` and ``duration_seconds`` attributes.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = settings.AUDIO_UPLOAD_CHUNK_SIZE
+        self.digest = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_hash = self.digest.hexdigest()
+        self.file.duration_seconds = probe_duration(self.file, self.file_name)
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, "file"):
+            self.file.close()
@@ -1,6 +1,15 @@
 from django.urls import path
 
-from core.views import DocumentsListView, UnifiedInputViewSet
+from core import async_views
+from core.views import (
+    AudioFileView,
+    BulkExportCreateView,
+    BulkExportDownloadView,
+    BulkExportJobsView,
+    CacheStatsView,
+    DocumentsListView,
+    UnifiedInputViewSet,
+)
 from dashboard.views import DashboardView
 
 
@@ -27,11 +36,58 @@ urlpatterns = [
     ),
     # Delete endpoints
     path("inputs/audio/<int:pk>/delete/", input_viewset.delete_audio, name="delete_audio_input"),
+    path("inputs/audio/<int:pk>/file/", AudioFileView.as_view(), name="audio_file"),
     path(
         "inputs/document/<int:pk>/delete/",
         input_viewset.delete_document,
         name="delete_document_input",
     ),
+    # Resumable upload endpoints
+    path(
+        "inputs/<str:document_type>/<int:document_id>/uploads/",
+        input_viewset.create_upload,
+        name="create_upload",
+    ),
+    path("inputs/uploads/<uuid:upload_id>/", input_viewset.upload_status, name="upload_status"),
+    path(
+        "inputs/uploads/<uuid:upload_id>/chunk/",
+        input_viewset.upload_chunk,
+        name="upload_chunk",
+    ),
+    # Status endpoints (async)
+    path(
+        "documents/<str:document_type>/<int:document_id>/status/",
+        async_views.document_status,
+        name="document_status",
+    ),
+    path(
+        "documents/<str:document_type>/<int:document_id>/generation-status/",
+        async_views.generation_status,
+        name="generation_status",
+    ),
+    path(
+        "documents/<str:document_type>/<int:document_id>/input-status/",
+        async_views.input_status,
+        name="input_status",
+    ),
+    path(
+        "documents/<str:document_type>/<int:document_id>/context-summary/",
+        async_views.context_summary,
+        name="context_summary",
+    ),
+    path(
+        "documents/<str:document_type>/<int:document_id>/events/",
+        async_views.status_stream,
+        name="status_stream",
+    ),
     path("", DashboardView.as_view(), name="dashboard"),
     path("documents/", DocumentsListView.as_view(), name="documents_list"),
+    path("documents/export/", BulkExportCreateView.as_view(), name="bulk_export_create"),
+    path("documents/export/jobs/", BulkExportJobsView.as_view(), name="bulk_export_jobs"),
+    path(
+        "documents/export/<int:pk>/download/",
+        BulkExportDownloadView.as_view(),
+        name="bulk_export_download",
+    ),
+    path("cache-stats/", CacheStatsView.as_view(), name="cache_stats"),
 ]
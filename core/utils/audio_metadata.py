@@ -0,0 +1,263 @@
+"""Read audio durations from container headers without decoding the audio"""
+
+import logging
+import os
+import struct
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# MPEG audio layer III tables
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = [44100, 48000, 32000]
+
+# EBML element ids (WebM/Matroska)
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+
+
+def probe_duration(file, filename: str) -> Optional[float]:
+    """
+    Get the duration of an audio file in seconds from its container headers
+
+    Only a few header bytes are read (seeking over the payload), so this is cheap
+    even for very large recordings.
+
+    Args:
+        file: Seekable binary file object
+        filename: Original filename, used to determine the container format
+
+    Returns:
+        Duration in seconds, or None if it cannot be determined from the headers
+    """
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    parsers = {
+        "wav": _wav_duration,
+        "flac": _flac_duration,
+        "m4a": _mp4_duration,
+        "mp4": _mp4_duration,
+        "mp3": _mp3_duration,
+        "webm": _webm_duration,
+        "ogg": _ogg_opus_duration,
+        "opus": _ogg_opus_duration,
+    }
+    parser = parsers.get(extension)
+    if parser is None:
+        return None
+
+    position = file.tell()
+    try:
+        file.seek(0)
+        duration = parser(file)
+    except Exception as e:
+        logger.debug(f"Could not read duration of {filename}: {str(e)}")
+        duration = None
+    finally:
+        file.seek(position)
+
+    return duration if duration and duration > 0 else None
+
+
+def _file_size(file) -> int:
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def _wav_duration(file) -> Optional[float]:
+    header = file.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    byte_rate = None
+    while True:
+        chunk_header = file.read(8)
+        if len(chunk_header) < 8:
+            return None
+        chunk_id, chunk_size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+
+        if chunk_id == b"fmt ":
+            fmt = file.read(chunk_size + chunk_size % 2)
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed recordings may leave the size unset; use the rest of the file
+            available = _file_size(file) - file.tell()
+            if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available:
+                chunk_size = available
+            return chunk_size / byte_rate
+        else:
+            file.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def _flac_duration(file) -> Optional[float]:
+    if file.read(4) != b"fLaC":
+        return None
+    block_header = file.read(4)
+    if block_header[0] & 0x7F != 0:  # first block must be STREAMINFO
+        return None
+
+    streaminfo = file.read(34)
+    packed = int.from_bytes(streaminfo[10:18], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & ((1 << 36) - 1)
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _mp4_boxes(file, end: int):
+    """Yield (type, payload_start, payload_end) of the boxes between the current position and end"""
+    while file.tell() + 8 <= end:
+        start = file.tell()
+        size, box_type = struct.unpack(">I4s", file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - start
+        if size < header_size:
+            return
+        yield box_type, start + header_size, start + size
+        file.seek(start + size)
+
+
+def _mp4_duration(file) -> Optional[float]:
+    for box_type, start, end in _mp4_boxes(file, _file_size(file)):
+        if box_type != b"moov":
+            continue
+        file.seek(start)
+        for child_type, child_start, child_end in _mp4_boxes(file, end):
+            if child_type != b"mvhd":
+                continue
+            file.seek(child_start)
+            version = file.read(4)[0]
+            if version == 1:
+                _, _, timescale, duration = struct.unpack(">QQIQ", file.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack(">IIII", file.read(16))
+            return duration / timescale if timescale else None
+    return None
+
+
+def _mp3_duration(file) -> Optional[float]:
+    header = file.read(10)
+    audio_start = 0
+    if header[:3] == b"ID3":
+        # ID3v2 tag size is a 28 bit syncsafe integer
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        audio_start = 10 + tag_size
+
+    file.seek(audio_start)
+    frame = file.read(4 + 36 + 12)
+    if len(frame) < 4 or frame[0] != 0xFF or frame[1] & 0xE0 != 0xE0:
+        return None
+
+    version_bits = (frame[1] >> 3) & 0x03  # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer_bits = (frame[1] >> 1) & 0x03
+    if version_bits == 1 or layer_bits != 1:  # reserved version or not layer III
+        return None
+
+    mpeg1 = version_bits == 3
+    bitrate_index = frame[2] >> 4
+    sample_rate_index = (frame[2] >> 2) & 0x03
+    if sample_rate_index == 3 or bitrate_index in (0, 15):
+        return None
+
+    sample_rate = _MP3_SAMPLE_RATES[sample_rate_index] >> {3: 0, 2: 1, 0: 2}[version_bits]
+    samples_per_frame = 1152 if mpeg1 else 576
+    mono = (frame[3] >> 6) == 3
+
+    # VBR files carry the frame count in a Xing/Info header inside the first frame
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    xing = frame[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x01:
+        frames = struct.unpack(">I", xing[8:12])[0]
+        return frames * samples_per_frame / sample_rate
+
+    bitrate = _MP3_BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    return (_file_size(file) - audio_start) * 8 / bitrate
+
+
+def _ogg_opus_duration(file) -> Optional[float]:
+    first_page = file.read(64)
+    if first_page[:4] != b"OggS":
+        return None
+    head = first_page.find(b"OpusHead")
+    if head < 0:
+        return None
+    pre_skip = struct.unpack("<H", first_page[head + 10:head + 12])[0]
+
+    # The granule position of the last page is the total sample count at 48 kHz
+    size = _file_size(file)
+    file.seek(max(0, size - 65536))
+    tail = file.read()
+    last_page = tail.rfind(b"OggS")
+    if last_page < 0 or last_page + 14 > len(tail):
+        return None
+    granule = struct.unpack("<q", tail[last_page + 6:last_page + 14])[0]
+    return (granule - pre_skip) / 48000
+
+
+def _read_vint(file, keep_marker: bool = False) -> tuple[Optional[int], int]:
+    """Read an EBML variable length integer, returns (value, length)"""
+    first = file.read(1)
+    if not first:
+        return None, 0
+    first = first[0]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        return None, 0
+
+    value = first if keep_marker else first & (0xFF >> length)
+    rest = file.read(length - 1)
+    for byte in rest:
+        value = (value << 8) | byte
+
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return -1, length  # unknown size (live recordings)
+    return value, length
+
+
+def _webm_duration(file) -> Optional[float]:
+    end = _file_size(file)
+    timecode_scale = 1_000_000  # nanoseconds per tick (Matroska default)
+    info_end = None
+
+    while file.tell() < end:
+        element_id, _ = _read_vint(file, keep_marker=True)
+        size, _ = _read_vint(file)
+        if element_id is None or size is None:
+            return None
+        data_start = file.tell()
+
+        if element_id in (_EBML_SEGMENT, _EBML_INFO):
+            # Descend into master elements that contain the duration
+            if element_id == _EBML_INFO and size >= 0:
+                info_end = data_start + size
+            continue
+        if element_id == _EBML_CLUSTER or size < 0:
+            return None  # media data reached without duration (e.g. MediaRecorder output)
+
+        if element_id == _EBML_TIMECODE_SCALE:
+            timecode_scale = int.from_bytes(file.read(size), "big")
+        elif element_id == _EBML_DURATION:
+            duration = struct.unpack(">f" if size == 4 else ">d", file.read(size))[0]
+            return duration * timecode_scale / 1e9
+        else:
+            file.seek(data_start + size)
+
+        if info_end is not None and file.tell() >= info_end:
+            return None
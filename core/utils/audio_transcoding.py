@@ -0,0 +1,42 @@
+"""Transcoding of uploaded recordings into compact, speech-optimized masters"""
+
+import subprocess
+
+from django.conf import settings
+from pydub import AudioSegment
+
+
+class AudioTranscodingError(Exception):
+    """Raised when ffmpeg fails to transcode a recording"""
+    pass
+
+
+def transcode_to_speech_opus(input_path: str, output_path: str) -> None:
+    """
+    Transcode a recording to mono Opus at the speech sample rate
+
+    ffmpeg streams the conversion, so memory use does not depend on the recording
+    length (unlike decoding the whole file with pydub).
+
+    Args:
+        input_path: Path of the original recording (any format ffmpeg can read)
+        output_path: Path of the Ogg/Opus file to write
+    """
+    command = [
+        AudioSegment.converter,
+        "-nostdin",
+        "-y",
+        "-i", input_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(settings.AUDIO_NORMALIZED_SAMPLE_RATE),
+        "-c:a", "libopus",
+        "-b:a", settings.AUDIO_NORMALIZED_BITRATE,
+        "-application", "voip",
+        "-f", "ogg",
+        output_path,
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        error = result.stderr.decode(errors="replace").strip().splitlines()
+        raise AudioTranscodingError(error[-1] if error else "ffmpeg fehlgeschlagen")
@@ -0,0 +1,189 @@
+"""
+Cache key building, version tokens and hit statistics
+
+Keys are namespaced by the part before the first colon ("documents:...",
+"template.cache...."), which keeps them readable in redis-cli and lets the stats
+dashboard group them. Cached data is never invalidated by deleting keys: readers
+build their keys from version tokens, and bumping a token makes all entries built
+from it unreachable (they expire by timeout).
+"""
+
+import hashlib
+import logging
+import random
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+logger = logging.getLogger(__name__)
+
+# Longer keys are shortened to their namespace and a hash
+MAX_KEY_LENGTH = 200
+
+VERSION_KEY = "version:{name}"
+STATS_KEY = "stats:{name}:{outcome}"
+STATS_NAMES_KEY = "stats:names"
+
+HIT, MISS = "hits", "misses"
+
+# Names already registered in STATS_NAMES_KEY by this process
+_registered_names = set()
+
+
+def make_key(key: str, key_prefix: str, version: int) -> str:
+    """
+    Build the full cache key (settings.CACHES KEY_FUNCTION)
+
+    Returns:
+        "<prefix>:<version>:<key>", or "<prefix>:<version>:<namespace>:#<sha256>"
+        if the key is longer than MAX_KEY_LENGTH or contains whitespace
+    """
+    if len(key) > MAX_KEY_LENGTH or any(character.isspace() for character in key):
+        namespace = key.split(":", 1)[0][:50]
+        key = f"{namespace}:#{hashlib.sha256(key.encode()).hexdigest()}"
+    return f"{key_prefix}:{version}:{key}"
+
+
+def get_versions(*names: str) -> dict[str, str]:
+    """
+    Read (and create if missing) version tokens with a single cache round trip
+
+    Returns:
+        Mapping of name to token
+    """
+    keys = {VERSION_KEY.format(name=name): name for name in names}
+    found = cache.get_many(keys)
+
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            token = uuid.uuid4().hex
+            cache.add(key, token, None)
+            found[key] = cache.get(key) or token
+        versions[name] = found[key]
+    return versions
+
+
+def get_version(name: str) -> str:
+    """Read (and create if missing) a version token"""
+    return get_versions(name)[name]
+
+
+def bump_version(name: str):
+    """Replace a version token, which invalidates all entries built from it"""
+    cache.set(VERSION_KEY.format(name=name), uuid.uuid4().hex, None)
+
+
+def fragment_key(fragment_name: str, vary_on: list, request=None) -> str:
+    """
+    Cache key of a template fragment
+
+    Fragments are scoped to the user's session: cached forms contain CSRF tokens,
+    which stay valid until the session changes (e.g. on login).
+    """
+    if request is not None:
+        session = getattr(request, "session", None)
+        vary_on = [
+            getattr(request.user, "pk", None),
+            session.session_key if session is not None else None,
+            *vary_on,
+        ]
+    return make_template_fragment_key(fragment_name, vary_on)
+
+
+def record_access(name: str, hit: bool):
+    """
+    Count a hit or miss of a cache for the stats dashboard
+
+    Only a share of CACHE_STATS_SAMPLE_RATE of the lookups is counted (none by
+    default), as every counted lookup costs a cache round trip.
+    """
+    sample_rate = settings.CACHE_STATS_SAMPLE_RATE
+    if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+        return
+
+    key = STATS_KEY.format(name=name, outcome=HIT if hit else MISS)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Counters never expire, so the key only is missing on first use
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+        _register_name(name)
+
+
+def _register_name(name: str):
+    if name in _registered_names:
+        return
+    names = cache.get(STATS_NAMES_KEY) or []
+    if name not in names:
+        cache.set(STATS_NAMES_KEY, sorted({*names, name}), None)
+    _registered_names.add(name)
+
+
+def get_stats() -> list[dict]:
+    """
+    Hit and miss counts of all caches recorded with record_access
+
+    Returns:
+        One dict per cache with name, hits, misses and hit_ratio (None if unused)
+    """
+    names = cache.get(STATS_NAMES_KEY) or []
+    keys = [
+        STATS_KEY.format(name=name, outcome=outcome) for name in names for outcome in (HIT, MISS)
+    ]
+    counts = cache.get_many(keys)
+
+    stats = []
+    for name in names:
+        hits = counts.get(STATS_KEY.format(name=name, outcome=HIT), 0)
+        misses = counts.get(STATS_KEY.format(name=name, outcome=MISS), 0)
+        total = hits + misses
+        stats.append(
+            {
+                "name": name,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / total if total else None,
+            }
+        )
+    return stats
+
+
+def reset_stats():
+    """Reset all hit and miss counters"""
+    names = cache.get(STATS_NAMES_KEY) or []
+    cache.delete_many(
+        [STATS_KEY.format(name=name, outcome=outcome) for name in names for outcome in (HIT, MISS)]
+    )
+
+
+def get_server_info() -> dict:
+    """
+    Statistics of the Redis server behind the default cache
+
+    Returns:
+        Selected INFO fields, or an empty dict for other backends or if Redis is
+        unreachable
+    """
+    client_factory = getattr(cache, "_cache", None)
+    if not hasattr(client_factory, "get_client"):
+        return {}
+    try:
+        info = client_factory.get_client().info()
+    except Exception as e:
+        logger.warning(f"Could not read Redis INFO: {str(e)}")
+        return {}
+
+    hits, misses = info.get("keyspace_hits", 0), info.get("keyspace_misses", 0)
+    return {
+        "version": info.get("redis_version"),
+        "used_memory": info.get("used_memory_human"),
+        "max_memory": info.get("maxmemory_human"),
+        "evicted_keys": info.get("evicted_keys", 0),
+        "keyspace_hits": hits,
+        "keyspace_misses": misses,
+        "hit_ratio": hits / (hits + misses) if hits + misses else None,
+    }
@@ -0,0 +1,98 @@
+"""
+Helpers for running CPU-bound work in worker processes
+
+Process pools need a worker whose task runs in a non-daemonic process: Celery prefork
+children are daemonic and may not have children, so there the work runs serially.
+Route the tasks using pools to CELERY_CPU_QUEUE and serve that queue with a
+``--pool=solo`` worker to run them in parallel. Pools are shared by the tasks of a
+process and killed on timeouts, so workers must run one task at a time (not
+``--pool=threads``).
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_pools: dict[str, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+_serial_logged = False
+
+
+def can_spawn_processes() -> bool:
+    """
+    Check if the current process may start child processes
+
+    Daemonic processes (e.g. Celery prefork pool children) are not allowed to have
+    children. Run the worker with ``--pool=solo`` to enable process pools inside
+    tasks.
+    """
+    if multiprocessing.current_process().daemon:
+        return False
+
+    try:
+        import billiard
+    except ImportError:
+        return True
+    return not billiard.current_process().daemon
+
+
+def get_process_pool(purpose: str, max_workers: int) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool of the current process, or None if work should run serially
+
+    Pools are kept for the lifetime of the process (one per purpose), so worker
+    processes are started once and not for every file. Callers must not shut them
+    down; use terminate_process_pool() to stop work that ran into a timeout, which
+    only affects the pool of that purpose.
+
+    Args:
+        purpose: Kind of work (e.g. "ocr"); each purpose gets a pool of its own
+        max_workers: Maximum number of worker processes
+
+    Returns:
+        ProcessPoolExecutor or None
+    """
+    global _serial_logged
+
+    if max_workers < 2:
+        return None
+    if not can_spawn_processes():
+        if not _serial_logged:
+            _serial_logged = True
+            logger.info(
+                "Running CPU-bound work serially: daemonic processes (e.g. Celery prefork "
+                "children) cannot start a process pool, see CELERY_CPU_QUEUE"
+            )
+        return None
+
+    with _pools_lock:
+        pool = _pools.get(purpose)
+        # A pool whose worker died (e.g. killed by the OOM killer) accepts no more work
+        if pool is None or pool._broken:
+            pool = _pools[purpose] = ProcessPoolExecutor(max_workers=max_workers)
+        return pool
+
+
+def terminate_process_pool(pool: ProcessPoolExecutor):
+    """
+    Stop a pool and kill its worker processes, including ones busy with a task
+
+    Used when work runs into a timeout: cancelling futures does not stop tasks that
+    are already running. The next get_process_pool() call starts a new pool.
+    """
+    with _pools_lock:
+        for purpose, cached in list(_pools.items()):
+            if cached is pool:
+                del _pools[purpose]
+
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.kill()
+    for process in processes:
+        process.join()
@@ -0,0 +1,107 @@
+"""
+Conditional GET for pages built from versioned data
+
+Pages are validated with an ETag built from cheap version tokens (updated_at,
+the content and input versions, cache version tokens) instead of rendering them.
+A browser revisiting an unchanged page gets 304 and shows its cached copy.
+"""
+
+import hashlib
+import time
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+
+def page_etag(request, *parts) -> Optional[str]:
+    """
+    ETag of a page rendered for the request's user from the given version parts
+
+    Besides the parts, the tag covers what every page shows or embeds: the user
+    (navbar), the session and CSRF secret (forms) and the cache version (raised on
+    deployments that change templates).
+
+    Returns:
+        The tag, or None (no validation) while flash messages wait to be shown
+    """
+    if not request.user.is_authenticated or len(get_messages(request)):
+        return None
+
+    session = getattr(request, "session", None)
+    user = request.user
+    values = (
+        user.pk,
+        user.email,
+        user.first_name,
+        user.last_name,
+        session.session_key if session is not None else None,
+        request.META.get("CSRF_COOKIE"),
+        settings.CACHES["default"].get("VERSION"),
+        *parts,
+    )
+    return hashlib.sha256(repr(values).encode()).hexdigest()[:32]
+
+
+def document_etag(request, model, pk, *parts) -> Optional[str]:
+    """
+    ETag of a document detail page (one primary key lookup)
+
+    Covers the document's updated_at and its content and input versions, so the
+    tag changes on every save, content change and input change. With remote
+    storage it also changes before the signed file URLs in the page expire.
+
+    Returns:
+        The tag, or None if the document does not exist or belongs to another
+        user (the view renders its 404)
+    """
+    if not request.user.is_authenticated:
+        return None
+    status = (
+        model.objects.filter(pk=pk, user=request.user)
+        .values_list("updated_at", "content_version", "input_version", "is_generating")
+        .first()
+    )
+    if status is None:
+        return None
+    return page_etag(request, model._meta.label, pk, *status, signed_url_period(), *parts)
+
+
+def signed_url_period() -> Optional[int]:
+    """
+    Number of the current half of the signed URL lifetime (None without signed URLs)
+
+    Tags including it change every half lifetime, so a cached page is reused for
+    at most half the lifetime of the URLs it embeds.
+    """
+    options = settings.STORAGES["default"].get("OPTIONS", {})
+    if not options.get("querystring_auth"):
+        return None
+    return int(time.time() // max(1, options.get("querystring_expire", 3600) // 2))
+
+
+def conditional_page(etag_func):
+    """
+    Answer GET requests with 304 while etag_func returns the tag the client has
+
+    etag_func is called with the view's arguments and returns a tag (see
+    page_etag) or None to render the page unconditionally. Responses must be
+    revalidated on every use and are not stored by shared caches.
+    """
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
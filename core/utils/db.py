@@ -1,6 +1,9 @@
+from contextlib import contextmanager
 from urllib.parse import urlparse
 from collections import namedtuple
 
+from django.db import DEFAULT_DB_ALIAS, connections
+
 DatabaseConfig = namedtuple('DatabaseConfig', ['dbname', 'user', 'password', 'host', 'port'])
 
 def convert_db_connection_string(database_url):
@@ -24,4 +27,25 @@ def convert_db_connection_string(database_url):
         password=parsed.password or '',
         host=parsed.hostname or 'localhost',
         port=parsed.port or 5432
-    )
\ No newline at end of file
+    )
+
+
+@contextmanager
+def db_idle(using=DEFAULT_DB_ALIAS):
+    """
+    Release the database connection while waiting on slow work without queries
+
+    Tasks wait minutes for AI responses, transcription or OCR. Closing the
+    connection first returns it to the pool (or frees the server slot) instead of
+    holding it idle, and the first query after the block opens a fresh one, so the
+    task never uses a connection the server or a proxy dropped in the meantime.
+    Inside a transaction the connection is kept.
+
+    Usage:
+        with db_idle():
+            result = llm_connector.generate_text(...)
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        connection.close()
+    yield
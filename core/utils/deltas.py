@@ -0,0 +1,46 @@
+"""Compact single-splice deltas between two versions of a text"""
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix, found by binary search over slice comparisons"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix, at most limit characters"""
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def compute_delta(old: str, new: str) -> tuple[int, int, str]:
+    """
+    Describe new as one splice of old
+
+    Editor saves usually change one contiguous region, so replacing old[start:end]
+    with text is a compact representation.
+
+    Returns:
+        (start, end, text) with new == old[:start] + text + old[end:]
+    """
+    start = _common_prefix_length(old, new)
+    suffix = _common_suffix_length(old, new, min(len(old), len(new)) - start)
+    end = len(old) - suffix
+    return start, end, new[start:len(new) - suffix]
+
+
+def apply_delta(old: str, start: int, end: int, text: str) -> str:
+    """Apply a delta created by compute_delta"""
+    return old[:start] + text + old[end:]
@@ -0,0 +1,40 @@
+"""Content hashing for content-addressed file storage and caches"""
+
+import hashlib
+import os
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_content_hash(file_path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Compute the SHA-256 hex digest of a file without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def uploaded_file_hash(uploaded_file) -> str:
+    """
+    Compute the SHA-256 hex digest of an uploaded file chunk by chunk
+
+    The file is rewound afterwards so it can still be saved to storage.
+    """
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def content_addressed_path(directory: str, content_hash: str, filename: str) -> str:
+    """Storage path of a blob: <directory>/<ab>/<hash><ext>"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{directory}/{content_hash[:2]}/{content_hash}{extension}"
+
+
+def input_fingerprint(input_obj, text: str) -> str:
+    """Identifies an input and the text it contributes; changes when the text is edited"""
+    text_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
+    return f"{input_obj._meta.model_name}:{input_obj.pk}:{text_hash}"
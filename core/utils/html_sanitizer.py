@@ -0,0 +1,161 @@
+"""
+Single-pass HTML sanitizer for editor content and PDF exports
+
+The input is scanned once from left to right with str.find, so the runtime is
+linear in the length of the document, also for malformed input such as unclosed
+tags or comments (autosave sends the whole note on every keystroke pause).
+"""
+
+import re
+from html import unescape
+
+# Tags the session notes editor is allowed to store
+SESSION_NOTE_TAGS = frozenset({"p", "br", "strong", "b", "em", "i", "u", "ul", "ol", "li"})
+
+# Tags produced by the Tiptap StarterKit editor (reports)
+EDITOR_TAGS = SESSION_NOTE_TAGS | frozenset(
+    {"h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "code", "hr", "s"}
+)
+
+# Tags fpdf2's write_html renders; everything else is unwrapped (content kept)
+PDF_TAGS = EDITOR_TAGS | frozenset(
+    {"sup", "sub", "table", "thead", "tbody", "tr", "th", "td", "font"}
+)
+
+# Tags whose content is dropped together with the tag
+DROP_CONTENT_TAGS = frozenset({"script", "style", "template", "iframe", "object", "noscript"})
+
+# Void elements are always written without a closing tag
+_VOID_TAGS = frozenset({"br", "hr"})
+
+# Plain text conversion
+_TEXT_BREAK_TAGS = frozenset({"p", "div", "ul", "ol", "br", "h1", "h2", "h3", "h4", "h5", "h6"})
+
+# As in HTML, a tag name follows "<" or "</" directly; "a < b" is text
+_TAG_RE = re.compile(r"<(/)?([a-zA-Z][a-zA-Z0-9]*)")
+_DROP_END_RE = {
+    tag: re.compile(r"</" + tag + r"\s*>", re.IGNORECASE) for tag in DROP_CONTENT_TAGS
+}
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+_SPACES_RE = re.compile(r"[ \t]+")
+
+TEXT, TAG = 0, 1
+
+
+def tokenize(html: str):
+    """
+    Split HTML into (TEXT, text) and (TAG, (name, is_closing)) tokens
+
+    Comments, doctypes and processing instructions are skipped, and the content of
+    DROP_CONTENT_TAGS is skipped together with the tag. A "<" that does not start a
+    tag (not followed by a letter, "/", "!" or "?") or has no closing ">" is
+    returned as text. Entities are left as they are.
+    """
+    position = 0
+    length = len(html)
+
+    while position < length:
+        start = html.find("<", position)
+        if start < 0:
+            yield TEXT, html[position:]
+            return
+        if start > position:
+            yield TEXT, html[position:start]
+
+        if html.startswith("<!--", start):
+            end = html.find("-->", start + 4)
+            position = length if end < 0 else end + 3
+            continue
+
+        match = _TAG_RE.match(html, start)
+        if match is None and not html.startswith(("<!", "<?", "</"), start):
+            yield TEXT, "<"
+            position = start + 1
+            continue
+
+        end = html.find(">", start + 1)
+        if end < 0:
+            yield TEXT, html[start:]
+            return
+
+        if match is None:
+            position = end + 1  # doctype, processing instruction or bogus end tag like </>
+            continue
+
+        name = match.group(2).lower()
+        is_closing = match.group(1) is not None
+        position = end + 1
+
+        if name in DROP_CONTENT_TAGS:
+            if not is_closing and not html[end - 1] == "/":
+                drop_end = _DROP_END_RE[name].search(html, position)
+                position = length if drop_end is None else drop_end.end()
+            continue
+
+        yield TAG, (name, is_closing)
+
+
+def sanitize_html(html: str, allowed_tags: frozenset = SESSION_NOTE_TAGS) -> str:
+    """
+    Keep only allowed tags (without their attributes) and drop all others
+
+    The text of removed tags is kept, except for DROP_CONTENT_TAGS. Stray "<"
+    characters are escaped, so the result never contains a tag that was not
+    allowed.
+
+    Args:
+        html: HTML content to sanitize
+        allowed_tags: Lowercase names of the tags to keep
+
+    Returns:
+        Sanitized HTML
+    """
+    if not html:
+        return ""
+
+    parts = []
+    for kind, value in tokenize(html):
+        if kind == TEXT:
+            parts.append(value.replace("<", "&lt;"))
+            continue
+
+        name, is_closing = value
+        if name not in allowed_tags:
+            continue
+        if name in _VOID_TAGS:
+            if not is_closing:
+                parts.append(f"<{name}>")
+        else:
+            parts.append(f"</{name}>" if is_closing else f"<{name}>")
+
+    return "".join(parts)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert HTML to plain text with paragraphs and bulleted list items
+
+    Args:
+        html: HTML content
+
+    Returns:
+        Plain text with blank lines between paragraphs
+    """
+    if not html:
+        return ""
+
+    parts = []
+    for kind, value in tokenize(html):
+        if kind == TEXT:
+            parts.append(unescape(value))
+            continue
+
+        name, is_closing = value
+        if name == "li":
+            parts.append("\n" if is_closing else "• ")
+        elif name in _TEXT_BREAK_TAGS:
+            parts.append("\n")
+
+    content = _BLANK_LINES_RE.sub("\n\n", "".join(parts))
+    content = _SPACES_RE.sub(" ", content)
+    return content.strip()
@@ -0,0 +1,132 @@
+"""OCR fallback for PDF pages without a text layer"""
+
+import importlib.util
+import logging
+import time
+from concurrent.futures import as_completed, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.utils.concurrency import get_process_pool, terminate_process_pool
+from core.utils.hashing import file_content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _ocr_pdf_page(file_path: str, page_index: int, dpi: int, language: str) -> str:
+    """
+    Rasterize a single PDF page and run Tesseract on it
+
+    Module-level so it can be executed in a worker process.
+    """
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    images = convert_from_path(
+        file_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1
+    )
+    return "\n".join(pytesseract.image_to_string(image, lang=language) for image in images)
+
+
+class OCRService:
+    """Service for recognizing text on scanned PDF pages with a local OCR engine"""
+
+    def is_available(self) -> bool:
+        """Check if OCR is enabled and the OCR packages are installed"""
+        return (
+            settings.OCR_ENABLED
+            and importlib.util.find_spec("pdf2image") is not None
+            and importlib.util.find_spec("pytesseract") is not None
+        )
+
+    def needs_ocr(self, page_text: str) -> bool:
+        """Pages with (almost) no extractable text are assumed to be scanned images"""
+        return len(page_text.strip()) < settings.OCR_MIN_TEXT_CHARS
+
+    def ocr_pages(self, file_path: str, page_indices: list[int]) -> dict[int, str]:
+        """
+        OCR the given pages of a PDF
+
+        Results are cached per page by the file's content hash, so re-uploads of the same
+        file and task retries do not OCR the pages again.
+
+        Args:
+            file_path: Path to the PDF file
+            page_indices: Zero-based indices of the pages to OCR
+
+        Returns:
+            Mapping of page index to recognized text
+        """
+        if not page_indices:
+            return {}
+
+        content_hash = file_content_hash(file_path)
+        keys = {
+            page_index: self._cache_key(content_hash, page_index) for page_index in page_indices
+        }
+        cached = cache.get_many(list(keys.values()))
+        results = {
+            page_index: cached[key] for page_index, key in keys.items() if key in cached
+        }
+
+        missing = [page_index for page_index in page_indices if page_index not in results]
+        if missing:
+            logger.info(f"Running OCR on {len(missing)} pages of {file_path}")
+            recognized = self._run_ocr(file_path, missing)
+            cache.set_many(
+                {keys[page_index]: text for page_index, text in recognized.items()},
+                timeout=settings.OCR_CACHE_TIMEOUT,
+            )
+            results.update(recognized)
+
+        return results
+
+    def _run_ocr(self, file_path: str, page_indices: list[int]) -> dict[int, str]:
+        """OCR pages in a process pool (or serially where no pool can be started)"""
+        args = (settings.OCR_DPI, settings.OCR_LANGUAGE)
+        pool = get_process_pool("ocr", settings.OCR_WORKERS) if len(page_indices) > 1 else None
+
+        if pool is None:
+            return self._run_ocr_serial(file_path, page_indices, args)
+
+        results = {}
+        futures = {}
+        try:
+            futures = {
+                pool.submit(_ocr_pdf_page, file_path, page_index, *args): page_index
+                for page_index in page_indices
+            }
+            for future in as_completed(futures, timeout=settings.OCR_TIMEOUT_SECONDS):
+                results[futures[future]] = future.result()
+        except FutureTimeoutError:
+            terminate_process_pool(pool)
+            logger.warning(
+                f"OCR of {file_path} exceeded {settings.OCR_TIMEOUT_SECONDS}s, "
+                f"{len(page_indices) - len(results)} pages skipped"
+            )
+        finally:
+            # The pool is shared; drop pages of this file that have not started yet
+            for future in futures:
+                future.cancel()
+
+        return results
+
+    def _run_ocr_serial(
+        self, file_path: str, page_indices: list[int], args: tuple
+    ) -> dict[int, str]:
+        """OCR pages one after another in the current process, up to OCR_TIMEOUT_SECONDS"""
+        deadline = time.monotonic() + settings.OCR_TIMEOUT_SECONDS
+        results = {}
+        for page_index in page_indices:
+            if time.monotonic() > deadline:
+                logger.warning(
+                    f"OCR of {file_path} exceeded {settings.OCR_TIMEOUT_SECONDS}s, "
+                    f"{len(page_indices) - len(results)} pages skipped"
+                )
+                break
+            results[page_index] = _ocr_pdf_page(file_path, page_index, *args)
+        return results
+
+    def _cache_key(self, content_hash: str, page_index: int) -> str:
+        return f"ocr:{settings.OCR_LANGUAGE}:{settings.OCR_DPI}:{content_hash}:{page_index}"
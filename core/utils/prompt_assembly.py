@@ -0,0 +1,121 @@
+"""Cache-friendly prompt assembly shared by session and report generation"""
+
+import re
+import textwrap
+from dataclasses import dataclass
+
+_TRAILING_WHITESPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Instructions on the answer format, identical for all templates
+RESPONSE_FORMAT_INSTRUCTIONS = (
+    "Antworte in HTML-Format mit folgenden erlaubten Tags: <p>, <strong>, <ul>, <ol>, <li>"
+)
+
+# Last part of the prompt when the sections of a structure are generated separately
+SECTION_INSTRUCTIONS = (
+    "Erstelle ausschließlich den Abschnitt \"{title}\" der oben beschriebenen Struktur. "
+    "Beginne mit der Überschrift <p><strong>{title}</strong></p> und lasse alle anderen "
+    "Abschnitte weg."
+)
+
+# Context for content that exists already (possibly edited by the therapist)
+EXISTING_SECTION_INSTRUCTIONS = (
+    "Dieser Abschnitt existiert bereits und wurde eventuell von Hand bearbeitet. Übernimm seinen "
+    "Inhalt und ergänze ihn, wo es angemessen ist, mit den neuen Informationen."
+)
+UNMATCHED_CONTENT_INSTRUCTIONS = (
+    "Die folgenden Notizen existieren bereits, passen aber zu keinem Abschnitt der Struktur. "
+    "Übertrage ihren Inhalt, soweit er zum Abschnitt gehört."
+)
+EXISTING_CONTENT_INSTRUCTIONS = (
+    "Die folgenden Notizen existieren bereits und wurden eventuell von Hand bearbeitet. Übertrage "
+    "ihren Inhalt in die Struktur und ergänze ihn, wo es angemessen ist, mit den neuen Informationen."
+)
+
+# Assignment of new inputs to the sections they contain information for
+SECTION_ROUTING_SYSTEM_PROMPT = (
+    "Du ordnest neues Material den Abschnitten eines therapeutischen Dokuments zu."
+)
+SECTION_ROUTING_INSTRUCTIONS = (
+    "Nenne die Nummern aller Abschnitte, für die das neue Material relevante Informationen "
+    "enthält. Antworte ausschließlich mit einem JSON-Array von Nummern, z.B. [1, 4], oder [] "
+    "wenn kein Abschnitt betroffen ist."
+)
+
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalize whitespace so identical content always produces identical prompt bytes
+
+    Removes common indentation and trailing whitespace, collapses runs of blank lines
+    and strips leading/trailing whitespace.
+    """
+    if not text:
+        return ""
+    text = textwrap.dedent(text.replace("\r\n", "\n"))
+    text = _TRAILING_WHITESPACE_RE.sub("", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip()
+
+
+@dataclass
+class AssembledPrompt:
+    """System and user prompt ready to be passed to an LLM connector"""
+    system_prompt: str
+    user_prompt: str
+
+    def with_context(self, text: str, heading: str = None) -> "AssembledPrompt":
+        """Copy of the prompt with a variable section appended after all others"""
+        section = format_section(text, heading)
+        if not section:
+            return self
+        return AssembledPrompt(
+            system_prompt=self.system_prompt,
+            user_prompt="\n\n".join(part for part in (self.user_prompt, section) if part),
+        )
+
+
+def format_section(text: str, heading: str = None) -> str:
+    """Normalized prompt section with an optional bold heading ("" for empty text)"""
+    text = normalize_whitespace(text)
+    if text and heading:
+        text = f"**{heading}**\n{text}"
+    return text
+
+
+class PromptBuilder:
+    """
+    Builds prompts in a provider-cache-friendly order
+
+    Providers cache prompts by their longest identical prefix, so everything that is
+    shared between requests comes first: the static system prompt, then the template
+    instructions, and only then the per-document context.
+    """
+
+    def __init__(self, system_prompt: str):
+        self.system_prompt = normalize_whitespace(system_prompt)
+        self._static_sections = []
+        self._context_sections = []
+
+    def add_instructions(self, text: str, heading: str = None) -> "PromptBuilder":
+        """Add a static section (same for every document using the template)"""
+        self._add(self._static_sections, text, heading)
+        return self
+
+    def add_context(self, text: str, heading: str = None) -> "PromptBuilder":
+        """Add a variable section (specific to the document being generated)"""
+        self._add(self._context_sections, text, heading)
+        return self
+
+    def build(self) -> AssembledPrompt:
+        """Assemble the prompt: static sections first, variable context last"""
+        return AssembledPrompt(
+            system_prompt=self.system_prompt,
+            user_prompt="\n\n".join(self._static_sections + self._context_sections),
+        )
+
+    def _add(self, sections: list, text: str, heading: str = None):
+        text = format_section(text, heading)
+        if text:
+            sections.append(text)
@@ -0,0 +1,116 @@
+"""
+Sections of template structures and generated documents
+
+Template structures and the documents generated from them are HTML in which every
+section starts with a heading paragraph, e.g.
+
+    <p><strong>Anamnese</strong></p>
+    <ul><li>...</li></ul>
+
+Sections are matched by their heading (case and whitespace insensitive). In
+generated content only the template's headings start a section; other bold
+paragraphs (e.g. sub-headings within a section) are part of the section's body.
+"""
+
+import re
+from dataclasses import dataclass
+from html import unescape
+from typing import Optional
+
+_HEADING_RE = re.compile(r"<p>\s*<strong>(.*?)</strong>\s*</p>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class Section:
+    """A heading and the HTML below it (up to the next heading)"""
+    title: str
+    body: str = ""
+
+    @property
+    def key(self) -> str:
+        return section_key(self.title)
+
+    @property
+    def html(self) -> str:
+        return f"{section_heading(self.title)}\n{self.body}".strip()
+
+
+def section_key(title: str) -> str:
+    """Normalized heading used to match sections"""
+    return " ".join(unescape(_TAG_RE.sub("", title)).split()).casefold()
+
+
+def section_heading(title: str) -> str:
+    return f"<p><strong>{title}</strong></p>"
+
+
+def split_sections(html: str, titles: Optional[list[str]] = None) -> tuple[str, list[Section]]:
+    """
+    Split HTML at its section headings
+
+    Args:
+        html: Template structure or generated content
+        titles: Headings that start a section (e.g. the template's); by default every
+            heading paragraph does
+
+    Returns:
+        The HTML before the first heading and the sections in order
+    """
+    html = html or ""
+    matches = list(_HEADING_RE.finditer(html))
+    if titles is not None:
+        keys = {section_key(title) for title in titles}
+        matches = [match for match in matches if section_key(match.group(1)) in keys]
+    if not matches:
+        return html.strip(), []
+
+    sections = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(html)
+        sections.append(Section(title=match.group(1).strip(), body=html[match.end():end].strip()))
+    return html[: matches[0].start()].strip(), sections
+
+
+def join_sections(sections: list[Section], preamble: str = "") -> str:
+    return "\n\n".join(part for part in [preamble.strip()] + [s.html for s in sections] if part)
+
+
+def find_section(html: str, title: str, titles: list[str]) -> Optional[Section]:
+    """The section of html with the given heading, if any (split at titles)"""
+    key = section_key(title)
+    return next((s for s in split_sections(html, titles)[1] if s.key == key), None)
+
+
+def parse_section(html: str, title: str) -> Section:
+    """
+    Parse a generated section, which should start with its heading
+
+    A missing heading is added; other bold paragraphs are kept in the body.
+    """
+    preamble, sections = split_sections(html, [title])
+    if sections and not preamble:
+        return Section(title=title, body=join_sections(sections[1:], sections[0].body))
+    return Section(title=title, body=(html or "").strip())
+
+
+def replace_section(html: str, section: Section, order: list[str]) -> str:
+    """
+    Replace the section with the same heading in html
+
+    html is split at the headings in order (the template's); a section missing in
+    html is inserted before the first following section in order, or appended.
+    """
+    preamble, sections = split_sections(html, order)
+    keys = [s.key for s in sections]
+    if section.key in keys:
+        sections[keys.index(section.key)] = section
+        return join_sections(sections, preamble)
+
+    order_keys = [section_key(title) for title in order]
+    following = (
+        set(order_keys[order_keys.index(section.key) + 1:]) if section.key in order_keys else set()
+    )
+    position = next((i for i, key in enumerate(keys) if key in following), len(sections))
+    sections.insert(position, section)
+    return join_sections(sections, preamble)
@@ -0,0 +1,139 @@
+"""Storage helpers so workers can process inputs without a shared filesystem"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Per-task links of staged files left behind by crashed workers are removed after this
+IN_USE_MAX_AGE_SECONDS = 24 * 60 * 60
+
+_eviction_lock = threading.Lock()
+
+
+def storage_has_local_paths(storage=default_storage) -> bool:
+    """Check if files of the storage can be opened directly from the local filesystem"""
+    try:
+        storage.path("")
+    except NotImplementedError:
+        return False
+    return True
+
+
+def iter_chunks(
+    name: str, chunk_size: int = STREAM_CHUNK_SIZE, storage=default_storage
+) -> Iterator[bytes]:
+    """Stream a stored file in chunks without loading it into memory"""
+    with storage.open(name, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            yield chunk
+
+
+@contextmanager
+def local_file(name: str, storage=default_storage) -> Iterator[str]:
+    """
+    Provide a local path for a stored file
+
+    Local storages return the file's own path. For remote storages the file is
+    downloaded into the worker's staging cache (WORKER_STAGING_DIR), where it stays
+    for later tasks until the cache exceeds WORKER_STAGING_MAX_BYTES and the least
+    recently used files are evicted. Stored inputs are content-addressed and never
+    change, so a staged copy never goes stale.
+
+    The task gets a hard link to the staged copy in a directory of its own, so
+    evicting the cache entry (by any worker process) never removes a file that is
+    still being processed.
+
+    Usage:
+        with local_file(audio_input.audio_file.name) as path:
+            transcribe(path)
+    """
+    if storage_has_local_paths(storage):
+        yield storage.path(name)
+        return
+
+    staged_path = _staged_path(name)
+    in_use_dir = os.path.join(settings.WORKER_STAGING_DIR, "in-use")
+    os.makedirs(in_use_dir, exist_ok=True)
+    task_dir = tempfile.mkdtemp(dir=in_use_dir)
+    task_path = os.path.join(task_dir, os.path.basename(staged_path))
+    try:
+        try:
+            os.link(staged_path, task_path)
+            os.utime(task_path)  # same inode: marks the cache entry as recently used
+        except FileNotFoundError:
+            _download(name, staged_path, task_path, storage)
+            _evict(keep=staged_path)
+
+        yield task_path
+    finally:
+        shutil.rmtree(task_dir, ignore_errors=True)
+
+
+def _staged_path(name: str) -> str:
+    key = hashlib.sha256(name.encode()).hexdigest()
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(settings.WORKER_STAGING_DIR, f"{key}{extension}")
+
+
+def _download(name: str, staged_path: str, task_path: str, storage):
+    """
+    Download to a temporary file first so concurrent tasks never see partial files
+
+    The task's link is created before the file enters the cache, so it cannot be
+    evicted in between.
+    """
+    os.makedirs(settings.WORKER_STAGING_DIR, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=settings.WORKER_STAGING_DIR, suffix=".part")
+    try:
+        with os.fdopen(descriptor, "wb") as temp_file:
+            for chunk in iter_chunks(name, storage=storage):
+                temp_file.write(chunk)
+        os.link(temp_path, task_path)
+        os.replace(temp_path, staged_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    logger.info(f"Staged {name} for processing")
+
+
+def _evict(keep: str):
+    """Remove least recently used staged files until the cache fits its size limit"""
+    with _eviction_lock:
+        entries = []
+        for entry in os.scandir(settings.WORKER_STAGING_DIR):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= settings.WORKER_STAGING_MAX_BYTES:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total_size -= size
+            except FileNotFoundError:
+                pass
+
+        # Remove task directories of workers that crashed while processing
+        in_use_dir = os.path.join(settings.WORKER_STAGING_DIR, "in-use")
+        expired = time.time() - IN_USE_MAX_AGE_SECONDS
+        for entry in os.scandir(in_use_dir):
+            if entry.is_dir() and entry.stat().st_mtime < expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
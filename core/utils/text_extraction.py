@@ -1,17 +1,40 @@
 import logging
+import time
+from concurrent.futures import as_completed, TimeoutError as FutureTimeoutError
 from typing import Optional
 import re
 import PyPDF2
 import docx
+from django.conf import settings
+
+from core.utils.concurrency import get_process_pool, terminate_process_pool
+from core.utils.ocr import OCRService
 
 logger = logging.getLogger(__name__)
 
 
+class ExtractionLimitExceeded(Exception):
+    """Raised when a file exceeds the configured page or time limits"""
+    pass
+
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> list[str]:
+    """
+    Extract the text of pages [start, end) of a PDF
+
+    Module-level so it can be executed in a worker process.
+    """
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
 class TextExtractionService:
     """Service for extracting text from various file formats"""
     
     def __init__(self):
         self.supported_formats = ['.pdf', '.docx', '.doc', '.txt']
+        self.ocr_service = OCRService()
     
     def extract_text_from_file(self, file_path: str, filename: str) -> Optional[str]:
         """
@@ -37,7 +60,9 @@ class TextExtractionService:
             else:
                 logger.warning(f"Unsupported file format: {file_extension} for file {filename}")
                 return None
-                
+
+        except ExtractionLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error extracting text from {filename}: {str(e)}")
             return None
@@ -63,28 +88,105 @@ class TextExtractionService:
     def _extract_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page in pdf_reader.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-
-                return self._clean_text(text)
+            pages = self._extract_pdf_pages(file_path)
+            self._add_ocr_text(file_path, pages)
+            return self._clean_text("\n".join(page for page in pages if page))
+        except ExtractionLimitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Error extracting PDF text: {str(e)}")
             raise Exception(f"PDF extraction failed: {str(e)}")
 
+    def _extract_pdf_pages(self, file_path: str) -> list[str]:
+        """
+        Extract the text of every page of a PDF
+
+        Large documents are split into page ranges that are extracted in parallel by a
+        process pool. Results are collected per page, so memory stays bounded by the
+        extracted text and the page order is preserved.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Returns:
+            List with the text of each page ("" for pages without text layer)
+
+        Raises:
+            ExtractionLimitExceeded: If the page or time limit is exceeded
+        """
+        deadline = time.monotonic() + settings.PDF_EXTRACTION_TIMEOUT_SECONDS
+
+        with open(file_path, 'rb') as file:
+            page_count = len(PyPDF2.PdfReader(file).pages)
+
+        if page_count > settings.PDF_EXTRACTION_MAX_PAGES:
+            raise ExtractionLimitExceeded(
+                f"PDF hat {page_count} Seiten (maximal {settings.PDF_EXTRACTION_MAX_PAGES})"
+            )
+
+        pages_per_task = settings.PDF_EXTRACTION_PAGES_PER_TASK
+        page_ranges = [
+            (start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+
+        pool = None
+        if page_count >= settings.PDF_EXTRACTION_MIN_PARALLEL_PAGES and len(page_ranges) > 1:
+            pool = get_process_pool("pdf_extraction", settings.PDF_EXTRACTION_WORKERS)
+
+        if pool is None:
+            return self._extract_pdf_pages_serial(file_path, page_count, deadline)
+
+        pages = [""] * page_count
+        futures = {}
+        try:
+            futures = {
+                pool.submit(_extract_pdf_page_range, file_path, start, end): start
+                for start, end in page_ranges
+            }
+            for future in as_completed(futures, timeout=max(0, deadline - time.monotonic())):
+                page_texts = future.result()
+                start = futures[future]
+                pages[start:start + len(page_texts)] = page_texts
+        except FutureTimeoutError:
+            terminate_process_pool(pool)
+            raise ExtractionLimitExceeded(
+                f"PDF-Extraktion dauerte länger als {settings.PDF_EXTRACTION_TIMEOUT_SECONDS} Sekunden"
+            )
+        finally:
+            # The pool is shared; drop ranges of this file that have not started yet
+            for future in futures:
+                future.cancel()
+
+        return pages
+
+    def _add_ocr_text(self, file_path: str, pages: list[str]):
+        """Fill pages without a text layer (scanned pages) with OCR results, if enabled"""
+        scanned_pages = [i for i, page in enumerate(pages) if self.ocr_service.needs_ocr(page)]
+        if not scanned_pages or not self.ocr_service.is_available():
+            return
+
+        for page_index, text in self.ocr_service.ocr_pages(file_path, scanned_pages).items():
+            pages[page_index] = text
+
+    def _extract_pdf_pages_serial(self, file_path: str, page_count: int, deadline: float) -> list[str]:
+        """Extract the text of every page in the current process"""
+        pages = []
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page in pdf_reader.pages:
+                if time.monotonic() > deadline:
+                    raise ExtractionLimitExceeded(
+                        f"PDF-Extraktion dauerte länger als {settings.PDF_EXTRACTION_TIMEOUT_SECONDS} Sekunden"
+                    )
+                pages.append(page.extract_text() or "")
+        return pages
+
     def _extract_from_word(self, file_path: str) -> str:
         """Extract text from Word document"""
         try:
             doc = docx.Document(file_path)
-            text = ""
-
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
 
             return self._clean_text(text)
 
@@ -1,24 +1,44 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib import messages
-from django.http import Http404
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 import logging
-from django.views.generic import TemplateView
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import TemplateView, View
+from django.http import FileResponse
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django_tables2 import RequestConfig
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from django.shortcuts import render
 from itertools import chain
-from core.models import AudioInput, DocumentInput
-from core.services import UnifiedInputService
-from core.tasks import process_audio_transcription_task, process_document_extraction_task
+from core.forms import BulkExportForm
+from core.models import AudioInput, BaseDocument, DocumentInput, UploadSession, BulkExportJob
+from core.services import (
+    BulkExportService,
+    UnifiedInputService,
+    ResumableUploadService,
+    UploadError,
+    UploadOffsetMismatch,
+    UploadChecksumMismatch,
+    UploadChunkInProgress,
+)
+from core.upload_handlers import HashingAudioUploadHandler
+from core.utils.conditional import conditional_page, page_etag
+from core.tasks import (
+    bulk_export_task,
+    process_audio_transcription_task,
+    process_document_extraction_task,
+)
 from reports.models import Report
 from therapy_sessions.models import Session
 from core.tables import BaseDocumentTable
+from core.utils import cache as cache_utils
 
 
 logger = logging.getLogger(__name__)
@@ -42,6 +62,8 @@ class UnifiedInputViewSet(viewsets.ViewSet):
     @method_decorator(csrf_exempt)
     def add_audio(self, request, document_type=None, document_id=None):
         """Add audio input (recording or upload)"""
+        # Must be set before request.POST/FILES are accessed for the first time
+        request.upload_handlers = [HashingAudioUploadHandler(request)]
         document = self.get_document(document_type, document_id, request)
 
         if "audio_file" not in request.FILES:
@@ -172,10 +194,154 @@ class UnifiedInputViewSet(viewsets.ViewSet):
         
         return redirect(f"{document_type}s:{document_type}_detail", pk=document_id) 
 
+    # Resumable uploads (tus-like): create an upload, send chunks with their offset,
+    # and query the current offset to resume after a connection loss.
+
+    @action(detail=False, methods=["post"])
+    @method_decorator(csrf_exempt)
+    def create_upload(self, request, document_type=None, document_id=None):
+        """Start a resumable audio or document upload"""
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Nicht angemeldet"}, status=401)
+
+        document = self.get_document(document_type, document_id, request)
+
+        try:
+            upload = ResumableUploadService().create_upload(
+                document=document,
+                user=request.user,
+                input_kind=request.POST.get("input_kind", UploadSession.InputKind.AUDIO),
+                filename=request.POST.get("filename", ""),
+                total_size=int(request.POST.get("size", 0)),
+                checksum=request.POST.get("checksum", ""),
+                audio_type=request.POST.get("audio_type", "upload"),
+                therapeutic_observations=request.POST.get("therapeutic_observations", ""),
+            )
+        except (UploadError, ValueError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        response = JsonResponse(self._upload_state(upload), status=201)
+        response["Location"] = self._upload_url(upload)
+        return response
+
+    @action(detail=True, methods=["get", "head"])
+    def upload_status(self, request, upload_id=None):
+        """Get the current offset of a resumable upload"""
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Nicht angemeldet"}, status=401)
+
+        try:
+            upload = ResumableUploadService().get_upload(upload_id, request.user)
+        except UploadSession.DoesNotExist:
+            return JsonResponse({"error": "Upload nicht gefunden oder abgelaufen"}, status=404)
+
+        response = JsonResponse(self._upload_state(upload))
+        response["Upload-Offset"] = upload.offset
+        response["Upload-Length"] = upload.total_size
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @action(detail=True, methods=["patch", "post"])
+    @method_decorator(csrf_exempt)
+    def upload_chunk(self, request, upload_id=None):
+        """
+        Append a chunk to a resumable upload
+
+        The request body is the raw chunk. Upload-Offset must match the current offset;
+        Upload-Checksum ("sha256 <base64 digest>") is verified if present. When the last
+        chunk arrives, the input is created and its processing is started.
+        """
+        if request.method not in ("PATCH", "POST"):
+            return HttpResponseNotAllowed(["PATCH", "POST"])
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Nicht angemeldet"}, status=401)
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return JsonResponse({"error": "Upload-Offset fehlt"}, status=400)
+
+        chunk_checksum = None
+        if request.headers.get("Upload-Checksum"):
+            algorithm, _, chunk_checksum = request.headers["Upload-Checksum"].partition(" ")
+            if algorithm.lower() != "sha256":
+                return JsonResponse({"error": "Nur sha256-Prüfsummen werden unterstützt"}, status=400)
+
+        service = ResumableUploadService()
+        try:
+            upload, created_input = service.append_chunk(
+                upload_id, request.user, offset, request, chunk_checksum
+            )
+        except UploadSession.DoesNotExist:
+            return JsonResponse({"error": "Upload nicht gefunden oder abgelaufen"}, status=404)
+        except UploadOffsetMismatch as e:
+            response = JsonResponse({"error": str(e), "offset": e.expected_offset}, status=409)
+            response["Upload-Offset"] = e.expected_offset
+            return response
+        except UploadChecksumMismatch as e:
+            return JsonResponse({"error": str(e)}, status=460)
+        except UploadChunkInProgress as e:
+            # Retried by the client after a pause, like other temporary failures
+            response = JsonResponse({"error": str(e)}, status=503)
+            response["Retry-After"] = 5
+            return response
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=413)
+        except Exception as e:
+            logger.error(f"Error processing upload chunk for {upload_id}: {str(e)}")
+            return JsonResponse({"error": f"Fehler beim Hochladen: {str(e)}"}, status=500)
+
+        if created_input is not None:
+            if upload.input_kind == UploadSession.InputKind.AUDIO:
+                process_audio_transcription_task.delay(
+                    created_input.id, therapeutic_observations=upload.therapeutic_observations
+                )
+            else:
+                process_document_extraction_task.delay(created_input.id)
+
+        response = JsonResponse(self._upload_state(upload))
+        response["Upload-Offset"] = upload.offset
+        return response
+
+    def _upload_state(self, upload: UploadSession) -> dict:
+        return {
+            "upload_id": str(upload.pk),
+            "offset": upload.offset,
+            "size": upload.total_size,
+            "complete": upload.is_complete,
+            "input_id": upload.input_id,
+            "chunk_size": settings.UPLOAD_CHUNK_MAX_BYTES,
+            "url": self._upload_url(upload),
+            "chunk_url": reverse("core:upload_chunk", kwargs={"upload_id": upload.pk}),
+        }
+
+    def _upload_url(self, upload: UploadSession) -> str:
+        return reverse("core:upload_status", kwargs={"upload_id": upload.pk})
+
+
+def documents_list_etag(request, *args, **kwargs):
+    """The list shows the user's documents and recent bulk exports"""
+    if not request.user.is_authenticated:
+        return None
+    export_jobs = BulkExportJob.objects.filter(user=request.user).aggregate(
+        count=Count("pk"), updated_at=Max("updated_at")
+    )
+    return page_etag(
+        request,
+        BaseDocument.get_list_cache_version(request.user.pk),
+        export_jobs["count"],
+        export_jobs["updated_at"],
+    )
+
 
 class DocumentsListView(LoginRequiredMixin, TemplateView):
     template_name = "core/documents_list.html"
     
+    @method_decorator(conditional_page(documents_list_etag))
     def get(self, request, *args, **kwargs):
         # Get all reports and sessions for the user
         reports = Report.objects.filter(user=request.user).order_by("-created_at")
@@ -188,22 +354,123 @@ class DocumentsListView(LoginRequiredMixin, TemplateView):
             sessions = sessions.filter(Q(title__icontains=search_query))
         
         # Combine and sort by created_at
-        all_documents = sorted(
-            chain(reports, sessions), key=lambda doc: doc.created_at, reverse=True
+        all_documents = SimpleLazyObject(
+            lambda: sorted(chain(reports, sessions), key=lambda doc: doc.created_at, reverse=True)
         )
-        
-        # Create unified table
-        table = BaseDocumentTable(all_documents)
-        RequestConfig(request, paginate={"per_page": 25}).configure(table)
-        
+
+        def create_table():
+            table = BaseDocumentTable(list(all_documents))
+            RequestConfig(request, paginate={"per_page": 25}).configure(table)
+            return table
+
+        # The table and counts are only evaluated if their cached fragments miss
         return render(
             request,
             self.template_name,
             {
-                "documents_table": table,
+                "documents_table": SimpleLazyObject(create_table),
+                "documents_cache_version": BaseDocument.get_list_cache_version(request.user.pk),
                 "search_query": search_query,
-                "total_count": len(all_documents),
-                "reports_count": reports.count(),
-                "sessions_count": sessions.count(),
+                "total_count": SimpleLazyObject(lambda: len(all_documents)),
+                "reports_count": SimpleLazyObject(reports.count),
+                "sessions_count": SimpleLazyObject(sessions.count),
+                "export_form": BulkExportForm(initial={"search": search_query}),
+                **BulkExportJobsView.get_jobs_context(request.user),
             },
-        ) 
\ No newline at end of file
+        )
+
+
+class BulkExportCreateView(LoginRequiredMixin, View):
+    """Start a bulk export of the user's documents in the background"""
+
+    def post(self, request, *args, **kwargs):
+        form = BulkExportForm(request.POST)
+        if not form.is_valid():
+            for error in form.non_field_errors():
+                messages.error(request, error)
+            return redirect("core:documents_list")
+
+        job = BulkExportService().create_job(request.user, **form.cleaned_data)
+        bulk_export_task.delay(job.id)
+        messages.success(
+            request, "Der Export wird erstellt. Du wirst per E-Mail benachrichtigt, sobald er bereit ist."
+        )
+        return redirect("core:documents_list")
+
+
+class BulkExportJobsView(LoginRequiredMixin, View):
+    """HTMX partial listing the user's recent bulk exports"""
+
+    @staticmethod
+    def get_jobs_context(user) -> dict:
+        export_jobs = list(BulkExportJob.objects.filter(user=user)[:5])
+        return {
+            "export_jobs": export_jobs,
+            "exports_running": any(not job.is_finished for job in export_jobs),
+        }
+
+    def get(self, request, *args, **kwargs):
+        return render(
+            request, "partials/bulk_export_jobs.html", self.get_jobs_context(request.user)
+        )
+
+
+class AudioFileView(LoginRequiredMixin, View):
+    """
+    Redirect to the file of an audio input
+
+    Pages (and cached fragments) link here instead of the storage URL, which with
+    remote storage is signed and expires.
+    """
+
+    def get(self, request, pk, *args, **kwargs):
+        audio_input = get_object_or_404(AudioInput, pk=pk)
+        document = audio_input.document
+        if not hasattr(document, "user") or document.user != request.user:
+            raise Http404("Audio input not found")
+        return redirect(audio_input.audio_file.url)
+
+
+class BulkExportDownloadView(LoginRequiredMixin, View):
+    """Download the result of a finished bulk export"""
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(
+            BulkExportJob, pk=pk, user=request.user, status=BulkExportJob.Status.COMPLETED
+        )
+        if not job.result_file:
+            raise Http404("Export not found")
+
+        return FileResponse(
+            job.result_file.open("rb"),
+            as_attachment=True,
+            filename=job.result_file.name.rsplit("/", 1)[-1],
+        )
+
+
+class CacheStatsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """Hit ratios of the cached fragments and lookups (staff only)"""
+
+    template_name = "core/cache_stats.html"
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        cache_settings = settings.CACHES["default"]
+        context.update(
+            {
+                "cache_stats": cache_utils.get_stats(),
+                "server_info": cache_utils.get_server_info(),
+                "cache_backend": cache_settings["BACKEND"].rsplit(".", 1)[-1],
+                "cache_version": cache_settings.get("VERSION", 1),
+                "sample_rate": settings.CACHE_STATS_SAMPLE_RATE,
+            }
+        )
+        return context
+
+    def post(self, request, *args, **kwargs):
+        cache_utils.reset_stats()
+        messages.success(request, "Die Cache-Statistik wurde zurückgesetzt.")
+        return redirect("core:cache_stats")
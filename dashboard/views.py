@@ -1,26 +1,45 @@
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from django_tables2 import RequestConfig
 from itertools import chain
 from reports.models import Report
 from therapy_sessions.models import Session
+from core.models import BaseDocument
 from core.tables import BaseDocumentTable
+from core.utils.conditional import conditional_page, page_etag
 
 
+def dashboard_etag(request, *args, **kwargs):
+    """The dashboard shows the user's recent documents"""
+    if not request.user.is_authenticated:
+        return None
+    return page_etag(request, BaseDocument.get_list_cache_version(request.user.pk))
+
+
+@method_decorator(conditional_page(dashboard_etag), name="get")
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "dashboard/dashboard.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        recent_reports = Report.objects.filter(user=self.request.user).order_by("-created_at")[:8]
-        recent_sessions = Session.objects.filter(user=self.request.user).order_by("-created_at")[:8]
-        recent_documents = sorted(
-            chain(recent_reports, recent_sessions), key=lambda doc: doc.created_at, reverse=True
-        )[:8]
+        def create_table():
+            recent_reports = Report.objects.filter(user=self.request.user).order_by("-created_at")[:8]
+            recent_sessions = Session.objects.filter(user=self.request.user).order_by("-created_at")[:8]
+            recent_documents = sorted(
+                chain(recent_reports, recent_sessions), key=lambda doc: doc.created_at, reverse=True
+            )[:8]
+
+            table = BaseDocumentTable(recent_documents)
+            RequestConfig(self.request, paginate=False).configure(table)
+            return table
 
-        table = BaseDocumentTable(recent_documents)
-        RequestConfig(self.request, paginate=False).configure(table)
-        context["recent_documents_table"] = table
+        # Only evaluated if the cached table fragment misses
+        context["recent_documents_table"] = SimpleLazyObject(create_table)
+        context["documents_cache_version"] = BaseDocument.get_list_cache_version(
+            self.request.user.pk
+        )
 
         return context
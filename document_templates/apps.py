@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DocumentTemplatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'document_templates'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from django.db.models import Q
 
+from core.utils.sections import Section, split_sections
+
 
 class DocumentTemplateQuerySet(models.QuerySet):
     """Custom queryset for DocumentTemplate with filtering methods"""
@@ -121,6 +123,11 @@ class DocumentTemplate(models.Model):
     def is_custom(self):
         return not self.is_predefined
 
+    @property
+    def sections(self) -> list[Section]:
+        """Sections declared by the structure (headings in user_prompt) with their instructions"""
+        return split_sections(self.user_prompt)[1]
+
 
 class UserTemplatePreference(models.Model):
     """User preferences for default templates"""
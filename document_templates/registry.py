@@ -0,0 +1,176 @@
+"""
+Cached template lookups
+
+Predefined templates are cached in each process, the templates and preferences of a
+user in the shared Django cache. Both are keyed by version tokens kept in the shared
+cache (core.utils.cache), which are replaced whenever a template or preference
+changes (see signals.py), so a lookup needs one cache round trip and no database
+query while nothing changed.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.utils.cache import bump_version, get_versions, record_access
+
+from .models import DocumentTemplate, UserTemplatePreference
+
+GLOBAL_VERSION = "document_templates:global"
+USER_VERSION = "document_templates:user:{user_id}"
+USER_TEMPLATES_KEY = "document_templates:user:{user_id}:{global_version}:{user_version}"
+
+# Preference fields per template type (get_default_template)
+_PREFERENCE_FIELDS = {
+    "document": "default_document_templates",
+    "session_notes": "default_session_templates",
+}
+
+_predefined_lock = threading.Lock()
+_predefined = {"version": None, "templates": {}}
+
+
+def invalidate_predefined_templates():
+    """Invalidate the predefined templates in all processes and all user caches"""
+    bump_version(GLOBAL_VERSION)
+
+
+def invalidate_user_templates(user_id: int):
+    """Invalidate the cached templates and preferences of a user"""
+    bump_version(USER_VERSION.format(user_id=user_id))
+
+
+def _get_versions(user_id: Optional[int]) -> tuple[str, Optional[str]]:
+    """Read (and create if missing) the global and the user's version token"""
+    if not user_id:
+        return get_versions(GLOBAL_VERSION)[GLOBAL_VERSION], None
+
+    user_version = USER_VERSION.format(user_id=user_id)
+    versions = get_versions(GLOBAL_VERSION, user_version)
+    return versions[GLOBAL_VERSION], versions[user_version]
+
+
+def get_cache_version(user=None) -> str:
+    """Token that changes whenever a template or preference visible to the user changes"""
+    global_version, user_version = _get_versions(user.pk if user else None)
+    return f"{global_version}:{user_version}"
+
+
+def _group_by_type(templates) -> dict[str, list[DocumentTemplate]]:
+    grouped = defaultdict(list)
+    for template in templates:
+        grouped[template.template_type].append(template)
+    return dict(grouped)
+
+
+def _predefined_templates(global_version: str) -> dict[str, list[DocumentTemplate]]:
+    """Active predefined templates grouped by type, cached in this process"""
+    if _predefined["version"] == global_version:
+        return _predefined["templates"]
+
+    with _predefined_lock:
+        if _predefined["version"] != global_version:
+            templates = DocumentTemplate.objects.filter(is_predefined=True, is_active=True)
+            _predefined["templates"] = _group_by_type(templates)
+            _predefined["version"] = global_version
+        return _predefined["templates"]
+
+
+def _user_entry(user_id: int, global_version: str, user_version: str) -> dict:
+    """The user's active custom templates (grouped by type) and default preferences"""
+    key = USER_TEMPLATES_KEY.format(
+        user_id=user_id, global_version=global_version, user_version=user_version
+    )
+    entry = cache.get(key)
+    record_access("document_templates", hit=entry is not None)
+    if entry is None:
+        templates = DocumentTemplate.objects.filter(
+            user_id=user_id, is_predefined=False, is_active=True
+        )
+        preference = UserTemplatePreference.objects.filter(user_id=user_id).first()
+        entry = {
+            "templates": _group_by_type(templates),
+            "preferences": {
+                template_type: getattr(preference, field, {}) if preference else {}
+                for template_type, field in _PREFERENCE_FIELDS.items()
+            },
+        }
+        cache.set(key, entry, settings.TEMPLATE_CACHE_TIMEOUT)
+    return entry
+
+
+def _resolve(user) -> tuple[dict[str, list[DocumentTemplate]], dict]:
+    """Templates available to the user grouped by type, and the user's preferences"""
+    user_id = user.pk if user else None
+    global_version, user_version = _get_versions(user_id)
+    grouped = {
+        template_type: list(templates)
+        for template_type, templates in _predefined_templates(global_version).items()
+    }
+    if not user_id:
+        return grouped, {}
+
+    entry = _user_entry(user_id, global_version, user_version)
+    for template_type, templates in entry["templates"].items():
+        grouped.setdefault(template_type, []).extend(templates)
+    for templates in grouped.values():
+        templates.sort(key=lambda template: template.name)
+    return grouped, entry["preferences"]
+
+
+def get_templates_for_user(user=None) -> dict[str, list[DocumentTemplate]]:
+    """
+    Get all templates available to a user, grouped by template type
+
+    Args:
+        user: User object; without a user only predefined templates are returned
+
+    Returns:
+        Mapping of template type to templates sorted by name
+    """
+    return _resolve(user)[0]
+
+
+def get_templates(template_type: str, user=None) -> list[DocumentTemplate]:
+    """Get the templates of one type available to a user"""
+    return get_templates_for_user(user).get(template_type, [])
+
+
+def get_template(template_id: int, template_type: str, user=None) -> DocumentTemplate:
+    """
+    Get a template by id if it is active and accessible to the user
+
+    Cached counterpart of DocumentTemplate.objects.get_template.
+
+    Raises:
+        DocumentTemplate.DoesNotExist: If template not found or access denied
+    """
+    for template in get_templates(template_type, user):
+        if template.pk == template_id:
+            return template
+    raise DocumentTemplate.DoesNotExist("Template not found or access denied")
+
+
+def get_default_template(template_type: str, user=None) -> Optional[DocumentTemplate]:
+    """
+    Get the user's preferred template of a type, or the first predefined one
+
+    Returns:
+        DocumentTemplate or None if no template of the type exists
+    """
+    templates, preferences = _resolve(user)
+
+    template_id = preferences.get(template_type, {}).get("default")
+    if template_id:
+        for available in templates.values():
+            for template in available:
+                if template.pk == template_id:
+                    return template
+
+    predefined = [
+        template for template in templates.get(template_type, []) if template.is_predefined
+    ]
+    return predefined[0] if predefined else None
@@ -1,5 +1,6 @@
 from typing import Dict, Any, List
 from core.ai_connectors import get_llm_connector
+from . import registry
 from .models import DocumentTemplate
 
 
@@ -23,22 +24,18 @@ class TemplateService:
         Returns:
             List of available templates
         """
-        # Get predefined templates
-        predefined_templates = DocumentTemplate.objects.filter(
-            template_type=template_type, is_predefined=True, is_active=True
-        )
+        return registry.get_templates(template_type, user)
 
-        if user:
-            from django.db.models import Q
-            all_templates = DocumentTemplate.objects.filter(
-                template_type=template_type,
-                is_active=True
-            ).filter(
-                Q(is_predefined=True) | Q(user=user)
-            )
-            return list(all_templates)
+    def get_templates_for_user(self, user=None) -> Dict[str, List[DocumentTemplate]]:
+        """
+        Get all templates available to a user, grouped by template type
 
-        return list(predefined_templates)
+        Args:
+            user: User object
+        Returns:
+            Mapping of template type to templates
+        """
+        return registry.get_templates_for_user(user)
 
     def get_document_templates(self, user=None) -> List[DocumentTemplate]:
         """Get document templates"""
@@ -117,40 +114,4 @@ class TemplateService:
         Returns:
             Default template
         """
-        if user:
-            try:
-                from .models import UserTemplatePreference
-                preferences = UserTemplatePreference.objects.get(user=user)
-                if template_type == 'document':
-                    template_id = preferences.default_document_templates.get('default')
-                    if template_id:
-                        from django.db.models import Q
-                        template = DocumentTemplate.objects.filter(
-                            id=template_id,
-                            is_active=True
-                        ).filter(
-                            Q(is_predefined=True) | Q(user=user)
-                        ).first()
-                        if template:
-                            return template
-                elif template_type == 'session_notes':
-                    template_id = preferences.default_session_templates.get('default')
-                    if template_id:
-                        from django.db.models import Q
-                        template = DocumentTemplate.objects.filter(
-                            id=template_id,
-                            is_active=True
-                        ).filter(
-                            Q(is_predefined=True) | Q(user=user)
-                        ).first()
-                        if template:
-                            return template
-            except (UserTemplatePreference.DoesNotExist, DocumentTemplate.DoesNotExist):
-                pass
-
-        # Fall back to first predefined template
-        return DocumentTemplate.objects.filter(
-            template_type=template_type,
-            is_predefined=True,
-            is_active=True,
-        ).first()
+        return registry.get_default_template(template_type, user)
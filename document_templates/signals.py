@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import DocumentTemplate, UserTemplatePreference
+from .registry import invalidate_predefined_templates, invalidate_user_templates
+
+
+@receiver([post_save, post_delete], sender=DocumentTemplate)
+def invalidate_template_cache(sender, instance, **kwargs):
+    """Invalidate cached templates after a template was created, cloned, changed or deleted"""
+    if instance.is_predefined or not instance.user_id:
+        transaction.on_commit(invalidate_predefined_templates)
+    else:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_user_templates(user_id))
+
+
+@receiver([post_save, post_delete], sender=UserTemplatePreference)
+def invalidate_preference_cache(sender, instance, **kwargs):
+    """Invalidate the cached default templates of the user"""
+    if instance.user_id:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_user_templates(user_id))
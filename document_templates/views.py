@@ -3,11 +3,13 @@ from django.contrib import messages
 from django.urls import reverse_lazy
 from django.http import HttpResponse
 from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django_tables2 import RequestConfig
 
+from . import registry as template_registry
 from .models import DocumentTemplate
 from .service import TemplateService
 
@@ -48,14 +50,18 @@ class TemplateViewSet(viewsets.ViewSet):
             )
 
         # Create table with proper ordering
-        table = TemplateTable(templates)
-        RequestConfig(request, paginate={"per_page": 20}).configure(table)
+        def create_table():
+            table = TemplateTable(templates)
+            RequestConfig(request, paginate={"per_page": 20}).configure(table)
+            return table
 
+        # The table is only evaluated if its cached fragment misses
         return render(
             request,
             "document_templates/template_list.html",
             {
-                "templates_table": table,
+                "templates_table": SimpleLazyObject(create_table),
+                "templates_cache_version": template_registry.get_cache_version(request.user),
                 "template_type": template_type,
                 "search_query": search_query,
             },
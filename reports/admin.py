@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Report
+from .models import DeferredGeneration, Report
 
 
 @admin.register(Report)
@@ -26,3 +26,10 @@ class ReportAdmin(admin.ModelAdmin):
         return obj.all_inputs["total_count"]
 
     input_count.short_description = "Anzahl Eingaben"
+
+
+@admin.register(DeferredGeneration)
+class DeferredGenerationAdmin(admin.ModelAdmin):
+    list_display = ["report", "status", "batch_id", "created_at", "completed_at"]
+    list_filter = ["status"]
+    readonly_fields = [field.name for field in DeferredGeneration._meta.fields]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_report_is_generating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
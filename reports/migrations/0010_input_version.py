@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='input_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
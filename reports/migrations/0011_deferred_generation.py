@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:59
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_input_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeferredGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_id', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Wartend'), ('submitted', 'Eingereicht'), ('completed', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=20)),
+                ('custom_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('batch_id', models.CharField(blank=True, db_index=True, max_length=200)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deferred_generations', to='reports.report')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Aufgeschobene Generierung',
+                'verbose_name_plural': 'Aufgeschobene Generierungen',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reports_def_status_3a5cf9_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,8 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
 from core.models import BaseDocument
 
 
@@ -19,3 +24,55 @@ class Report(BaseDocument):
     def context_files_count(self):
         """Get count of all inputs (backward compatibility)"""
         return self.all_inputs["total_count"]
+
+    @property
+    def deferred_generation(self):
+        """The generation waiting for the provider's batch, if any"""
+        return self.deferred_generations.filter(
+            status__in=DeferredGeneration.OPEN_STATUSES
+        ).first()
+
+
+class DeferredGeneration(models.Model):
+    """
+    Report generation sent to the LLM provider's batch API instead of generated right
+    away (cheaper, completed within the batch window)
+
+    Pending generations are submitted together by the periodic collector, which also
+    polls submitted batches and writes their results to the reports.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Wartend"
+        SUBMITTED = "submitted", "Eingereicht"
+        COMPLETED = "completed", "Fertig"
+        FAILED = "failed", "Fehlgeschlagen"
+
+    OPEN_STATUSES = (Status.PENDING, Status.SUBMITTED)
+
+    report = models.ForeignKey(
+        Report, on_delete=models.CASCADE, related_name="deferred_generations"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True
+    )
+    template_id = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+
+    # Request ID within the batch and the batch it was submitted with
+    custom_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    batch_id = models.CharField(max_length=200, blank=True, db_index=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Aufgeschobene Generierung"
+        verbose_name_plural = "Aufgeschobene Generierungen"
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.report} ({self.get_status_display()})"
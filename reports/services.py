@@ -1,12 +1,19 @@
+from datetime import timedelta
 from typing import Dict, Any, Optional
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from core.ai_connectors import get_llm_connector
-from core.ai_connectors.base.llm import LLMGenerationParams
+from core.ai_connectors.base.llm import LLMBatch, LLMBatchRequest, LLMGenerationParams
 from core.utils.ai_helpers import build_gender_context
-from core.services import UnifiedInputService
+from core.utils.db import db_idle
+from core.utils.prompt_assembly import AssembledPrompt, PromptBuilder, RESPONSE_FORMAT_INSTRUCTIONS
+from core.services import SectionGenerationService, UnifiedInputService
 from document_templates.models import DocumentTemplate
+from document_templates import registry as template_registry
 from document_templates.service import TemplateService
-from .models import Report
+from .models import DeferredGeneration, Report
 from .prompts import REPORT_SYSTEM_PROMPT
 import logging
 
@@ -20,6 +27,9 @@ class ReportService:
         self.llm_connector = get_llm_connector()
         self.template_service = TemplateService()
         self.unified_input_service = UnifiedInputService()
+        self.section_service = SectionGenerationService(
+            self.llm_connector, self.unified_input_service
+        )
 
     def is_available(self) -> bool:
         """Check if the report service is available"""
@@ -29,51 +39,60 @@ class ReportService:
         """Reinitialize the connector (useful after settings change)"""
         self.llm_connector.reinitialize()
 
-    def _build_context_prefix(self, report: Report) -> str:
+    def _build_prompt(self, report: Report, template: DocumentTemplate) -> AssembledPrompt:
         """
-        Build the context prefix from unified inputs
+        Build the prompt from the template and unified inputs
+
+        Static template instructions come first and the report specific context last,
+        so the shared prefix can be served from the provider's prompt cache.
 
         Args:
-            report: The report to build context for
+            report: The report to build the prompt for
+            template: The template to use
 
         Returns:
-            Formatted context prefix
+            Assembled system and user prompt
         """
-        # Use unified input service to get combined text
-        combined_text = self.unified_input_service.get_combined_text(report)
-
-        # Start building the context prefix
-        context_prefix = """Erstelle einen professionellen Bericht für eine Psychotherapie.
-
-Antworte in HTML-Format mit folgenden erlaubten Tags: <p>, <strong>, <ul>, <ol>, <li>
-
-"""
+        builder = PromptBuilder(REPORT_SYSTEM_PROMPT)
+        builder.add_instructions(
+            "Erstelle einen professionellen Bericht für eine Psychotherapie.", heading="AUFGABE"
+        )
+        builder.add_instructions(
+            template.general_instructions,
+            heading="ALLGEMEINE ANWEISUNGEN FÜR DIE ERSTELLUNG DES BERICHTS",
+        )
+        builder.add_instructions(
+            template.user_prompt, heading="STRUKTUR FÜR DIE ERSTELLUNG DES BERICHTS"
+        )
+        builder.add_instructions(RESPONSE_FORMAT_INSTRUCTIONS, heading="ANTWORTFORMAT")
 
         # Add patient gender context if provided
-        gender_context = build_gender_context(report.patient_gender)
-        if gender_context:
-            context_prefix += gender_context
+        builder.add_context(build_gender_context(report.patient_gender))
 
+        # Use unified input service to get combined text
+        combined_text = self.unified_input_service.get_combined_text(report)
         if not combined_text.strip():
-            context_prefix += """**HINWEIS:** Keine Kontextdateien verfügbar. Erstelle einen generischen Bericht basierend auf der Vorlage.
-
-"""
-            return context_prefix
-
-        # Format combined input text
-        context_prefix += f"""**KONTEXT-INFORMATIONEN**
-
-{combined_text}
+            builder.add_context(
+                "Keine Kontextdateien verfügbar. Erstelle einen generischen Bericht basierend auf der Vorlage.",
+                heading="HINWEIS:",
+            )
+            return builder.build()
 
-Verwende diese Informationen aus den Eingaben, um einen strukturierten und professionellen Bericht zu erstellen.
+        builder.add_context(
+            f"""{combined_text}
 
-"""
-        return context_prefix
+Verwende diese Informationen aus den Eingaben, um einen strukturierten und professionellen Bericht zu erstellen.""",
+            heading="KONTEXT-INFORMATIONEN",
+        )
+        return builder.build()
 
     def generate_with_template(self, report: Report, template: DocumentTemplate) -> str:
         """
         Generate a report using a specific template
 
+        If the report's sections were generated with the template, only the sections
+        affected by input changes since are regenerated.
+
         Args:
             report: The report to generate content for
             template: The template to use
@@ -85,23 +104,35 @@ Verwende diese Informationen aus den Eingaben, um einen strukturierten und profe
             raise ValueError("LLM connector ist nicht verfügbar")
 
         try:
-            context_prefix = self._build_context_prefix(report)
+            prompt = self._build_prompt(report, template)
 
-            # Combine context prefix with template structure
-            full_prompt = context_prefix + template.user_prompt
+            if self.section_service.is_split(template):
+                content = None
+                if report.content.strip():
+                    content = self.section_service.update(report, template, prompt)
+                if content is None:
+                    content = self.section_service.generate(report, template, prompt)
+                return content
 
             # Generate the document using LLM connector
             params = LLMGenerationParams(
                 max_tokens=template.max_tokens,
                 temperature=template.temperature,
+                latency_key="report",
             )
 
-            result = self.llm_connector.generate_text(
-                system_prompt=REPORT_SYSTEM_PROMPT,
-                user_prompt=full_prompt,
-                params=params,
+            with db_idle():
+                result = self.llm_connector.generate_text(
+                    system_prompt=prompt.system_prompt,
+                    user_prompt=prompt.user_prompt,
+                    params=params,
+                )
+            logger.info(
+                f"Report content for Report {report.pk} generated: "
+                f"{result.cached_tokens or 0}/{result.prompt_tokens or 0} prompt tokens from cache"
             )
 
+            self.section_service.clear(report)
             return result.text
 
         except Exception as e:
@@ -146,7 +177,7 @@ Verwende diese Informationen aus den Eingaben, um einen strukturierten und profe
                         f"User with id {user_id} not found, proceeding without user context"
                     )
 
-            template = DocumentTemplate.objects.get_template(
+            template = template_registry.get_template(
                 int(template_id), DocumentTemplate.TemplateType.REPORT, user=user
             )
             generated_content = self.generate_with_template(report, template)
@@ -166,6 +197,62 @@ Verwende diese Informationen aus den Eingaben, um einen strukturierten und profe
             report.mark_as_failed()
             return {"success": False, "error": str(exc)}
 
+    def regenerate_section(self, report_id: int, position: int, user_id: Optional[int] = None):
+        """
+        Generate one separately generated section of a report again, for background tasks
+
+        Args:
+            report_id: ID of the Report instance
+            position: Position of the section in the template
+            user_id: ID of the user for template access validation
+
+        Returns:
+            Task result dictionary
+        """
+        try:
+            report = Report.objects.get(id=report_id)
+        except Report.DoesNotExist:
+            logger.error(f"Report with id {report_id} not found")
+            return {"success": False, "error": "Report not found"}
+
+        report.mark_as_generating()
+
+        try:
+            generated_section = report.generated_sections.filter(position=position).first()
+            if generated_section is None:
+                raise ValueError("Abschnitt nicht gefunden")
+
+            user = get_user_model().objects.filter(id=user_id).first() if user_id else None
+            template = template_registry.get_template(
+                generated_section.template_id, DocumentTemplate.TemplateType.REPORT, user=user
+            )
+            if not self.is_available():
+                raise ValueError("LLM connector ist nicht verfügbar")
+
+            prompt = self._build_prompt(report, template)
+            report.content = self.section_service.regenerate(report, template, position, prompt)
+            report.mark_as_success()
+
+            logger.info(f"Section {position} of Report {report_id} regenerated")
+            return {"success": True, "report_id": report_id, "position": position}
+
+        except Exception as exc:
+            logger.error(f"Error regenerating section {position} of Report {report_id}: {str(exc)}")
+            report.mark_as_failed()
+            return {"success": False, "error": str(exc)}
+
+    def defer(self, report: Report, template_id: int, user=None) -> DeferredGeneration:
+        """
+        Queue a report generation for the provider's batch API (see
+        DeferredGenerationService); the report counts as generating until it is done
+
+        Raises:
+            DocumentTemplate.DoesNotExist: If the template is not accessible to the user
+        """
+        template_registry.get_template(int(template_id), DocumentTemplate.TemplateType.REPORT, user=user)
+        report.mark_as_generating()
+        return DeferredGeneration.objects.create(report=report, user=user, template_id=template_id)
+
     def get_context_summary(self, report: Report) -> Dict[str, Any]:
         """
         Get a summary of unified inputs for a report
@@ -193,4 +280,165 @@ Verwende diese Informationen aus den Eingaben, um einen strukturierten und profe
             ),
         }
 
-        return summary
\ No newline at end of file
+        return summary
+
+
+class DeferredGenerationService:
+    """Submits deferred report generations as batches and writes back their results"""
+
+    def __init__(self):
+        self.report_service = ReportService()
+        self.llm_connector = self.report_service.llm_connector
+
+    def submit_pending(self) -> int:
+        """
+        Submit all pending generations in one batch
+
+        The generations are claimed first (marked as submitted without batch ID), so
+        overlapping runs never submit the same generation twice. If the submission
+        fails, they are pending again for the next run.
+
+        Returns:
+            Number of submitted generations
+        """
+        with transaction.atomic():
+            claimed = list(
+                DeferredGeneration.objects.select_for_update(skip_locked=True)
+                .filter(status=DeferredGeneration.Status.PENDING)
+                .values_list("pk", flat=True)
+            )
+            DeferredGeneration.objects.filter(pk__in=claimed).update(
+                status=DeferredGeneration.Status.SUBMITTED,
+                batch_id="",
+                submitted_at=timezone.now(),
+            )
+        generations = DeferredGeneration.objects.filter(pk__in=claimed).select_related(
+            "report", "user"
+        )
+
+        requests, submitted = [], []
+        for generation in generations:
+            try:
+                template = template_registry.get_template(
+                    generation.template_id, DocumentTemplate.TemplateType.REPORT, user=generation.user
+                )
+                prompt = self.report_service._build_prompt(generation.report, template)
+            except Exception as e:
+                self._fail(generation, f"Template nicht gefunden: {str(e)}")
+                continue
+
+            requests.append(
+                LLMBatchRequest(
+                    custom_id=str(generation.custom_id),
+                    system_prompt=prompt.system_prompt,
+                    user_prompt=prompt.user_prompt,
+                    params=LLMGenerationParams(
+                        max_tokens=template.max_tokens, temperature=template.temperature
+                    ),
+                )
+            )
+            submitted.append(generation.pk)
+
+        if not requests:
+            return 0
+
+        try:
+            with db_idle():
+                batch_id = self.llm_connector.submit_batch(requests)
+        except Exception:
+            DeferredGeneration.objects.filter(pk__in=submitted).update(
+                status=DeferredGeneration.Status.PENDING, submitted_at=None
+            )
+            raise
+        DeferredGeneration.objects.filter(pk__in=submitted).update(
+            batch_id=batch_id, submitted_at=timezone.now()
+        )
+        logger.info(f"Submitted {len(submitted)} deferred report generations as batch {batch_id}")
+        return len(submitted)
+
+    def collect(self) -> int:
+        """
+        Poll submitted batches and write the results of finished ones to their reports
+
+        Generations still open after LLM_BATCH_MAX_HOURS are marked as failed, also
+        when their batch cannot be read (e.g. deleted, or stored on another host).
+
+        Returns:
+            Number of finished generations
+        """
+        batch_ids = (
+            DeferredGeneration.objects.filter(status=DeferredGeneration.Status.SUBMITTED)
+            .values_list("batch_id", flat=True)
+            .distinct()
+        )
+
+        finished = 0
+        for batch_id in list(batch_ids):
+            generations = DeferredGeneration.objects.filter(
+                batch_id=batch_id, status=DeferredGeneration.Status.SUBMITTED
+            ).select_related("report")
+            if not batch_id:
+                # Claimed by a submission that is still running (or crashed)
+                finished += self._fail_expired(generations, "Batch wurde nicht eingereicht")
+                continue
+
+            try:
+                with db_idle():
+                    batch = self.llm_connector.get_batch(batch_id)
+            except Exception as e:
+                logger.error(f"Could not poll batch {batch_id}: {str(e)}")
+                finished += self._fail_expired(generations, "Batch konnte nicht abgerufen werden")
+                continue
+
+            if batch.status == LLMBatch.PENDING:
+                finished += self._fail_expired(
+                    generations, "Batch wurde nicht rechtzeitig abgeschlossen"
+                )
+                if not generations.exists():
+                    self._delete_batch(batch_id)
+                continue
+
+            for generation in generations:
+                custom_id = str(generation.custom_id)
+                if custom_id in batch.results:
+                    self._complete(generation, batch.results[custom_id].text)
+                else:
+                    self._fail(generation, batch.errors.get(custom_id, "Keine Antwort im Batch"))
+                finished += 1
+            self._delete_batch(batch_id)
+
+        return finished
+
+    def _fail_expired(self, generations, error: str) -> int:
+        """Fail the generations submitted more than LLM_BATCH_MAX_HOURS ago"""
+        deadline = timezone.now() - timedelta(hours=settings.LLM_BATCH_MAX_HOURS)
+        expired = list(generations.filter(submitted_at__lt=deadline))
+        for generation in expired:
+            self._fail(generation, error)
+        return len(expired)
+
+    def _delete_batch(self, batch_id: str):
+        """Delete the batch's stored prompts and results once they are no longer needed"""
+        try:
+            with db_idle():
+                self.llm_connector.delete_batch(batch_id)
+        except Exception as e:
+            logger.warning(f"Could not delete batch {batch_id}: {str(e)}")
+
+    def _complete(self, generation: DeferredGeneration, content: str):
+        report = generation.report
+        report.content = content
+        report.mark_as_success()
+        self.report_service.section_service.clear(report)
+        generation.status = DeferredGeneration.Status.COMPLETED
+        generation.completed_at = timezone.now()
+        generation.save(update_fields=["status", "completed_at"])
+        logger.info(f"Deferred generation of Report {report.pk} completed")
+
+    def _fail(self, generation: DeferredGeneration, error: str):
+        logger.error(f"Deferred generation of Report {generation.report_id} failed: {error}")
+        generation.report.mark_as_failed()
+        generation.status = DeferredGeneration.Status.FAILED
+        generation.error = error
+        generation.completed_at = timezone.now()
+        generation.save(update_fields=["status", "error", "completed_at"])
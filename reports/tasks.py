@@ -1,5 +1,8 @@
+import logging
 from celery import shared_task
-from .services import ReportService
+from .services import DeferredGenerationService, ReportService
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -14,3 +17,31 @@ def generate_report_content_task(self, report_id, template_id, user_id=None):
     """
     service = ReportService()
     return service.generate(report_id, template_id, user_id)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def regenerate_report_section_task(self, report_id, position, user_id=None):
+    """
+    Celery task to regenerate one section of a report in the background
+
+    Args:
+        report_id: ID of the Report instance
+        position: Position of the section in the template
+        user_id: ID of the user (for template access validation)
+    """
+    service = ReportService()
+    return service.regenerate_section(report_id, position, user_id)
+
+
+@shared_task
+def process_deferred_generations_task():
+    """Periodic Celery task submitting deferred report generations and collecting batches"""
+    service = DeferredGenerationService()
+    try:
+        submitted = service.submit_pending()
+    except Exception as e:
+        # The generations stay pending and are submitted with the next run
+        logger.error(f"Submitting deferred generations failed: {str(e)}")
+        submitted = 0
+    finished = service.collect()
+    return {"success": True, "submitted": submitted, "finished": finished}
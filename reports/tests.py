@@ -1,2 +1,106 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.ai_connectors.base.exceptions import LLMError
+from core.ai_connectors.base.llm import GenericLLMConnector, LLMResult
+from document_templates.models import DocumentTemplate
+from .models import DeferredGeneration, Report
+from .services import DeferredGenerationService, ReportService
+
+
+class FakeLLMConnector(GenericLLMConnector):
+    """Connector without batch API, so batches use the local stand-in"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def is_available(self) -> bool:
+        return True
+
+    def generate_text(self, system_prompt, user_prompt, params):
+        self.prompts.append(user_prompt)
+        return LLMResult(text=f"<p>Bericht {len(self.prompts)}</p>")
+
+    def get_available_models(self) -> list[str]:
+        return []
+
+    def reinitialize(self) -> None:
+        pass
+
+
+class DeferredGenerationServiceTests(TestCase):
+    def setUp(self):
+        self.batch_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.batch_dir, ignore_errors=True)
+        settings_override = override_settings(
+            LLM_BATCH_DIR=self.batch_dir, LLM_BATCH_LOCAL_DELAY_SECONDS=0, LLM_BATCH_MAX_HOURS=30
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(email="a@example.com", password="x")
+        self.template = DocumentTemplate.objects.create(
+            name="Bericht",
+            template_type=DocumentTemplate.TemplateType.REPORT,
+            is_predefined=True,
+            user_prompt="Bericht schreiben",
+            general_instructions="Sachlich",
+        )
+        self.report = Report.objects.create(user=self.user, title="Bericht")
+        self.generation = ReportService().defer(self.report, self.template.pk, user=self.user)
+
+        self.service = DeferredGenerationService()
+        self.connector = FakeLLMConnector()
+        self.service.llm_connector = self.connector
+
+    def test_submit_and_collect_completes_report(self):
+        self.assertEqual(self.service.submit_pending(), 1)
+        self.generation.refresh_from_db()
+        self.assertEqual(self.generation.status, DeferredGeneration.Status.SUBMITTED)
+        self.assertTrue(self.generation.batch_id)
+
+        self.assertEqual(self.service.collect(), 1)
+        self.generation.refresh_from_db()
+        self.report.refresh_from_db()
+        self.assertEqual(self.generation.status, DeferredGeneration.Status.COMPLETED)
+        self.assertEqual(self.report.content, "<p>Bericht 1</p>")
+        self.assertFalse(self.report.is_generating)
+        # Batch files are removed once the results are written
+        self.assertEqual(os.listdir(self.batch_dir), [])
+
+    def test_submitted_generation_is_not_submitted_again(self):
+        self.service.submit_pending()
+        self.assertEqual(self.service.submit_pending(), 0)
+
+    def test_failed_submission_leaves_generation_pending(self):
+        def fail(requests):
+            raise LLMError("Anbieter nicht erreichbar")
+
+        self.connector.submit_batch = fail
+        with self.assertRaises(LLMError):
+            self.service.submit_pending()
+        self.generation.refresh_from_db()
+        self.assertEqual(self.generation.status, DeferredGeneration.Status.PENDING)
+
+    def test_unreadable_batch_fails_after_deadline(self):
+        self.service.submit_pending()
+        shutil.rmtree(self.batch_dir)
+
+        self.assertEqual(self.service.collect(), 0)
+        self.generation.refresh_from_db()
+        self.assertEqual(self.generation.status, DeferredGeneration.Status.SUBMITTED)
+
+        DeferredGeneration.objects.filter(pk=self.generation.pk).update(
+            submitted_at=timezone.now() - timedelta(hours=31)
+        )
+        self.assertEqual(self.service.collect(), 1)
+        self.generation.refresh_from_db()
+        self.report.refresh_from_db()
+        self.assertEqual(self.generation.status, DeferredGeneration.Status.FAILED)
+        self.assertFalse(self.report.is_generating)
@@ -13,6 +13,11 @@ urlpatterns = [
     path("<int:pk>/edit/", report_viewset.update, name="report_edit"),
     path("<int:pk>/delete/", report_viewset.destroy, name="report_delete"),
     path("<int:pk>/generate-content/", report_viewset.generate_content, name="generate_content"),
+    path(
+        "<int:pk>/regenerate-section/",
+        report_viewset.regenerate_section,
+        name="regenerate_section",
+    ),
     path("<int:pk>/save-content/", report_viewset.save_content, name="save_content"),
     path(
         "<int:pk>/create-from-template/",
@@ -3,24 +3,34 @@ from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 import json
 import logging
-from .tasks import generate_report_content_task
+from .tasks import generate_report_content_task, regenerate_report_section_task
 
 from document_templates.models import DocumentTemplate
+from document_templates import registry as template_registry
 from document_templates.service import TemplateService
 
 from .models import Report
 from .forms import ReportForm, ReportContentForm
 from core.forms import AudioInputForm, DocumentFileInputForm, DocumentTextInputForm
+from core.services import AutosaveConflict, AutosaveError, DocumentAutosaveService
+from core.utils.conditional import conditional_page, document_etag
+from core.utils.html_sanitizer import EDITOR_TAGS
 from .services import ReportService
 
 logger = logging.getLogger(__name__)
 
 
+def report_detail_etag(request, pk=None):
+    """The detail page shows the report and the user's report templates"""
+    return document_etag(request, Report, pk, template_registry.get_cache_version(request.user))
+
+
 class ReportViewSet(viewsets.ViewSet):
     """
     A ViewSet for managing report CRUD operations and custom actions.
@@ -33,6 +43,7 @@ class ReportViewSet(viewsets.ViewSet):
             raise ValueError("Request is required for get_queryset")
         return Report.objects.filter(user=request.user).order_by("-created_at")
 
+    @method_decorator(conditional_page(report_detail_etag))
     def retrieve(self, request, pk=None):
         """Retrieve a specific report detail view"""
         # CRITICAL SECURITY: Only allow access to user's own reports
@@ -42,6 +53,16 @@ class ReportViewSet(viewsets.ViewSet):
         audio_inputs = report.audio_inputs.order_by("-created_at")
         document_inputs = report.document_inputs.order_by("-created_at")
 
+        # Check if session notes are being generated
+        update_generation_status = report.is_generating
+
+        # Check if any audio or document inputs are being processed (lazy, the
+        # cached input display does not need it)
+        any_inputs_processing = SimpleLazyObject(
+            lambda: audio_inputs.filter(processing_successful=None).exists()
+            or document_inputs.filter(processing_successful=None).exists()
+        )
+
         # Get available templates for report generation
         template_service = TemplateService()
         report_templates = template_service.get_available_templates(
@@ -56,39 +77,7 @@ class ReportViewSet(viewsets.ViewSet):
         
         # Get context summary
         report_service = ReportService()
-        context_summary = report_service.get_context_summary(report)
-
-        # Check if session notes are being generated
-        update_generation_status = report.is_generating
-
-        # Check if any audio or document inputs are being processed
-        any_inputs_processing = (
-                audio_inputs.filter(processing_successful=None).exists()
-                or document_inputs.filter(processing_successful=None).exists()
-        )
-
-        if request.headers.get("HX-Request") and bool(request.GET.get("update_generation_status", False)):
-            return render(
-                request,
-                "partials/report_card.html",
-                {
-                    "report": report,
-                    "report_content": report.content,
-                    "update_generation_status": update_generation_status,
-                },
-            )
-
-        if request.headers.get("HX-Request") and bool(request.GET.get("update_session_material", False)):
-            return render(
-                request,
-                "partials/input_display_with_material_report_ready.html",
-                {
-                    "session": report,
-                    "any_inputs_processing": any_inputs_processing,
-                    "audio_inputs": audio_inputs,
-                    "document_inputs": document_inputs,
-                },
-            )
+        context_summary = SimpleLazyObject(lambda: report_service.get_context_summary(report))
 
         return render(
             request,
@@ -196,6 +185,18 @@ class ReportViewSet(viewsets.ViewSet):
             if report.is_generating:
                 return JsonResponse({"error": "Bericht wird bereits generiert"}, status=400)
 
+            if data.get("deferred"):
+                try:
+                    ReportService().defer(report, int(template_id), user=request.user)
+                except DocumentTemplate.DoesNotExist:
+                    return JsonResponse({"error": "Vorlage nicht gefunden"}, status=404)
+                return JsonResponse(
+                    {
+                        "success": True,
+                        "message": "Der Bericht wird im Hintergrund erstellt und ist spätestens morgen fertig.",
+                    }
+                )
+
             generate_report_content_task.delay(
                 report_id=report.id, template_id=int(template_id), user_id=request.user.id
             )
@@ -213,24 +214,64 @@ class ReportViewSet(viewsets.ViewSet):
                 {"error": f"Fehler beim Starten der Generierung: {str(e)}"}, status=500
             )
 
+    @action(detail=True, methods=["post"])
+    def regenerate_section(self, request, pk=None):
+        """Regenerate one separately generated section of the report in background task"""
+        # CRITICAL SECURITY: Only allow access to user's own reports
+        report = get_object_or_404(Report, pk=pk, user=request.user)
+
+        try:
+            position = int(request.POST.get("position", ""))
+        except ValueError:
+            messages.error(request, "Abschnitt ist erforderlich")
+            return redirect("reports:report_detail", pk=report.pk)
+
+        if report.is_generating:
+            messages.error(request, "Bericht wird bereits generiert")
+            return redirect("reports:report_detail", pk=report.pk)
+
+        generated_section = report.generated_sections.filter(position=position).first()
+        if generated_section is None:
+            messages.error(request, "Abschnitt nicht gefunden")
+            return redirect("reports:report_detail", pk=report.pk)
+
+        regenerate_report_section_task.delay(
+            report_id=report.id, position=position, user_id=request.user.id
+        )
+        messages.success(
+            request,
+            f"Der Abschnitt \"{generated_section.title}\" wird neu generiert. "
+            "Die Seite wird automatisch aktualisiert.",
+        )
+        return redirect("reports:report_detail", pk=report.pk)
+
     @action(detail=True, methods=["post"])
     # @method_decorator(csrf_exempt)
     def save_content(self, request, pk=None):
-        """Save report content"""
+        """Save report content with HTML sanitization (editor autosaves send patches)"""
         # CRITICAL SECURITY: Only allow access to user's own reports
         report = get_object_or_404(Report, pk=pk, user=request.user)
+        autosave_service = DocumentAutosaveService(EDITOR_TAGS)
         
         try:
-            content = request.POST.get('content', '')
-            report.content = content
-            report.save()
+            result = autosave_service.autosave_from_form(report, request.POST, "content")
             
-            if request.headers.get("HX-Request"):
+            if "content_version" in request.POST:
+                return JsonResponse(result)  # Editor autosave needs the new version
+            elif request.headers.get("HX-Request"):
                 return HttpResponse("")  # Empty response for HTMX auto-save
             else:
                 messages.success(request, "Berichtinhalt wurde erfolgreich gespeichert.")
                 return redirect("reports:report_detail", pk=report.pk)
                 
+        except AutosaveError as e:
+            if "content_version" in request.POST:
+                status = 409 if isinstance(e, AutosaveConflict) else 400
+                return JsonResponse(
+                    {"error": str(e), "version": report.content_version}, status=status
+                )
+            messages.error(request, f"Fehler beim Speichern: {str(e)}")
+            return redirect("reports:report_detail", pk=report.pk)
         except Exception as e:
             logger.error(f"Error saving content: {str(e)}")
             if request.headers.get("HX-Request"):
@@ -254,7 +295,7 @@ class ReportViewSet(viewsets.ViewSet):
                 return redirect("reports:report_detail", pk=report.pk)
 
             try:
-                template = DocumentTemplate.objects.get_template(
+                template = template_registry.get_template(
                     int(template_id), DocumentTemplate.TemplateType.REPORT, user=request.user
                 )
             except Exception:
@@ -290,7 +331,8 @@ class ReportViewSet(viewsets.ViewSet):
             # Prepare title
             title = report.title
 
-            pdf_data = export_service.export_notes_to_pdf(
+            pdf_data = export_service.export_document_to_pdf(
+                report,
                 title=title,
                 date=report.created_at,
                 content=report.content,
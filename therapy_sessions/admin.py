@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Session
+from .models import Session, SummaryBackfill
 
 
 class SessionInline(admin.TabularInline):
@@ -19,3 +19,10 @@ class SessionAdmin(admin.ModelAdmin):
         ("Inhalt", {"fields": ("content", "summary")}),
         ("System", {"fields": ("created_at", "updated_at"), "classes": ("collapse",)}),
     )
+
+
+@admin.register(SummaryBackfill)
+class SummaryBackfillAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "processed_count", "failed_count", "total_count", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = [field.name for field in SummaryBackfill._meta.fields]
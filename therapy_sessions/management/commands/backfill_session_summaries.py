@@ -0,0 +1,117 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from therapy_sessions.models import SummaryBackfill
+from therapy_sessions.services import SummaryBackfillService
+from therapy_sessions.tasks import backfill_session_summaries_task
+
+
+def parse_date(value: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-generate session summaries in packed batch requests, e.g. after SUMMARY_PROMPT "
+        "or the model changed. Progress is checkpointed and can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only sessions of the user with this email")
+        parser.add_argument("--since", type=parse_date, help="Only sessions on or after this date")
+        parser.add_argument("--until", type=parse_date, help="Only sessions on or before this date")
+        parser.add_argument(
+            "--only-missing", action="store_true", help="Only sessions without a summary"
+        )
+        parser.add_argument("--model", default="", help="Model to use instead of the default")
+        parser.add_argument("--resume", type=int, metavar="ID", help="Continue the backfill with this ID")
+        parser.add_argument(
+            "--sync", action="store_true", help="Run in this process instead of a Celery worker"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only show how many sessions and requests it takes"
+        )
+        parser.add_argument("--list", action="store_true", help="List recent backfills")
+
+    def handle(self, *args, **options):
+        service = SummaryBackfillService()
+
+        if options["list"]:
+            for backfill in SummaryBackfill.objects.all()[:20]:
+                outdated = backfill.prompt_hash != service.get_prompt_hash(backfill.model)
+                self.stdout.write(f"{backfill.pk:>5}  {backfill}{'  (prompt changed since)' if outdated else ''}")
+            return
+
+        if options["resume"]:
+            backfill = self._get_backfill(options["resume"], service)
+        else:
+            selection = {
+                "date_from": options["since"],
+                "date_to": options["until"],
+                "only_missing": options["only_missing"],
+            }
+            if options["user"]:
+                try:
+                    selection["user"] = get_user_model().objects.get(email=options["user"])
+                except get_user_model().DoesNotExist:
+                    raise CommandError(f"User not found: {options['user']}")
+
+            if options["dry_run"]:
+                sessions = list(service.get_sessions(SummaryBackfill(**selection)))
+                self.stdout.write(
+                    f"{len(sessions)} sessions in {len(service.pack(sessions))} requests"
+                )
+                return
+
+            backfill = service.create_backfill(model=options["model"], **selection)
+            self.stdout.write(f"Backfill {backfill.pk}: {backfill.total_count} sessions")
+
+        if not options["sync"]:
+            backfill_session_summaries_task.delay(backfill.pk)
+            self.stdout.write(
+                f"Backfill {backfill.pk} queued; check progress with --list, "
+                f"continue an interrupted run with --resume {backfill.pk}"
+            )
+            return
+
+        while service.process(backfill, settings.SUMMARY_BACKFILL_REQUESTS_PER_TASK):
+            self.stdout.write(
+                f"{backfill.processed_count}/{backfill.total_count} sessions "
+                f"({backfill.failed_count} failed, {backfill.request_count} requests)"
+            )
+        if backfill.status == SummaryBackfill.Status.FAILED:
+            raise CommandError(
+                f"Backfill {backfill.pk} failed: {backfill.error} (continue with --resume {backfill.pk})"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfill {backfill.pk} finished: {backfill.processed_count} summaries, "
+                f"{backfill.failed_count} failed, {backfill.request_count} requests"
+            )
+        )
+
+    def _get_backfill(self, backfill_id: int, service: SummaryBackfillService) -> SummaryBackfill:
+        try:
+            backfill = SummaryBackfill.objects.get(pk=backfill_id)
+        except SummaryBackfill.DoesNotExist:
+            raise CommandError(f"Backfill not found: {backfill_id}")
+        if backfill.status == SummaryBackfill.Status.COMPLETED:
+            raise CommandError(f"Backfill {backfill_id} is already completed")
+        if backfill.prompt_hash != service.get_prompt_hash(backfill.model):
+            self.stderr.write(
+                self.style.WARNING(
+                    "The summary prompts changed since this backfill started; already "
+                    "processed sessions keep their summaries"
+                )
+            )
+
+        backfill.status = SummaryBackfill.Status.PENDING
+        backfill.error = ""
+        backfill.save(update_fields=["status", "error", "updated_at"])
+        return backfill
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from core.models import BaseDocument
@@ -24,3 +25,56 @@ class Session(BaseDocument):
     
     def __str__(self):
         return f"{self.title or 'Sitzung'} - {self.date.strftime('%d.%m.%Y %H:%M')}"
+
+
+class SummaryBackfill(models.Model):
+    """
+    Checkpoint of a summary backfill (backfill_session_summaries command)
+
+    Selected sessions are processed in primary key order; last_session_id is the
+    cursor a resumed backfill continues after.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Wartend"
+        RUNNING = "running", "Läuft"
+        COMPLETED = "completed", "Fertig"
+        FAILED = "failed", "Fehlgeschlagen"
+
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+
+    # Selection
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True
+    )
+    date_from = models.DateField(null=True, blank=True)
+    date_to = models.DateField(null=True, blank=True)
+    only_missing = models.BooleanField(default=False)
+
+    # Generation: model override and hash of the prompts the backfill was started with
+    model = models.CharField(max_length=100, blank=True)
+    prompt_hash = models.CharField(max_length=64)
+
+    # Progress
+    last_session_id = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    request_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Zusammenfassungs-Nachlauf"
+        verbose_name_plural = "Zusammenfassungs-Nachläufe"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Nachlauf {self.pk} ({self.processed_count}/{self.total_count}, {self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.COMPLETED, self.Status.FAILED)
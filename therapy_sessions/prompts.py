@@ -46,4 +46,22 @@ Fasse folgende Therapiesitzung zusammen:
 {session_notes}
 
 Zusammenfassung:
-"""
\ No newline at end of file
+"""
+
+# Summaries of several sessions in one request (summary backfills). SUMMARY_PROMPT is
+# embedded, so backfills follow changes to it.
+BATCH_SUMMARY_PROMPT = """Fasse jede der folgenden {count} Therapiesitzungen einzeln zusammen. Gehe für jede
+Sitzung genau so vor, wie es diese Anweisung für eine einzelne Sitzung beschreibt:
+
+---
+{summary_prompt}
+---
+
+Antworte ausschließlich mit einem JSON-Objekt, das die Nummer jeder Sitzung auf ihre
+Zusammenfassung abbildet, z.B. {{"12": "Zusammenfassung", "15": "Zusammenfassung"}}.
+
+{sessions}"""
+
+BATCH_SUMMARY_SESSION = """### Sitzung {session_id}
+{session_notes}
+"""
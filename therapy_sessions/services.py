@@ -1,11 +1,29 @@
+import hashlib
+import json
+import re
 from typing import Optional
+from django.conf import settings
+from django.utils import timezone
 from core.ai_connectors import get_llm_connector
 from core.ai_connectors.base.llm import LLMGenerationParams
+from core.models import BaseDocument
 from core.utils.ai_helpers import build_gender_context
-from core.services import UnifiedInputService
+from core.utils.db import db_idle
+from core.utils.html_sanitizer import html_to_text
+from core.utils.prompt_assembly import (
+    AssembledPrompt,
+    EXISTING_CONTENT_INSTRUCTIONS,
+    PromptBuilder,
+    RESPONSE_FORMAT_INSTRUCTIONS,
+)
+from core.services import SectionGenerationService, UnifiedInputService
 from document_templates.models import DocumentTemplate
+from document_templates import registry as template_registry
 from document_templates.service import TemplateService
+from therapy_sessions.models import Session, SummaryBackfill
 from therapy_sessions.prompts import (
+    BATCH_SUMMARY_PROMPT,
+    BATCH_SUMMARY_SESSION,
     SUMMARY_PROMPT,
     SYSTEM_PROMPT_SUMMARY,
     SYSTEM_PROMPT,  # Fallback
@@ -22,6 +40,9 @@ class SessionService:
         self.llm_connector = get_llm_connector()
         self.template_service = TemplateService()
         self.unified_input_service = UnifiedInputService()
+        self.section_service = SectionGenerationService(
+            self.llm_connector, self.unified_input_service
+        )
 
     def is_available(self) -> bool:
         """Check if LLM service is available"""
@@ -37,71 +58,64 @@ class SessionService:
             return ""
 
         prompt = SUMMARY_PROMPT.format(session_notes=session_notes)
-        params = LLMGenerationParams(max_tokens=100)
-        result = self.llm_connector.generate_text(SYSTEM_PROMPT_SUMMARY, prompt, params)
+        params = LLMGenerationParams(max_tokens=100, hedge=True, latency_key="summary")
+        with db_idle():
+            result = self.llm_connector.generate_text(SYSTEM_PROMPT_SUMMARY, prompt, params)
         return result.text
 
-    def _build_context_prefix(self, session, existing_notes: str = None) -> str:
+    def _build_prompt(self, session, template: DocumentTemplate) -> AssembledPrompt:
         """
-        Build the context prefix from unified inputs
+        Build the prompt from the template and unified inputs
+
+        Static template instructions come first and the session specific context last,
+        so the shared prefix can be served from the provider's prompt cache.
 
         Args:
-            session: The session to build context for
-            existing_notes: Existing session notes (if any)
+            session: The session to build the prompt for
+            template: The template to use
 
         Returns:
-            Formatted context prefix
+            Assembled system and user prompt
         """
-        # Use unified input service to get combined text
-        combined_text = self.unified_input_service.get_combined_text(session)
-
-        # Start building the context prefix
-        context_prefix = ""
+        builder = PromptBuilder(SYSTEM_PROMPT)
+        builder.add_instructions(
+            "Erstelle strukturierte Sitzungsnotizen basierend auf Informationen zu einer Therapiesitzung.",
+            heading="AUFGABE",
+        )
+        builder.add_instructions(
+            template.general_instructions,
+            heading="ALLGEMEINE ANWEISUNGEN FÜR DIE ERSTELLUNG DER SITZUNGSNOTIZEN",
+        )
+        builder.add_instructions(
+            template.user_prompt, heading="STRUKTUR FÜR DIE ERSTELLUNG DER SITZUNGSNOTIZEN"
+        )
+        builder.add_instructions(RESPONSE_FORMAT_INSTRUCTIONS, heading="ANTWORTFORMAT")
 
         # Add patient gender context if provided
-        gender_context = build_gender_context(session.patient_gender)
-        if gender_context:
-            context_prefix += gender_context
+        builder.add_context(build_gender_context(session.patient_gender))
 
+        # Use unified input service to get combined text
+        combined_text = self.unified_input_service.get_combined_text(session)
         if not combined_text.strip():
-            context_prefix += """**HINWEIS:** Keine Kontextdateien verfügbar. Erstelle generische Sitzungsnotizen basierend auf der Vorlage.
-
-"""
-            return context_prefix
-
-        # Format combined input text
-        context_prefix += f"""**SITZUNGSINFORMATIONEN**
-
-{combined_text}
-
-"""
-
-        # Include existing notes if they exist
-        if existing_notes and existing_notes.strip():
-            context_prefix += f"""**VORHANDENE NOTIZEN**
-Die folgenden Notizen existieren bereits für diese Sitzung. Bitte berücksichtige diese und
-erweitere sie sinnvoll mit den Informationen aus den Sitzungsinformationen, wo es angemessen ist.
-Füge keine neuen Abschnitte hinzu:
-1. Entweder erweitere die bestehenden Abschnitte wenn das neue Format mit dem vorhandenen Format kompatibel ist.
-2. Oder ersetze die bestehenden Abschnitte mit dem neuen Format, schau dir aber den Inhalt an und übertrage
-wenn es sinnvoll ist.
-
-{existing_notes}
-
-"""
+            builder.add_context(
+                "Keine Kontextdateien verfügbar. Erstelle generische Sitzungsnotizen basierend auf der Vorlage.",
+                heading="HINWEIS:",
+            )
+            return builder.build()
 
-        return context_prefix
+        builder.add_context(combined_text, heading="SITZUNGSINFORMATIONEN")
+        return builder.build()
 
-    def generate_with_template(
-        self, session, template: DocumentTemplate, existing_notes: str = None
-    ) -> str:
+    def generate_with_template(self, session, template: DocumentTemplate) -> str:
         """
         Generate session notes using a specific template
 
+        Existing notes are carried over. If their sections were generated with the
+        template, only the sections affected by input changes since are regenerated.
+
         Args:
             session: The session to generate notes for
             template: The template to use
-            existing_notes: Existing session notes (if any)
 
         Returns:
             Generated session notes
@@ -110,53 +124,48 @@ wenn es sinnvoll ist.
             raise ValueError("LLM connector ist nicht verfügbar")
 
         try:
-            context_prefix = self._build_context_prefix(session, existing_notes)
-
-            # Combine context prefix with template structure
-            full_prompt = f"""
-            **AUFGABE** 
-            Erstelle strukturierte Sitzungsnotizen basierend auf Informationen zu einer Therapiesitzung.
-            
-        
-            **ALLGEMEINE ANWEISUNGEN FÜR DIE ERSTELLUNG DER SITZUNGSNOTIZEN**
-            {template.general_instructions}
-            
-            
-            **STRUKTUR FÜR DIE ERSTELLUNG DER SITZUNGSNOTIZEN**
-            {template.user_prompt}
-            
-        
-            {context_prefix}
-        
-            
-            **ANTWORTFORMAT**
-            Antworte in HTML-Format mit folgenden erlaubten Tags: <p>, <strong>, <ul>, <ol>, <li>
-            """
+            prompt = self._build_prompt(session, template)
+
+            if self.section_service.is_split(template):
+                notes = None
+                if session.notes.strip():
+                    notes = self.section_service.update(session, template, prompt)
+                if notes is None:
+                    notes = self.section_service.generate(
+                        session, template, prompt, existing_content=session.notes
+                    )
+                return notes
+
+            if session.notes.strip():
+                prompt = prompt.with_context(
+                    f"{EXISTING_CONTENT_INSTRUCTIONS}\n\n{session.notes}", heading="VORHANDENE NOTIZEN"
+                )
 
             # Generate the notes using LLM connector
             params = LLMGenerationParams(
                 max_tokens=template.max_tokens,
                 temperature=template.temperature,
+                latency_key="session_notes",
             )
 
-            result = self.llm_connector.generate_text(
-                system_prompt=SYSTEM_PROMPT,
-                user_prompt=full_prompt,
-                params=params,
+            with db_idle():
+                result = self.llm_connector.generate_text(
+                    system_prompt=prompt.system_prompt,
+                    user_prompt=prompt.user_prompt,
+                    params=params,
+                )
+            logger.info(
+                f"Session notes for Session {session.pk} generated: "
+                f"{result.cached_tokens or 0}/{result.prompt_tokens or 0} prompt tokens from cache"
             )
 
+            self.section_service.clear(session)
             return result.text
 
         except Exception as e:
             raise Exception(f"Fehler bei der Erstellung der Sitzungsnotizen: {str(e)}")
 
-    def generate(
-        self,
-        session_id: int,
-        template_id: int,
-        user_id: Optional[int] = None,
-        existing_notes: str = None,
-    ):
+    def generate(self, session_id: int, template_id: int, user_id: Optional[int] = None):
         """
         Generate session notes for background tasks
 
@@ -164,7 +173,6 @@ wenn es sinnvoll ist.
             session_id: ID of the Session instance
             template_id: ID of the DocumentTemplate to use
             user_id: ID of the user for template access validation
-            existing_notes: Existing session notes (if any)
 
         Returns:
             Task result dictionary
@@ -205,14 +213,14 @@ wenn es sinnvoll ist.
 
             # Validate template access
             try:
-                template = DocumentTemplate.objects.get_template(
+                template = template_registry.get_template(
                     int(template_id), DocumentTemplate.TemplateType.SESSION_NOTES, user=user
                 )
             except Exception as e:
                 raise ValueError(f"Template nicht gefunden: {str(e)}")
 
             # Generate session notes
-            session_notes = self.generate_with_template(session, template, existing_notes)
+            session_notes = self.generate_with_template(session, template)
 
             # Generate summary if notes were created
             summary = None
@@ -242,6 +250,55 @@ wenn es sinnvoll ist.
             session.mark_as_failed()
             return {"success": False, "error": str(exc)}
 
+    def regenerate_section(self, session_id: int, position: int, user_id: Optional[int] = None):
+        """
+        Generate one separately generated section of the session notes again, for
+        background tasks
+
+        Args:
+            session_id: ID of the Session instance
+            position: Position of the section in the template
+            user_id: ID of the user for template access validation
+
+        Returns:
+            Task result dictionary
+        """
+        from django.contrib.auth import get_user_model
+
+        try:
+            session = Session.objects.get(id=session_id)
+        except Session.DoesNotExist:
+            logger.error(f"Session with id {session_id} not found")
+            return {"success": False, "error": "Session not found"}
+
+        session.mark_as_generating()
+
+        try:
+            generated_section = session.generated_sections.filter(position=position).first()
+            if generated_section is None:
+                raise ValueError("Abschnitt nicht gefunden")
+
+            user = get_user_model().objects.filter(id=user_id).first() if user_id else None
+            template = template_registry.get_template(
+                generated_section.template_id, DocumentTemplate.TemplateType.SESSION_NOTES, user=user
+            )
+            if not self.is_available():
+                raise ValueError("LLM connector ist nicht verfügbar")
+
+            prompt = self._build_prompt(session, template)
+            session.notes = self.section_service.regenerate(session, template, position, prompt)
+            session.mark_as_success()
+
+            logger.info(f"Section {position} of Session {session_id} regenerated")
+            return {"success": True, "session_id": session_id, "position": position}
+
+        except Exception as exc:
+            logger.error(
+                f"Error regenerating section {position} of Session {session_id}: {str(exc)}"
+            )
+            session.mark_as_failed()
+            return {"success": False, "error": str(exc)}
+
     def get_context_summary(self, session):
         """
         Get a summary of unified inputs for a session
@@ -272,6 +329,208 @@ wenn es sinnvoll ist.
         return summary
 
 
+class SummaryBackfillService:
+    """
+    Re-generates the summaries of existing sessions, e.g. after SUMMARY_PROMPT or the
+    model changed
+
+    The notes of many sessions are packed into one request that answers with a JSON
+    object of summaries. Progress is checkpointed in a SummaryBackfill after every
+    request, so an interrupted backfill continues where it stopped.
+    """
+
+    # Output tokens per summary (max. 50 words) and for the JSON around them
+    TOKENS_PER_SUMMARY = 120
+    TOKENS_OVERHEAD = 50
+
+    def __init__(self):
+        self.llm_connector = get_llm_connector()
+
+    @staticmethod
+    def get_prompt_hash(model: str = "") -> str:
+        """Hash of the summary prompts and model, to tell whether a backfill is outdated"""
+        prompts = "\0".join((SYSTEM_PROMPT_SUMMARY, SUMMARY_PROMPT, BATCH_SUMMARY_PROMPT, model))
+        return hashlib.sha256(prompts.encode()).hexdigest()[:16]
+
+    def create_backfill(self, model: str = "", **selection) -> SummaryBackfill:
+        """
+        Create a pending backfill of the sessions matching the selection
+
+        Args:
+            model: Model override (default model of the connector if empty)
+            **selection: user, date_from, date_to, only_missing
+        """
+        backfill = SummaryBackfill(model=model, prompt_hash=self.get_prompt_hash(model), **selection)
+        backfill.total_count = self.get_sessions(backfill).count()
+        backfill.save()
+        return backfill
+
+    def get_sessions(self, backfill: SummaryBackfill):
+        """Selected sessions with notes after the backfill's checkpoint, in processing order"""
+        sessions = Session.objects.exclude(content="").filter(pk__gt=backfill.last_session_id)
+        if backfill.user_id:
+            sessions = sessions.filter(user_id=backfill.user_id)
+        if backfill.date_from:
+            sessions = sessions.filter(date__date__gte=backfill.date_from)
+        if backfill.date_to:
+            sessions = sessions.filter(date__date__lte=backfill.date_to)
+        if backfill.only_missing:
+            sessions = sessions.filter(summary="")
+        return sessions.order_by("pk").only("pk", "user_id", "content")
+
+    def pack(self, sessions: list) -> list[list[tuple]]:
+        """
+        Group sessions into requests of at most SUMMARY_BACKFILL_BATCH_SIZE sessions and
+        SUMMARY_BACKFILL_MAX_CHARS characters of notes (longer notes get a request alone)
+
+        Returns:
+            List of requests, each a list of (session, notes as plain text)
+        """
+        batches, batch, batch_chars = [], [], 0
+        for session in sessions:
+            notes = html_to_text(session.content).strip()
+            if batch and (
+                len(batch) >= settings.SUMMARY_BACKFILL_BATCH_SIZE
+                or batch_chars + len(notes) > settings.SUMMARY_BACKFILL_MAX_CHARS
+            ):
+                batches.append(batch)
+                batch, batch_chars = [], 0
+            batch.append((session, notes))
+            batch_chars += len(notes)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def summarize_batch(self, batch: list[tuple], model: str = "") -> dict[int, str]:
+        """
+        Summarize the sessions of one packed request
+
+        Returns:
+            Mapping of session id to summary; sessions the response misses are left out
+        """
+        prompt = BATCH_SUMMARY_PROMPT.format(
+            count=len(batch),
+            summary_prompt=SUMMARY_PROMPT.format(session_notes="(Notizen der jeweiligen Sitzung)"),
+            sessions="\n".join(
+                BATCH_SUMMARY_SESSION.format(session_id=session.pk, session_notes=notes)
+                for session, notes in batch
+            ),
+        )
+        params = LLMGenerationParams(
+            max_tokens=self.TOKENS_PER_SUMMARY * len(batch) + self.TOKENS_OVERHEAD,
+            model=model or None,
+            latency_key="summary_backfill",
+        )
+        with db_idle():
+            result = self.llm_connector.generate_text(SYSTEM_PROMPT_SUMMARY, prompt, params)
+        return self.parse_summaries(result.text, {session.pk for session, _ in batch})
+
+    @staticmethod
+    def parse_summaries(text: str, session_ids: set[int]) -> dict[int, str]:
+        """Read the summaries of the requested sessions from a JSON answer (code fences allowed)"""
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        try:
+            answer = json.loads(match.group(0)) if match else {}
+        except json.JSONDecodeError:
+            logger.warning("Summary backfill answer is not valid JSON")
+            return {}
+
+        summaries = {}
+        for key, summary in answer.items():
+            try:
+                session_id = int(str(key).strip().removeprefix("Sitzung").strip())
+            except ValueError:
+                continue
+            if session_id in session_ids and isinstance(summary, str) and summary.strip():
+                summaries[session_id] = summary.strip()
+        return summaries
+
+    def run_step(self, backfill: SummaryBackfill, max_requests: int) -> bool:
+        """
+        Process up to max_requests packed requests and checkpoint after each
+
+        Sessions a successful answer misses are retried in a request of their own; if
+        that answer misses them too, they are counted as failed and skipped. A failing
+        request (provider error, rate limit, ...) stops the step without moving the
+        checkpoint, so the backfill can be resumed from the same sessions.
+
+        Returns:
+            True if selected sessions remain
+
+        Raises:
+            Exception: The error of a failed request
+        """
+        limit = settings.SUMMARY_BACKFILL_BATCH_SIZE * max_requests
+        sessions = list(self.get_sessions(backfill)[:limit])
+
+        for batch in self.pack(sessions)[:max_requests]:
+            try:
+                backfill.request_count += 1
+                summaries = self.summarize_batch(batch, backfill.model)
+
+                for session, notes in batch:
+                    if session.pk in summaries:
+                        continue
+                    backfill.request_count += 1
+                    summaries.update(self.summarize_batch([(session, notes)], backfill.model))
+            except Exception:
+                backfill.save(update_fields=["request_count", "updated_at"])
+                raise
+
+            self._save_summaries(batch, summaries)
+            backfill.processed_count += len(summaries)
+            backfill.failed_count += len(batch) - len(summaries)
+            backfill.last_session_id = batch[-1][0].pk
+            backfill.save(
+                update_fields=[
+                    "last_session_id",
+                    "processed_count",
+                    "failed_count",
+                    "request_count",
+                    "updated_at",
+                ]
+            )
+
+        return self.get_sessions(backfill).exists()
+
+    def process(self, backfill: SummaryBackfill, max_requests: int) -> bool:
+        """
+        Run one step of a backfill and update its status
+
+        Returns:
+            True if the backfill needs another step
+        """
+        backfill.status = SummaryBackfill.Status.RUNNING
+        backfill.save(update_fields=["status", "updated_at"])
+
+        try:
+            remaining = self.run_step(backfill, max_requests)
+        except Exception as e:
+            logger.error(f"Summary backfill {backfill.pk} failed: {str(e)}")
+            backfill.status = SummaryBackfill.Status.FAILED
+            backfill.error = str(e)
+            backfill.save(update_fields=["status", "error", "updated_at"])
+            return False
+
+        if not remaining:
+            backfill.status = SummaryBackfill.Status.COMPLETED
+            backfill.completed_at = timezone.now()
+            backfill.save(update_fields=["status", "completed_at", "updated_at"])
+        return remaining
+
+    def _save_summaries(self, batch: list[tuple], summaries: dict[int, str]):
+        now = timezone.now()
+        updated = []
+        for session, _ in batch:
+            if summaries.get(session.pk):
+                session.summary = summaries[session.pk]
+                session.updated_at = now
+                updated.append(session)
+        Session.objects.bulk_update(updated, ["summary", "updated_at"])
+        for user_id in {session.user_id for session in updated}:
+            BaseDocument.invalidate_list_cache(user_id)
+
+
 # Singleton instance - lazy initialization
 _session_service_instance = None
 
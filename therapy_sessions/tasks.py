@@ -1,5 +1,11 @@
+import logging
 from celery import shared_task
-from .services import get_session_service
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from .models import SummaryBackfill
+from .services import SummaryBackfillService, get_session_service
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
@@ -11,7 +17,54 @@ def generate_session_notes_task(self, session_id, template_id, user_id=None, exi
         session_id: ID of the Session instance to generate notes for
         template_id: ID of the DocumentTemplate to use
         user_id: ID of the user (for template access validation)
-        existing_notes: Existing session notes (if any)
+        existing_notes: Ignored (tasks queued by older versions); the service carries
+            over the session's current notes
+    """
+    session_service = get_session_service()
+    return session_service.generate(session_id, template_id, user_id)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def regenerate_session_section_task(self, session_id, position, user_id=None):
+    """
+    Celery task to regenerate one section of the session notes in the background
+
+    Args:
+        session_id: ID of the Session instance
+        position: Position of the section in the template
+        user_id: ID of the user (for template access validation)
     """
     session_service = get_session_service()
-    return session_service.generate(session_id, template_id, user_id, existing_notes)
+    return session_service.regenerate_section(session_id, position, user_id)
+
+
+@shared_task
+def backfill_session_summaries_task(backfill_id):
+    """
+    Celery task running a summary backfill in steps
+
+    Each run makes up to SUMMARY_BACKFILL_REQUESTS_PER_TASK requests and enqueues the
+    next step, so workers stay available for interactive generations in between.
+
+    Args:
+        backfill_id: ID of the SummaryBackfill instance to process
+    """
+    try:
+        backfill = SummaryBackfill.objects.get(id=backfill_id)
+    except ObjectDoesNotExist:
+        logger.error(f"SummaryBackfill with id {backfill_id} not found")
+        return {"success": False, "error": "SummaryBackfill not found"}
+
+    if backfill.is_finished:
+        return {"success": backfill.status == SummaryBackfill.Status.COMPLETED, "backfill_id": backfill_id}
+
+    remaining = SummaryBackfillService().process(
+        backfill, settings.SUMMARY_BACKFILL_REQUESTS_PER_TASK
+    )
+    if remaining:
+        backfill_session_summaries_task.delay(backfill_id)
+    logger.info(
+        f"Summary backfill {backfill_id}: {backfill.processed_count}/{backfill.total_count} "
+        f"sessions after {backfill.request_count} requests"
+    )
+    return {"success": backfill.status != SummaryBackfill.Status.FAILED, "backfill_id": backfill_id}
@@ -22,6 +22,11 @@ urlpatterns = [
         session_viewset.generate_notes,
         name="session_generate_notes",
     ),
+    path(
+        "<int:pk>/regenerate-section/",
+        session_viewset.regenerate_section,
+        name="session_regenerate_section",
+    ),
     path("<int:pk>/save-notes/", session_viewset.save_notes, name="session_save_notes"),
     path(
         "<int:pk>/create-from-template/",
@@ -4,26 +4,39 @@ from django.urls import reverse_lazy
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils.functional import SimpleLazyObject
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 import json
-import re
 import logging
 from core.forms import AudioInputForm, DocumentFileInputForm, DocumentTextInputForm
 
 from django.shortcuts import render
-from core.services import PDFExportService
+from core.services import (
+    AutosaveConflict,
+    AutosaveError,
+    DocumentAutosaveService,
+    PDFExportService,
+)
+from core.utils.conditional import conditional_page, document_etag
+from core.utils.html_sanitizer import sanitize_html, SESSION_NOTE_TAGS
 from therapy_sessions.models import Session
 from therapy_sessions.forms import SessionForm
 from therapy_sessions.services import get_session_service
-from therapy_sessions.tasks import generate_session_notes_task
+from therapy_sessions.tasks import generate_session_notes_task, regenerate_session_section_task
 from document_templates.models import DocumentTemplate
+from document_templates import registry as template_registry
 from document_templates.service import TemplateService
 
 logger = logging.getLogger(__name__)
 
 
+def session_detail_etag(request, pk=None):
+    """The detail page shows the session and the user's session notes templates"""
+    return document_etag(request, Session, pk, template_registry.get_cache_version(request.user))
+
+
 class SessionViewSet(viewsets.ViewSet):
     """
     A ViewSet for managing session CRUD operations and custom actions.
@@ -44,6 +57,7 @@ class SessionViewSet(viewsets.ViewSet):
             return get_object_or_404(Session, pk=pk, user=request.user)
         return None
 
+    @method_decorator(conditional_page(session_detail_etag))
     def retrieve(self, request, pk=None):
         """Retrieve a specific session"""
         session = self.get_object(pk, request)
@@ -51,53 +65,30 @@ class SessionViewSet(viewsets.ViewSet):
         # Get unified inputs
         audio_inputs = session.audio_inputs.order_by("-created_at")
         document_inputs = session.document_inputs.order_by("-created_at")
+
+        # Check if session notes are being generated
+        update_generation_status = session.is_generating
+
+        # Check if any audio or document inputs are being processed (lazy, the
+        # cached input display does not need it)
+        any_inputs_processing = SimpleLazyObject(
+            lambda: audio_inputs.filter(processing_successful=None).exists()
+            or document_inputs.filter(processing_successful=None).exists()
+        )
+
         audio_form = AudioInputForm()
         document_file_form = DocumentFileInputForm()
         document_text_form = DocumentTextInputForm()
 
         # Check if any audio input has a transcription
-        has_transcribed_recordings = any(
-            audio_input.transcribed_text for audio_input in audio_inputs
-        )
+        has_transcribed_recordings = audio_inputs.exclude(transcribed_text="").exists()
 
         template_service = TemplateService()
         session_notes_templates = template_service.get_session_templates(user=request.user)
 
         # Get context summary
         session_service = get_session_service()
-        context_summary = session_service.get_context_summary(session)
-
-        # Check if session notes are being generated
-        update_generation_status = session.is_generating
-
-        # Check if any audio or document inputs are being processed
-        any_inputs_processing = (
-                audio_inputs.filter(processing_successful=None).exists()
-                or document_inputs.filter(processing_successful=None).exists()
-        )
-
-        if request.headers.get("HX-Request") and bool(request.GET.get("update_generation_status", False)):
-            return render(
-                request,
-                "partials/session_notes_card_with_session_summary.html",
-                {
-                    "session": session,
-                    "session_notes": session.notes,
-                    "update_generation_status": update_generation_status,
-                },
-            )
-
-        if request.headers.get("HX-Request") and bool(request.GET.get("update_session_material", False)):
-            return render(
-                request,
-                "partials/input_display_with_material_session_ready.html",
-                {
-                    "session": session,
-                    "any_inputs_processing": any_inputs_processing,
-                    "audio_inputs": audio_inputs,
-                    "document_inputs": document_inputs,
-                },
-            )
+        context_summary = SimpleLazyObject(lambda: session_service.get_context_summary(session))
 
         return render(
             request,
@@ -233,12 +224,10 @@ class SessionViewSet(viewsets.ViewSet):
                 messages.error(request, "Sitzungsnotizen werden bereits generiert")
                 return self._redirect_to_session_detail(pk)
 
-            existing_notes = session.notes if session.notes else None
             generate_session_notes_task.delay(
                 session_id=session.id,
                 template_id=int(template_id),
                 user_id=request.user.id,
-                existing_notes=existing_notes,
             )
 
             messages.success(
@@ -252,23 +241,62 @@ class SessionViewSet(viewsets.ViewSet):
 
         return self._redirect_to_session_detail(pk)
 
+    @action(detail=True, methods=["post"])
+    def regenerate_section(self, request, pk=None):
+        """Regenerate one separately generated section of the notes in background task"""
+        session = self.get_object(pk, request)
+
+        try:
+            position = int(request.POST.get("position", ""))
+        except ValueError:
+            messages.error(request, "Abschnitt ist erforderlich")
+            return self._redirect_to_session_detail(pk)
+
+        if session.is_generating:
+            messages.error(request, "Sitzungsnotizen werden bereits generiert")
+            return self._redirect_to_session_detail(pk)
+
+        generated_section = session.generated_sections.filter(position=position).first()
+        if generated_section is None:
+            messages.error(request, "Abschnitt nicht gefunden")
+            return self._redirect_to_session_detail(pk)
+
+        regenerate_session_section_task.delay(
+            session_id=session.id, position=position, user_id=request.user.id
+        )
+        messages.success(
+            request,
+            f"Der Abschnitt \"{generated_section.title}\" wird neu generiert. "
+            "Die Seite wird automatisch aktualisiert.",
+        )
+        return self._redirect_to_session_detail(pk)
+
     @action(detail=True, methods=["post"])
     def save_notes(self, request, pk=None):
-        """Save session notes with HTML sanitization"""
+        """Save session notes with HTML sanitization (editor autosaves send patches)"""
         session = self.get_object(pk, request)
+        autosave_service = DocumentAutosaveService(SESSION_NOTE_TAGS)
 
         try:
-            session_notes = request.POST.get("session_notes", "")
-            session.notes = self._sanitize_html(session_notes)
-            session.save()
+            result = autosave_service.autosave_from_form(session, request.POST, "session_notes")
 
             # Return different responses based on request type
-            if request.headers.get("HX-Request"):
+            if "content_version" in request.POST:
+                return JsonResponse(result)  # Editor autosave needs the new version
+            elif request.headers.get("HX-Request"):
                 return HttpResponse("")  # Empty response for HTMX auto-save
             else:
                 messages.success(request, "Notizen wurden erfolgreich gespeichert.")
                 return self._redirect_to_session_detail(pk)
 
+        except AutosaveError as e:
+            if "content_version" in request.POST:
+                status = 409 if isinstance(e, AutosaveConflict) else 400
+                return JsonResponse(
+                    {"error": str(e), "version": session.content_version}, status=status
+                )
+            messages.error(request, f"Fehler beim Speichern: {str(e)}")
+            return self._redirect_to_session_detail(pk)
         except Exception as e:
             if request.headers.get("HX-Request"):
                 return HttpResponse("", status=500)  # Error response for HTMX
@@ -290,7 +318,7 @@ class SessionViewSet(viewsets.ViewSet):
                 return self._redirect_to_session_detail(pk)
 
             try:
-                template = DocumentTemplate.objects.get_template(
+                template = template_registry.get_template(
                     int(template_id), DocumentTemplate.TemplateType.SESSION_NOTES, user=request.user
                 )
             except Exception:
@@ -321,7 +349,8 @@ class SessionViewSet(viewsets.ViewSet):
             if session.title:
                 title += f" - {session.title}"
 
-            pdf_data = export_service.export_notes_to_pdf(
+            pdf_data = export_service.export_document_to_pdf(
+                session,
                 title=title,
                 date=session.date,
                 content=session.notes,
@@ -360,29 +389,7 @@ class SessionViewSet(viewsets.ViewSet):
 
     def _sanitize_html(self, html_content):
         """Sanitize HTML content to allow only safe tags"""
-
-        allowed_tags = ["p", "br", "strong", "b", "em", "i", "u", "ul", "ol", "li"]
-
-        # First, remove all attributes from allowed tags (but keep the tags themselves)
-        for tag in allowed_tags:
-            # Handle opening tags with attributes
-            html_content = re.sub(
-                r"<(" + re.escape(tag) + r")\s[^>]*>", r"<\1>", html_content, flags=re.IGNORECASE
-            )
-
-        # Remove all disallowed tags completely (opening and closing)
-        # This pattern matches any tag that's not in our allowed list
-        allowed_pattern = "|".join(re.escape(tag) for tag in allowed_tags)
-        disallowed_pattern = re.compile(
-            r"<(?!/?\s*(?:" + allowed_pattern + r")\s*(?:\s[^>]*)?/?)\s*[^>]*>", re.IGNORECASE
-        )
-        html_content = disallowed_pattern.sub("", html_content)
-
-        # Clean up any malformed or empty tags
-        html_content = re.sub(r"<\s*>", "", html_content)  # Remove empty tags like <>
-        html_content = re.sub(r"<\s*/\s*>", "", html_content)  # Remove empty closing tags like </>
-
-        return html_content
+        return sanitize_html(html_content, SESSION_NOTE_TAGS)
 
     def _redirect_to_session_detail(self, pk):
         """Helper method to redirect to session detail"""